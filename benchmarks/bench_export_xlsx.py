@@ -0,0 +1,41 @@
+"""Compare the classic and write-only (fast) XLSX export modes.
+
+Usage: python benchmarks/bench_export_xlsx.py [sizes...] [--memory]
+Default sizes are 10000 and 100000 students. --memory re-runs each export
+under tracemalloc to report peak Python allocations (much slower).
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from desktop_app import core
+from benchmarks.synth import make_students, temp_app_home
+
+
+def main(argv=None):
+    argv = argv if argv is not None else sys.argv[1:]
+    memory = '--memory' in argv
+    sizes = [int(a) for a in argv if not a.startswith('--')] or [10000, 100000]
+    print(f"{'students':>10} {'mode':>8} {'seconds':>10} {'peak MB':>10}")
+    for n in sizes:
+        with temp_app_home(core) as d:
+            core.save_students(make_students(n, courses=8))
+            for fast in (False, True):
+                mode = 'fast' if fast else 'classic'
+                path = os.path.join(d, f'{mode}.xlsx')
+                t0 = time.perf_counter()
+                core.export_students_xlsx(path, fast=fast)
+                dt = time.perf_counter() - t0
+                peak = ''
+                if memory:
+                    tracemalloc.start()
+                    core.export_students_xlsx(path, fast=fast)
+                    peak = f"{tracemalloc.get_traced_memory()[1] / 1e6:.1f}"
+                    tracemalloc.stop()
+                print(f"{n:>10} {mode:>8} {dt:>10.2f} {peak:>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""Snapshot load/save time and size for each serialization format.
+
+Usage: python benchmarks/bench_formats.py [students] [courses]
+Defaults to 100000 students x 8 courses. The "legacy" row is the old
+pretty-printed stdlib JSON. orjson / msgpack are used when installed.
+"""
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from desktop_app import core, serialization
+from benchmarks.synth import make_students, temp_app_home
+
+
+def main(argv=None):
+    argv = argv if argv is not None else sys.argv[1:]
+    n = int(argv[0]) if argv else 100000
+    courses = int(argv[1]) if len(argv) > 1 else 8
+    students = make_students(n, courses=courses)
+    ids = [s['id'] for s in random.Random(0).sample(students, min(1000, n))]
+    print(f"{n} students x {courses} courses, orjson={'yes' if serialization.orjson else 'no'}")
+    print(f"{'format':>8} {'save s':>8} {'load s':>8} {'MB':>8} {'get ms':>8}")
+    for fmt in ['legacy'] + serialization.available_formats():
+        with temp_app_home(core):
+            core.ensure_data_dir()
+            t0 = time.perf_counter()
+            if fmt == 'legacy':
+                with open(core.DATA_FILE, 'w', encoding='utf-8') as f:
+                    json.dump(students, f, ensure_ascii=False, indent=2)
+            else:
+                serialization.dump(core.DATA_FILE, students, fmt)
+            save = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            store = core.load_store()
+            load = time.perf_counter() - t0
+            assert len(store) == n
+            del store
+            get = ''
+            if fmt == 'records':
+                backend = core.get_backend()
+                t0 = time.perf_counter()
+                for sid in ids:
+                    backend.get(sid)
+                get = f"{(time.perf_counter() - t0) * 1000 / len(ids):.3f}"
+            size = os.path.getsize(core.DATA_FILE) / 1e6
+            print(f"{fmt:>8} {save:>8.2f} {load:>8.2f} {size:>8.1f} {get:>8}")
+
+
+if __name__ == '__main__':
+    main()
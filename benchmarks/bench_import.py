@@ -0,0 +1,32 @@
+"""Benchmark import_scores: time should grow linearly with roster and file size.
+
+Usage: python benchmarks/bench_import.py [base_students] [steps]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from desktop_app import core
+from benchmarks.synth import make_students, write_grade_file, temp_app_home
+
+
+def main(argv=None):
+    argv = argv if argv is not None else sys.argv[1:]
+    base = int(argv[0]) if argv else 5000
+    steps = int(argv[1]) if len(argv) > 1 else 4
+    print(f"{'students':>10} {'rows':>10} {'seconds':>10} {'us/row':>10}")
+    for k in range(steps):
+        n = base * (2 ** k)
+        rows = n * 12
+        with temp_app_home(core) as d:
+            core.save_students(make_students(n, courses=8, seed=k))
+            path = write_grade_file(os.path.join(d, 'grades.csv'), core.load_students(), rows, seed=k)
+            t0 = time.perf_counter()
+            core.import_scores(path)
+            dt = time.perf_counter() - t0
+        print(f"{n:>10} {rows:>10} {dt:>10.3f} {dt / rows * 1e6:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+"""Benchmark import_scores_batch: wall time for many grade files vs. worker count.
+
+Usage: python benchmarks/bench_import_batch.py [files] [rows_per_file] [students]
+Scores are applied to an in-memory store (no save), so the numbers are parse
+plus merge; the parse part should shrink with the number of worker processes
+up to the core count.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from desktop_app import core
+from benchmarks.synth import make_students, write_grade_file, temp_app_home
+
+
+def main(argv=None):
+    argv = argv if argv is not None else sys.argv[1:]
+    files = int(argv[0]) if argv else 16
+    rows = int(argv[1]) if len(argv) > 1 else 100000
+    n = int(argv[2]) if len(argv) > 2 else 20000
+    cpus = os.cpu_count() or 1
+    counts = sorted({1, 2, 4, cpus} & set(range(1, max(cpus, 4) + 1)))
+    with temp_app_home(core) as d:
+        students = make_students(n, courses=8)
+        core.save_students(students)
+        grade_dir = os.path.join(d, 'grades')
+        os.makedirs(grade_dir)
+        for k in range(files):
+            write_grade_file(os.path.join(grade_dir, f'grades_{k:03d}.csv'), students, rows, seed=k)
+        print(f"{files} files x {rows} rows, {n} students, {cpus} CPUs")
+        print(f"{'workers':>8} {'seconds':>10} {'rows/s':>12}")
+        for w in counts:
+            store = core.load_store()
+            t0 = time.perf_counter()
+            core.import_scores_batch([grade_dir], workers=w, store=store)
+            dt = time.perf_counter() - t0
+            print(f"{w:>8} {dt:>10.2f} {files * rows / dt:>12.0f}")
+
+
+if __name__ == '__main__':
+    main()
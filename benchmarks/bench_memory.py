@@ -0,0 +1,52 @@
+"""Memory held by the roster: plain dicts from json.load vs. a StudentStore.
+
+Usage: python benchmarks/bench_memory.py [students] [courses]
+Defaults to 100000 students x 40 courses. Sizes are tracemalloc totals of
+live Python allocations after loading, so the numbers exclude interpreter
+baseline but include every string, list and array owned by the roster.
+"""
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from desktop_app import core
+from benchmarks.synth import make_students, temp_app_home
+
+
+def measure(load):
+    gc.collect()
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    obj = load()
+    dt = time.perf_counter() - t0
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, current, peak, dt
+
+
+def main(argv=None):
+    argv = argv if argv is not None else sys.argv[1:]
+    n = int(argv[0]) if argv else 100000
+    courses = int(argv[1]) if len(argv) > 1 else 40
+    with temp_app_home(core):
+        core.save_students(make_students(n, courses=courses))
+
+        def load_dicts():
+            with open(core.DATA_FILE, 'r', encoding='utf-8') as f:
+                return json.load(f)
+
+        print(f"{n} students x {courses} courses")
+        print(f"{'representation':>16} {'live MB':>10} {'peak MB':>10} {'seconds':>10}")
+        for label, load in (('dicts', load_dicts), ('StudentStore', core.load_store)):
+            obj, current, peak, dt = measure(load)
+            print(f"{label:>16} {current / 1e6:>10.1f} {peak / 1e6:>10.1f} {dt:>10.2f}")
+            del obj
+
+
+if __name__ == '__main__':
+    main()
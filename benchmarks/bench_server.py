@@ -0,0 +1,136 @@
+"""Load test for the local HTTP API: latency percentiles and requests/sec.
+
+Usage: python benchmarks/bench_server.py [students] [connections] [seconds] [--url http://host:port]
+Without --url a server over a synthetic roster is started in this process
+(on a background thread, so client and server share the machine). Each
+connection sends keep-alive requests back to back from a mix of lookups,
+searches, GPA and ranking queries; half of the ranking requests revalidate
+with If-None-Match.
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+import threading
+from urllib.parse import urlsplit, quote
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from desktop_app import core, server
+from benchmarks.synth import make_students, SURNAMES, GIVEN_CHARS
+
+MIX = (('student', 60), ('search', 15), ('gpa', 10), ('ranking', 10), ('ranking_304', 5))
+
+
+def start_local_server(n: int):
+    """Serve a synthetic roster on a free port; returns (host, port)."""
+    ready = threading.Event()
+    box = {}
+
+    def run():
+        async def main():
+            service = server.RosterService(core.StudentStore(make_students(n)))
+            srv = server.RosterServer(service, '127.0.0.1', 0)
+            await srv.start()
+            box['port'] = srv.port
+            ready.set()
+            await srv.serve_forever()
+        asyncio.run(main())
+
+    threading.Thread(target=run, daemon=True).start()
+    ready.wait()
+    return '127.0.0.1', box['port']
+
+
+async def request(reader, writer, path, headers=''):
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: x\r\n{headers}\r\n".encode())
+    await writer.drain()
+    head = await reader.readuntil(b'\r\n\r\n')
+    status = int(head.split(b' ', 2)[1])
+    length = 0
+    etag = None
+    for line in head.split(b'\r\n')[1:]:
+        name, _, value = line.partition(b':')
+        name = name.strip().lower()
+        if name == b'content-length':
+            length = int(value)
+        elif name == b'etag':
+            etag = value.strip().decode()
+    if length:
+        await reader.readexactly(length)
+    return status, etag
+
+
+async def client(host, port, ids, deadline, seed, samples):
+    rnd = random.Random(seed)
+    kinds = [k for k, w in MIX for _ in range(w)]
+    reader, writer = await asyncio.open_connection(host, port)
+    etag = None
+    try:
+        while time.perf_counter() < deadline:
+            kind = rnd.choice(kinds)
+            sid = quote(rnd.choice(ids))
+            headers = ''
+            if kind == 'student':
+                path = f"/students/{sid}"
+            elif kind == 'search':
+                path = f"/students?q={quote(rnd.choice(SURNAMES) + rnd.choice(GIVEN_CHARS))}&limit=20"
+            elif kind == 'gpa':
+                path = f"/students/{sid}/gpa"
+            else:
+                path = "/ranking?top=10&group_by=college"
+                if kind == 'ranking_304' and etag:
+                    headers = f"If-None-Match: {etag}\r\n"
+            t0 = time.perf_counter()
+            status, tag = await request(reader, writer, path, headers)
+            samples.append((kind, time.perf_counter() - t0, status))
+            if kind.startswith('ranking') and tag:
+                etag = tag
+    finally:
+        writer.close()
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))] if values else float('nan')
+
+
+async def run_load(host, port, ids, connections, seconds):
+    samples = []
+    deadline = time.perf_counter() + seconds
+    t0 = time.perf_counter()
+    await asyncio.gather(*(client(host, port, ids, deadline, i, samples) for i in range(connections)))
+    return samples, time.perf_counter() - t0
+
+
+def main(argv=None):
+    argv = list(argv if argv is not None else sys.argv[1:])
+    url = None
+    if '--url' in argv:
+        i = argv.index('--url')
+        url = argv[i + 1]
+        del argv[i:i + 2]
+    n = int(argv[0]) if argv else 20000
+    connections = int(argv[1]) if len(argv) > 1 else 16
+    seconds = float(argv[2]) if len(argv) > 2 else 5.0
+    if url:
+        parts = urlsplit(url)
+        host, port = parts.hostname, parts.port or 80
+        ids = [f"{2025000000 + i}" for i in range(n)]
+    else:
+        host, port = start_local_server(n)
+        ids = [s['id'] for s in make_students(n)]
+    samples, elapsed = asyncio.run(run_load(host, port, ids, connections, seconds))
+    print(f"{len(samples)} requests over {connections} connections in {elapsed:.1f}s: "
+          f"{len(samples) / elapsed:.0f} req/s")
+    print(f"{'endpoint':>12} {'count':>8} {'p50 ms':>9} {'p99 ms':>9}")
+    for kind in [k for k, _ in MIX] + ['all']:
+        lat = [dt for k, dt, _ in samples if kind == 'all' or k == kind]
+        print(f"{kind:>12} {len(lat):>8} {percentile(lat, 50) * 1e3:>9.2f} {percentile(lat, 99) * 1e3:>9.2f}")
+    errors = sum(1 for _, _, status in samples if status >= 400)
+    if errors:
+        print(f"{errors} error responses")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""GUI cold start: time to a visible window, time to a loaded roster, and the imports on the way.
+
+Usage: python benchmarks/bench_startup.py [students] [--repeat 5] [--top 15] [--out startup.json]
+
+Every run is a fresh interpreter (Qt offscreen platform, SIMS_IMPORTTIME=1)
+that starts the GUI the way gui_main.main() does over a synthetic roster of
+``students`` (default 20000). It reports the start-up phases recorded with
+instrument.mark() (best and mean over the runs), the slowest imports by self
+time, and any module from DEFERRED that was already imported when the window
+was shown; those belong off the start-up path.
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from desktop_app import core
+from benchmarks.synth import iter_students, temp_app_home
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+# Imported on first use only (export, import, large rosters, msgpack files)
+DEFERRED = ('openpyxl', 'numpy', 'csv', 'multiprocessing', 'msgpack', 'sqlite3')
+
+CHILD = r'''
+import os, sys, json
+sys.path.insert(0, os.environ['BENCH_ROOT'])
+from desktop_app import instrument  # first, as in gui_main
+from desktop_app import core, gui_main
+from PySide6.QtWidgets import QApplication
+from PySide6.QtCore import QTimer
+
+core.DATA_FILE = os.environ['BENCH_DATA']
+core.EXPORT_DIR = os.path.join(os.path.dirname(core.DATA_FILE), 'exports')
+core.EXPORT_METADATA = os.path.join(core.EXPORT_DIR, 'exports.json')
+deferred = os.environ['BENCH_DEFERRED'].split(',')
+
+app = QApplication([])
+w = gui_main.MainWindow()
+w.resize(1280, 720)
+w.show()
+instrument.mark('window_shown')
+early = [m for m in deferred if m in sys.modules]
+
+def poll():
+    if w._starting:
+        QTimer.singleShot(5, poll)
+    else:
+        app.quit()
+
+QTimer.singleShot(0, poll)
+app.exec()
+print(json.dumps({'students': len(w.store), 'phases': instrument.startup_phases(),
+                  'imports': instrument.import_times(), 'deferred_at_show': early}))
+'''
+
+
+def run_once(data_file: str) -> dict:
+    env = dict(os.environ, QT_QPA_PLATFORM='offscreen', SIMS_IMPORTTIME='1',
+               SIMS_IMPORTTIME_FILE=os.devnull, BENCH_ROOT=ROOT, BENCH_DATA=data_file,
+               BENCH_DEFERRED=','.join(DEFERRED))
+    out = subprocess.run([sys.executable, '-c', CHILD], env=env, capture_output=True, text=True, timeout=600)
+    if out.returncode != 0:
+        raise RuntimeError(f"start-up run failed:\n{out.stderr}")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="GUI cold-start timing")
+    parser.add_argument('students', nargs='?', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15, help="slowest imports to list")
+    parser.add_argument('--out', help="also write the runs as JSON")
+    args = parser.parse_args(argv)
+
+    runs = []
+    with temp_app_home(core):
+        core.save_students(iter_students(args.students))
+        # The first interpreter also writes .pyc files; do not count it
+        run_once(core.DATA_FILE)
+        for _ in range(args.repeat):
+            runs.append(run_once(core.DATA_FILE))
+
+    print(f"{runs[0]['students']} students, {len(runs)} runs")
+    print(f"{'phase':>14} {'best ms':>10} {'mean ms':>10}")
+    for i, p in enumerate(runs[0]['phases']):
+        times = [r['phases'][i]['at_s'] * 1000 for r in runs]
+        print(f"{p['phase']:>14} {min(times):>10.1f} {sum(times) / len(times):>10.1f}")
+
+    # Per-module self time: the best of the runs, to keep out scheduling noise
+    best = {}
+    for r in runs:
+        for imp in r['imports']:
+            cur = best.get(imp['module'])
+            if cur is None or imp['self_s'] < cur['self_s']:
+                best[imp['module']] = imp
+    print(f"\n{'self ms':>9} {'cumul. ms':>10}  module (slowest {args.top} by self time)")
+    for imp in sorted(best.values(), key=lambda i: i['self_s'], reverse=True)[:args.top]:
+        print(f"{imp['self_s'] * 1000:>9.1f} {imp['cumulative_s'] * 1000:>10.1f}  {imp['module']}")
+
+    early = sorted({m for r in runs for m in r['deferred_at_show']})
+    print("\nimported before the window was shown: " + (', '.join(early) if early else "none of " + ', '.join(DEFERRED)))
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump({'students': args.students, 'runs': runs}, f, ensure_ascii=False, indent=2)
+    return 1 if early else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,42 @@
+"""Pure-Python GPA/ranking versus the NumPy path in desktop_app.vector_stats.
+
+Usage: python benchmarks/bench_vector_stats.py [students] [courses]
+Defaults to 100000 students x 40 courses.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from desktop_app import core
+from desktop_app.vector_stats import ScoreArrays
+from benchmarks.synth import make_students
+
+
+def timed(label, fn):
+    t0 = time.perf_counter()
+    result = fn()
+    print(f"{label:>28} {(time.perf_counter() - t0) * 1000:>10.1f} ms")
+    return result
+
+
+def main(argv=None):
+    argv = argv if argv is not None else sys.argv[1:]
+    n = int(argv[0]) if argv else 100000
+    courses = int(argv[1]) if len(argv) > 1 else 40
+    store = core.StudentStore(make_students(n, courses=courses))
+    print(f"{n} students x {courses} courses")
+    timed('calc_gpa per student', lambda: [core.calc_gpa(s['courses']) for s in store])
+    timed('RankingIndex ranking', lambda: core.RankingIndex(store).ranking())
+    arrays = timed('ScoreArrays build', lambda: ScoreArrays(store))
+    timed('vectorized GPAs', arrays.gpas)
+    timed('vectorized rank', arrays.rank)
+    timed('vectorized rank by college', lambda: arrays.rank('competition', 'college'))
+    timed('ranking rows', arrays.ranking)
+    timed('course stats', arrays.course_stats)
+    timed('histogram by classnum', lambda: arrays.histogram(group_by='classnum'))
+    timed('pass rates by college', arrays.pass_rates)
+
+
+if __name__ == '__main__':
+    main()
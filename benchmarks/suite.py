@@ -0,0 +1,273 @@
+"""Benchmark suite over synthetic rosters, with JSON results for comparing runs.
+
+Usage: python benchmarks/suite.py [--sizes 1k,10k,100k] [--courses 8] [--repeat 3]
+                                  [--only load,rank,...] [--out results.json] [--compare old.json]
+
+For every roster size a deterministic roster (benchmarks/synth.py) is saved to
+a temporary data directory and each benchmark below is timed ``--repeat``
+times (best and mean reported):
+
+    save          save_students() of the whole roster (snapshot write)
+    load          load_store() of that snapshot
+    calc_gpa      calc_gpa() over every student's courses
+    import_csv    import_scores() of a CSV grade file (2 rows per student) into the store
+    import_txt    the same as a whitespace-separated file
+    rank          rank_students() overall
+    rank_college  rank_students(group_by='college')
+    export_csv    export_students_csv()
+    export_xlsx   export_students_xlsx()
+    search_scan   20 queries with the table filter's linear student_matches() scan
+    search_index  SearchIndex build plus the same 20 queries
+
+Results go to benchmarks/results/<time>.json (or --out) together with the
+machine, Python, git commit and optional-package details; --compare prints the
+change against an earlier results file. 1m (one million students) works but
+needs several GB of memory and, for export_xlsx, minutes per repeat.
+"""
+import os
+import sys
+import time
+import json
+import random
+import argparse
+import platform
+import subprocess
+from typing import List, Dict, Any, Optional, Callable
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from desktop_app import core, serialization
+from benchmarks.synth import iter_students, write_grade_file, temp_app_home, SURNAMES, GIVEN_CHARS, COLLEGES
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+DEFAULT_SIZES = '1k,10k,100k'
+SEARCH_QUERIES = 20
+
+
+def parse_size(text: str) -> int:
+    text = text.strip().lower()
+    mult = {'k': 1000, 'm': 1000000}.get(text[-1:], 1)
+    return int(float(text[:-1] if mult > 1 else text) * mult)
+
+
+def _queries(n: int) -> List[str]:
+    # A mix of what people type into the filter box: surnames, full given
+    # characters, id prefixes/suffixes and college names
+    rnd = random.Random(n)
+    out = []
+    for i in range(SEARCH_QUERIES):
+        kind = i % 4
+        if kind == 0:
+            out.append(rnd.choice(SURNAMES))
+        elif kind == 1:
+            out.append(rnd.choice(SURNAMES) + rnd.choice(GIVEN_CHARS))
+        elif kind == 2:
+            out.append(f"{2025000000 + rnd.randrange(n)}"[:-rnd.randint(1, 3)])
+        else:
+            out.append(rnd.choice(COLLEGES))
+    return out
+
+
+class Context:
+    """State shared by the benchmarks of one roster size."""
+
+    def __init__(self, n: int, courses: int, workdir: str):
+        self.n = n
+        self.courses = courses
+        self.workdir = workdir
+        self.store = core.StudentStore(iter_students(n, courses))
+        self.queries = _queries(n)
+        self._grade_files: Dict[str, str] = {}
+
+    def grade_file(self, ext: str) -> str:
+        path = self._grade_files.get(ext)
+        if path is None:
+            path = self._grade_files[ext] = write_grade_file(
+                os.path.join(self.workdir, 'grades' + ext), self.n, self.n * 2,
+                seed=self.n, header=ext == '.csv', courses=self.courses)
+        return path
+
+
+# Each benchmark returns (items processed, bytes read or written or None)
+
+def bench_save(ctx: Context):
+    core.save_students(ctx.store.students)
+    return ctx.n, os.path.getsize(core.DATA_FILE)
+
+
+def bench_load(ctx: Context):
+    store = core.load_store()
+    assert len(store) == ctx.n
+    return ctx.n, os.path.getsize(core.DATA_FILE)
+
+
+def bench_calc_gpa(ctx: Context):
+    calc = core.calc_gpa
+    for s in ctx.store:
+        calc(s['courses'])
+    return ctx.n, None
+
+
+def _bench_import(ext: str):
+    def run(ctx: Context):
+        path = ctx.grade_file(ext)
+        total, _, _ = core.import_scores(path, store=ctx.store)
+        return total, os.path.getsize(path)
+    return run
+
+
+def bench_rank(ctx: Context):
+    return len(core.rank_students(store=ctx.store)), None
+
+
+def bench_rank_college(ctx: Context):
+    return len(core.rank_students(group_by='college', store=ctx.store)), None
+
+
+def bench_export_csv(ctx: Context):
+    path = core.export_students_csv(os.path.join(ctx.workdir, 'out.csv'), store=ctx.store)
+    return ctx.n, os.path.getsize(path)
+
+
+def bench_export_xlsx(ctx: Context):
+    path = core.export_students_xlsx(os.path.join(ctx.workdir, 'out.xlsx'), store=ctx.store)
+    return ctx.n, os.path.getsize(path)
+
+
+def bench_search_scan(ctx: Context):
+    matches = core.student_matches
+    students = ctx.store.students
+    for q in ctx.queries:
+        [s for s in students if matches(s, q)]
+    return len(ctx.queries), None
+
+
+def bench_search_index(ctx: Context):
+    index = core.SearchIndex(ctx.store)
+    try:
+        for q in ctx.queries:
+            index.search(q)
+    finally:
+        index.close()
+    return len(ctx.queries), None
+
+
+BENCHMARKS: Dict[str, Callable[[Context], Any]] = {
+    'save': bench_save,
+    'load': bench_load,
+    'calc_gpa': bench_calc_gpa,
+    'import_csv': _bench_import('.csv'),
+    'import_txt': _bench_import('.txt'),
+    'rank': bench_rank,
+    'rank_college': bench_rank_college,
+    'export_csv': bench_export_csv,
+    'export_xlsx': bench_export_xlsx,
+    'search_scan': bench_search_scan,
+    'search_index': bench_search_index,
+}
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                             capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def _meta(args) -> Dict[str, Any]:
+    from desktop_app.vector_stats import HAVE_NUMPY
+    return {
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'git_commit': _git_commit(),
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'numpy': HAVE_NUMPY,
+        'orjson': serialization.orjson is not None,
+        'format': serialization.default_format(),
+        'backend': core.get_backend().name,
+        'courses': args.courses,
+        'repeat': args.repeat,
+    }
+
+
+def run_size(n: int, names: List[str], courses: int, repeat: int) -> List[Dict[str, Any]]:
+    results = []
+    with temp_app_home(core) as d:
+        t0 = time.perf_counter()
+        ctx = Context(n, courses, d)
+        print(f"-- {n} students x {courses} courses (generated in {time.perf_counter() - t0:.2f}s)")
+        # load needs a snapshot even when save is not being measured
+        core.save_students(ctx.store.students)
+        for name in names:
+            times = []
+            items = nbytes = None
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                items, nbytes = BENCHMARKS[name](ctx)
+                times.append(time.perf_counter() - t0)
+            best = min(times)
+            row = {
+                'name': name, 'size': n, 'best_s': best, 'mean_s': sum(times) / len(times),
+                'times_s': times, 'items': items,
+                'items_per_s': items / best if best > 0 else None,
+                'bytes': nbytes,
+            }
+            results.append(row)
+            print(f"{name:>14} {best:>10.4f}s {row['mean_s']:>10.4f}s {row['items_per_s'] or 0:>14,.0f}/s")
+    return results
+
+
+def compare(results: List[Dict[str, Any]], old_path: str) -> None:
+    with open(old_path, encoding='utf-8') as f:
+        old = {(r['name'], r['size']): r for r in json.load(f)['results']}
+    print(f"\nvs {old_path}:")
+    print(f"{'benchmark':>14} {'size':>9} {'old s':>10} {'new s':>10} {'change':>8}")
+    for r in results:
+        prev = old.get((r['name'], r['size']))
+        if prev is None:
+            continue
+        change = (r['best_s'] / prev['best_s'] - 1) * 100 if prev['best_s'] else 0.0
+        print(f"{r['name']:>14} {r['size']:>9} {prev['best_s']:>10.4f} {r['best_s']:>10.4f} {change:>+7.1f}%")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark suite over synthetic rosters")
+    parser.add_argument('--sizes', default=DEFAULT_SIZES, help="comma-separated roster sizes, e.g. 1k,10k,100k,1m")
+    parser.add_argument('--courses', type=int, default=8)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--only', help="comma-separated benchmark names (default: all)")
+    parser.add_argument('--out', help="results file (default: benchmarks/results/<time>.json)")
+    parser.add_argument('--compare', help="earlier results file to compare against")
+    args = parser.parse_args(argv)
+
+    names = args.only.split(',') if args.only else list(BENCHMARKS)
+    unknown = [n for n in names if n not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}; choose from {', '.join(BENCHMARKS)}")
+    sizes = [parse_size(s) for s in args.sizes.split(',')]
+
+    meta = _meta(args)
+    print(f"python {meta['python']} on {meta['platform']}, {meta['cpu_count']} CPU(s), "
+          f"numpy={meta['numpy']} orjson={meta['orjson']} format={meta['format']}")
+    print(f"{'benchmark':>14} {'best':>11} {'mean':>11} {'throughput':>16}")
+    results = []
+    for n in sizes:
+        results.extend(run_size(n, names, args.courses, args.repeat))
+
+    out = args.out or os.path.join(RESULTS_DIR, time.strftime('%Y%m%d-%H%M%S') + '.json')
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, 'w', encoding='utf-8') as f:
+        json.dump({'meta': meta, 'results': results}, f, ensure_ascii=False, indent=2)
+    print(f"\nresults written to {out}")
+    if args.compare:
+        compare(results, args.compare)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
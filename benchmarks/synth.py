@@ -0,0 +1,152 @@
+"""Deterministic synthetic roster and grade-file generator used by the benchmarks.
+
+The same (n, courses, seed) always produces the same roster. Students get
+Chinese names drawn from common surnames and given-name characters, a
+college with its own majors/classes, a province weighted roughly by
+population, and course scores from a clipped normal distribution; every
+course has a fixed credit, like a real curriculum. Ids are sequential
+(2025000000 + i) so benchmarks can address students without the roster.
+"""
+import os
+import random
+import tempfile
+import contextlib
+from typing import List, Dict, Any, Iterator, Optional
+
+SURNAMES = ('王', '李', '张', '刘', '陈', '杨', '黄', '赵', '吴', '周', '徐', '孙', '马', '朱', '胡',
+            '郭', '何', '林', '罗', '高', '郑', '梁', '谢', '宋', '唐', '许', '韩', '冯', '邓', '曹',
+            '彭', '曾', '肖', '田', '董', '潘', '袁', '蔡', '蒋', '余', '于', '杜', '叶', '程', '魏',
+            '苏', '吕', '丁', '任', '卢', '姚', '沈', '钟', '姜', '崔', '谭', '陆', '范', '汪', '廖',
+            '欧阳', '司马', '上官', '诸葛')
+GIVEN_CHARS = ('伟', '芳', '娜', '敏', '静', '丽', '强', '磊', '军', '洋', '勇', '艳', '杰', '娟', '涛',
+               '明', '超', '秀', '霞', '平', '刚', '桂', '英', '华', '鹏', '辉', '玲', '宇', '浩', '晨',
+               '欣', '怡', '子', '涵', '轩', '梓', '萱', '博', '文', '雨', '思', '嘉', '俊', '佳', '一',
+               '诺', '睿', '泽', '然', '琪', '昊', '天', '晓', '梦', '雪', '阳', '凯', '楠', '婷', '瑶')
+COLLEGES = ('计算机学院', '自动化学院', '数学学院', '物理学院', '外国语学院', '经济管理学院',
+            '机械工程学院', '土木工程学院', '化学化工学院', '生命科学学院', '材料学院', '电子信息学院',
+            '法学院', '人文学院', '艺术学院', '医学院')
+MAJORS = {
+    '计算机学院': ('计算机科学与技术', '软件工程', '人工智能'),
+    '自动化学院': ('自动化', '机器人工程'),
+    '数学学院': ('数学与应用数学', '统计学'),
+    '物理学院': ('应用物理学', '光电信息科学与工程'),
+    '外国语学院': ('英语', '日语', '翻译'),
+    '经济管理学院': ('金融学', '会计学', '工商管理'),
+    '机械工程学院': ('机械设计制造及其自动化', '车辆工程'),
+    '土木工程学院': ('土木工程', '建筑学'),
+    '化学化工学院': ('化学', '化学工程与工艺'),
+    '生命科学学院': ('生物科学', '生物技术'),
+    '材料学院': ('材料科学与工程',),
+    '电子信息学院': ('电子信息工程', '通信工程', '微电子科学与工程'),
+    '法学院': ('法学',),
+    '人文学院': ('汉语言文学', '历史学'),
+    '艺术学院': ('视觉传达设计', '音乐学'),
+    '医学院': ('临床医学', '护理学'),
+}
+# (province, weight): weights roughly follow population
+PROVINCES = (('广东', 126), ('山东', 102), ('河南', 99), ('江苏', 85), ('四川', 84), ('河北', 75),
+             ('湖南', 66), ('浙江', 65), ('安徽', 61), ('湖北', 58), ('广西', 50), ('云南', 47),
+             ('江西', 45), ('辽宁', 43), ('福建', 42), ('陕西', 40), ('贵州', 39), ('山西', 35),
+             ('重庆', 32), ('黑龙江', 31), ('新疆', 26), ('甘肃', 25), ('上海', 25), ('内蒙古', 24),
+             ('吉林', 24), ('北京', 22), ('天津', 14), ('海南', 10), ('宁夏', 7), ('青海', 6), ('西藏', 4))
+PLCSTATUS = (('共青团员', 70), ('群众', 25), ('中共党员', 3), ('中共预备党员', 2))
+# Course catalogue with fixed credits; rosters with more courses get numbered electives
+COURSE_CREDITS = (('高等数学', 5), ('线性代数', 3), ('大学物理', 4), ('C++程序设计', 3), ('数据结构', 4),
+                  ('概率论', 3), ('电子技术基础', 3), ('大学英语', 2), ('思想道德与法治', 3),
+                  ('中国近现代史纲要', 3), ('离散数学', 3), ('操作系统', 4), ('计算机网络', 3),
+                  ('数据库原理', 3), ('工程制图', 2), ('体育', 1))
+COURSES = [c for c, _ in COURSE_CREDITS[:8]]
+PHONE_PREFIXES = ('130', '131', '132', '135', '136', '137', '138', '139', '150', '151', '152', '157',
+                  '158', '159', '166', '177', '180', '181', '182', '186', '187', '188', '189', '199')
+
+
+def course_catalogue(courses: int) -> List[tuple]:
+    """The first ``courses`` (name, credit) pairs, padded with electives."""
+    out = list(COURSE_CREDITS[:courses])
+    for i in range(courses - len(out)):
+        out.append((f"专业选修{i + 1}", 2))
+    return out
+
+
+def _name(rnd: random.Random) -> str:
+    given = rnd.choice(GIVEN_CHARS)
+    if rnd.random() < 0.7:
+        given += rnd.choice(GIVEN_CHARS)
+    return rnd.choice(SURNAMES) + given
+
+
+def iter_students(n: int, courses: int = 8, seed: int = 0,
+                  per_student: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """Yield ``n`` student dicts one at a time (for rosters too large to build as a list).
+
+    Each student takes ``per_student`` courses (default: all ``courses``) out
+    of a catalogue of ``courses``.
+    """
+    rnd = random.Random(seed)
+    catalogue = course_catalogue(courses)
+    take = min(per_student or courses, len(catalogue))
+    provinces, province_w = zip(*PROVINCES)
+    statuses, status_w = zip(*PLCSTATUS)
+    for i in range(n):
+        college = rnd.choice(COLLEGES)
+        major = rnd.choice(MAJORS[college])
+        # Each student has an ability level; course scores scatter around it
+        level = rnd.gauss(76, 8)
+        picked = catalogue if take == len(catalogue) else rnd.sample(catalogue, take)
+        yield {
+            'id': f"{2025000000 + i}",
+            'name': _name(rnd),
+            'gender': '男' if rnd.random() < 0.52 else '女',
+            'age': rnd.choice((17, 18, 18, 19, 19, 19, 20, 20, 21, 22, 23)),
+            'college': college,
+            'classnum': f"{major}2025级{rnd.randint(1, 6)}班",
+            'plcstatus': rnd.choices(statuses, status_w)[0],
+            'phone': rnd.choice(PHONE_PREFIXES) + f"{rnd.randrange(10 ** 8):08d}",
+            'province': rnd.choices(provinces, province_w)[0],
+            'parphone': rnd.choice(PHONE_PREFIXES) + f"{rnd.randrange(10 ** 8):08d}",
+            'courses': [{'name': c, 'credit': credit,
+                         'score': max(0, min(100, round(rnd.gauss(level, 10))))}
+                        for c, credit in picked],
+        }
+
+
+def make_students(n: int, courses: int = 8, seed: int = 0) -> List[Dict[str, Any]]:
+    return list(iter_students(n, courses, seed))
+
+
+def write_grade_file(path: str, students: List[Dict[str, Any]], rows: int, seed: int = 0,
+                     header: bool = False, courses: int = 8) -> str:
+    """Write ``rows`` lines of ``id,course,credit,score`` (CSV if path ends with .csv, else whitespace).
+
+    ``students`` may be a roster or an int (roster size); ids are then
+    generated directly. ``header`` adds a CSV header line.
+    """
+    rnd = random.Random(seed)
+    sep = ',' if path.lower().endswith('.csv') else ' '
+    catalogue = course_catalogue(courses)
+    ids = None if isinstance(students, int) else [s['id'] for s in students]
+    n = students if ids is None else len(ids)
+    with open(path, 'w', encoding='utf-8', buffering=1 << 20) as f:
+        if header and sep == ',':
+            f.write('学号,课程,学分,成绩\n')
+        for _ in range(rows):
+            k = rnd.randrange(n)
+            sid = ids[k] if ids is not None else f"{2025000000 + k}"
+            course, credit = rnd.choice(catalogue)
+            score = max(0, min(100, round(rnd.gauss(75, 12))))
+            f.write(f"{sid}{sep}{course}{sep}{credit}{sep}{score}\n")
+    return path
+
+
+@contextlib.contextmanager
+def temp_app_home(core):
+    """Point core's data/export paths at a throwaway directory."""
+    saved = (core.DATA_FILE, core.EXPORT_DIR, core.EXPORT_METADATA)
+    with tempfile.TemporaryDirectory() as d:
+        core.DATA_FILE = os.path.join(d, 'data', 'students.json')
+        core.EXPORT_DIR = os.path.join(d, 'exports')
+        core.EXPORT_METADATA = os.path.join(core.EXPORT_DIR, 'exports.json')
+        try:
+            yield d
+        finally:
+            core.DATA_FILE, core.EXPORT_DIR, core.EXPORT_METADATA = saved
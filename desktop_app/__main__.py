@@ -0,0 +1,7 @@
+"""python -m desktop_app: headless command-line interface (see cli.py)."""
+import sys
+
+from .cli import main
+
+if __name__ == '__main__':
+    sys.exit(main())
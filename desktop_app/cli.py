@@ -0,0 +1,311 @@
+"""Command-line interface for batch jobs on machines without a display.
+
+    python -m desktop_app import grades/ extra.csv
+    python -m desktop_app import-students roster.xlsx --mode insert
+    python -m desktop_app rank --group-by college --top 10
+    python -m desktop_app export xlsx -o out.xlsx --scores-sheet
+    python -m desktop_app export delta
+    python -m desktop_app stats
+    python -m desktop_app stats --by college
+    python -m desktop_app validate --scores grades/
+    python -m desktop_app serve --port 8765
+
+Built on core only: PySide6 is never imported, and openpyxl / NumPy only
+when a subcommand needs them (XLSX export, large rosters).
+"""
+import os
+import sys
+import argparse
+import unicodedata
+from typing import List, Dict, Any, Optional
+
+from . import core
+
+
+def _width(text: str) -> int:
+    # Chinese characters take two terminal columns
+    return sum(2 if unicodedata.east_asian_width(ch) in 'WF' else 1 for ch in text)
+
+
+def _print_table(header: List[str], rows: List[List[Any]], out=None) -> None:
+    out = out or sys.stdout
+    cells = [[str(h) for h in header]] + [['' if v is None else str(v) for v in r] for r in rows]
+    widths = [max(_width(r[i]) for r in cells) for i in range(len(header))]
+    for r in cells:
+        out.write('  '.join(v + ' ' * (w - _width(v)) for v, w in zip(r, widths)).rstrip() + '\n')
+
+
+def _write_rows(fmt: str, header: List[str], keys: List[str], rows: List[Dict[str, Any]]) -> None:
+    if fmt == 'json':
+        from . import serialization
+        sys.stdout.write(serialization.dumps(rows) + '\n')
+    elif fmt == 'csv':
+        import csv
+        writer = csv.writer(sys.stdout, lineterminator='\n')
+        writer.writerow(header)
+        writer.writerows([r.get(k) for k in keys] for r in rows)
+    else:
+        _print_table(header, [[r.get(k) for k in keys] for r in rows])
+
+
+def _fmt_num(v: Optional[float]) -> str:
+    return '' if v is None else f"{v:.2f}"
+
+
+# -- subcommands --------------------------------------------------------------
+
+def cmd_import(args) -> int:
+    def report(info):
+        if 'files_total' in info:
+            print(f"已解析 {info['files_done']}/{info['files_total']}: {info['path']}", file=sys.stderr)
+
+    files = core.score_files(args.paths)
+    if not files:
+        print("没有找到成绩文件", file=sys.stderr)
+        return 1
+    if len(files) == 1:
+        stats = {files[0]: core.import_scores(files[0])}
+    else:
+        stats = core.import_scores_batch(files, workers=args.workers,
+                                         progress=None if args.quiet else report)
+    rows = [[p, t, a, k] for p, (t, a, k) in stats.items()]
+    if len(rows) > 1:
+        rows.append(['合计'] + [sum(r[i] for r in rows) for i in (1, 2, 3)])
+    _print_table(['文件', '读取', '应用', '跳过'], rows)
+    return 0
+
+
+def cmd_import_students(args) -> int:
+    r = core.import_students(args.file, mode=args.mode)
+    for line, msg in r['errors'][:args.limit]:
+        print(f"第 {line} 行: {msg}", file=sys.stderr)
+    if len(r['errors']) > args.limit:
+        print(f"…… 另有 {len(r['errors']) - args.limit} 条问题未显示", file=sys.stderr)
+    _print_table(['读取', '新增', '更新', '未变', '删除', '跳过'],
+                 [[r['total'], r['added'], r['updated'], r['unchanged'], r['removed'], r['skipped']]])
+    return 0
+
+
+def cmd_rank(args) -> int:
+    rows = core.rank_students(group_by=args.group_by, method=args.method, top=args.top)
+    for r in rows:
+        r['gpa'] = None if r['gpa'] is None else round(r['gpa'], 2)
+    header = ['名次', '学号', '姓名', 'GPA']
+    keys = ['rank', 'id', 'name', 'gpa']
+    if args.group_by:
+        header.insert(0, core.STUDENT_LABELS.get(args.group_by, args.group_by))
+        keys.insert(0, 'group')
+    _write_rows(args.format, header, keys, rows)
+    return 0
+
+
+def cmd_export(args) -> int:
+    columns = args.columns.split(',') if args.columns else None
+    if args.kind == 'delta':
+        if args.college or args.classnum or args.course_columns or args.scores_sheet:
+            print("增量导出总是包含全部变更，不支持 --college/--classnum/--course-columns/--scores-sheet",
+                  file=sys.stderr)
+            return 2
+        path, manifest = core.export_students_delta(args.output, since=args.since, columns=columns)
+        rows = manifest['rows']
+        print(f"基线 {manifest['baseline']}: 新增 {rows['added']}，修改 {rows['changed']}，删除 {rows['deleted']}",
+              file=sys.stderr)
+        print(path)
+        return 0
+    where = None
+    if args.college or args.classnum:
+        def where(s):
+            return ((args.college is None or s.get('college') == args.college)
+                    and (args.classnum is None or s.get('classnum') == args.classnum))
+    if args.kind == 'xlsx':
+        path = core.export_students_xlsx(args.output, scores_sheet=args.scores_sheet,
+                                         columns=columns, where=where)
+    else:
+        path = core.export_students_csv(args.output, columns=columns,
+                                        course_columns=args.course_columns, where=where)
+    print(path)
+    return 0
+
+
+def _course_stats(store) -> Dict[Any, Dict[str, float]]:
+    if core._use_vector(len(store)):
+        from .vector_stats import ScoreArrays
+        return ScoreArrays(store).course_stats()
+    import statistics
+    scores: Dict[Any, List[float]] = {}
+    for s in store:
+        for name, _, score in core._course_tuples(s):
+            scores.setdefault(name, []).append(float(score))
+    return {name: {'count': len(v), 'mean': statistics.fmean(v), 'median': statistics.median(v),
+                   'std': statistics.pstdev(v), 'min': min(v), 'max': max(v)}
+            for name, v in sorted(scores.items(), key=lambda kv: str(kv[0]))}
+
+
+STATS_BY_LABELS = {'college': '学院', 'classnum': '班级', 'province': '生源省份', 'course': '课程'}
+
+
+def _group_stats(args) -> int:
+    table = core.group_stats(args.by)
+    if args.format == 'json':
+        from . import serialization
+        sys.stdout.write(serialization.dumps({'by': args.by, 'groups': table}) + '\n')
+        return 0
+    _print_table([STATS_BY_LABELS[args.by], '人数', '有成绩', '平均', '标准差', '最低', '最高']
+                 + list(core.STATS_BUCKET_LABELS),
+                 [[group, st['students'], st['count'], _fmt_num(st['mean']), _fmt_num(st['std']),
+                   _fmt_num(st['min']), _fmt_num(st['max'])] + st['histogram']
+                  for group, st in table.items()])
+    return 0
+
+
+def cmd_stats(args) -> int:
+    if args.by:
+        return _group_stats(args)
+    store = core.load_store()
+    gpas = [g for g in (s.gpa() for s in store) if g is not None]
+    summary = {
+        'students': len(store),
+        'graded': len(gpas),
+        'entries': sum(len(s.course_ids) for s in store),
+        'gpa_mean': sum(gpas) / len(gpas) if gpas else None,
+        'gpa_min': min(gpas) if gpas else None,
+        'gpa_max': max(gpas) if gpas else None,
+    }
+    courses = _course_stats(store)
+    if args.format == 'json':
+        from . import serialization
+        sys.stdout.write(serialization.dumps({'summary': summary, 'courses': courses}) + '\n')
+        return 0
+    print(f"学生数: {summary['students']}  有成绩: {summary['graded']}  成绩记录: {summary['entries']}")
+    print(f"平均 GPA: {_fmt_num(summary['gpa_mean'])}  最高: {_fmt_num(summary['gpa_max'])}  "
+          f"最低: {_fmt_num(summary['gpa_min'])}")
+    if courses:
+        print()
+        _print_table(['课程', '人数', '平均', '中位数', '标准差', '最低', '最高'],
+                     [[name, c['count'], _fmt_num(c['mean']), _fmt_num(c['median']), _fmt_num(c['std']),
+                       _fmt_num(c['min']), _fmt_num(c['max'])] for name, c in courses.items()])
+    return 0
+
+
+def cmd_validate(args) -> int:
+    problems = []
+    if args.file:
+        from . import serialization
+        students = serialization.load(args.file)
+        known = {s.get('id') for s in students}
+    else:
+        store = core.load_store()
+        # Duplicates are set aside on load; check them together with the roster
+        students = store.saved_records()
+        known = store
+    problems.extend((sid, msg) for sid, msg in core.validate_students(students))
+    for path in core.score_files(args.scores or []):
+        parsed = core.parse_score_file(path)
+        name = os.path.basename(path)
+        if parsed['malformed']:
+            problems.append((name, f"{parsed['malformed']} 行格式错误"))
+        unknown = sorted({sid for sid, _, _, _ in parsed['rows'] if sid not in known})
+        if unknown:
+            sample = ', '.join(unknown[:5]) + (' …' if len(unknown) > 5 else '')
+            problems.append((name, f"{len(unknown)} 个学号不在名单中: {sample}"))
+        bad = sum(1 for _, _, credit, score in parsed['rows'] if credit <= 0 or not 0 <= score <= 100)
+        if bad:
+            problems.append((name, f"{bad} 行学分或成绩超出范围"))
+    for sid, msg in problems[:args.limit]:
+        print(f"{sid}: {msg}")
+    if len(problems) > args.limit:
+        print(f"…… 另有 {len(problems) - args.limit} 个问题未显示")
+    print(f"检查了 {len(students)} 名学生，发现 {len(problems)} 个问题", file=sys.stderr)
+    return 1 if problems else 0
+
+
+def cmd_serve(args) -> int:
+    import asyncio
+    from . import server
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+# -- entry point --------------------------------------------------------------
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='python -m desktop_app', description="学生信息管理系统命令行工具")
+    parser.add_argument('--data', help="学生数据文件（默认 data/students.json）")
+    parser.add_argument('--export-dir', help="导出目录及导出历史位置（默认 exports/；指定 --data 时为数据文件旁的 exports/）")
+    parser.add_argument('--backend', choices=('json', 'sqlite'), help="存储后端（默认读取 SIMS_BACKEND）")
+    sub = parser.add_subparsers(dest='command', required=True, metavar='command')
+
+    p = sub.add_parser('import', help="导入成绩文件（多个文件或目录时并行解析）")
+    p.add_argument('paths', nargs='+', help="成绩文件或目录")
+    p.add_argument('--workers', type=int, help="解析进程数（默认 CPU 核数）")
+    p.add_argument('-q', '--quiet', action='store_true', help="不输出解析进度")
+    p.set_defaults(func=cmd_import)
+
+    p = sub.add_parser('import-students', help="批量导入学生信息（CSV / XLSX / 空白分隔文本）")
+    p.add_argument('file', help="学生文件；首行可为表头（学号,姓名,... 或 id,name,...）")
+    p.add_argument('--mode', choices=core.STUDENT_IMPORT_MODES, default='upsert',
+                   help="upsert: 新增并更新已有学生；insert: 跳过已有学号；replace: 用文件替换整个名单")
+    p.add_argument('--limit', type=int, default=20, help="最多列出的问题行数")
+    p.set_defaults(func=cmd_import_students)
+
+    p = sub.add_parser('rank', help="GPA 排名")
+    p.add_argument('--group-by', choices=core.RANK_GROUPS)
+    p.add_argument('--method', choices=core.RANK_METHODS, default='ordinal')
+    p.add_argument('--top', type=int, help="每组只输出前 N 名")
+    p.add_argument('--format', choices=('table', 'csv', 'json'), default='table')
+    p.set_defaults(func=cmd_rank)
+
+    p = sub.add_parser('export', help="导出 CSV、XLSX，或自上次导出以来变更的增量 CSV")
+    p.add_argument('kind', choices=('csv', 'xlsx', 'delta'))
+    p.add_argument('-o', '--output', help="输出文件（默认写入 exports/ 并记录导出历史）")
+    p.add_argument('--columns', help="逗号分隔的字段，如 id,name,gpa")
+    p.add_argument('--course-columns', action='store_true', help="CSV：每门课程一列成绩")
+    p.add_argument('--scores-sheet', action='store_true', help="XLSX：附加逐门课程的 Scores 工作表")
+    p.add_argument('--college', help="只导出该学院")
+    p.add_argument('--classnum', help="只导出该班级")
+    p.add_argument('--since', help="delta：作为基线的导出文件名（默认导出历史中最近一次）")
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser('stats', help="GPA 与各课程成绩统计")
+    p.add_argument('--format', choices=('table', 'json'), default='table')
+    p.add_argument('--by', choices=core.STATS_DIMENSIONS,
+                   help="按学院/班级/生源省份统计 GPA，或按课程统计成绩（人数、平均、标准差、最值与分数段）")
+    p.set_defaults(func=cmd_stats)
+
+    p = sub.add_parser('validate', help="检查学生数据与成绩文件")
+    p.add_argument('file', nargs='?', help="要检查的数据文件（默认当前数据）")
+    p.add_argument('--scores', nargs='+', help="同时检查这些成绩文件或目录")
+    p.add_argument('--limit', type=int, default=50, help="最多列出的问题数")
+    p.set_defaults(func=cmd_validate)
+
+    p = sub.add_parser('serve', help="启动本地 HTTP/JSON 查询服务")
+    p.add_argument('--host', default='127.0.0.1')
+    p.add_argument('--port', type=int, default=8765)
+    p.set_defaults(func=cmd_serve)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.data:
+        core.DATA_FILE = os.path.abspath(args.data)
+        # Export history holds change-log baselines of this data file; keep it
+        # next to the file rather than mixing it into the default one
+        core.EXPORT_DIR = os.path.join(os.path.dirname(core.DATA_FILE), 'exports')
+    if args.export_dir:
+        core.EXPORT_DIR = os.path.abspath(args.export_dir)
+    core.EXPORT_METADATA = os.path.join(core.EXPORT_DIR, 'exports.json')
+    if args.backend:
+        os.environ['SIMS_BACKEND'] = args.backend
+    try:
+        return args.func(args)
+    except BrokenPipeError:
+        # Output piped into head and the like: stop quietly
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    except (OSError, ValueError, RuntimeError) as e:
+        print(f"错误: {e}", file=sys.stderr)
+        return 1
@@ -2,7 +2,16 @@ import os
 import sys
 import json
 import io
-from typing import List, Dict, Any, Tuple
+import math
+import bisect
+import contextlib
+import functools
+import threading
+from array import array
+from collections.abc import Mapping, MutableMapping, Sequence
+from typing import List, Dict, Any, Tuple, Optional, Iterable, Iterator, Callable
+
+from . import instrument, serialization
 
 # Detect PyInstaller frozen
 ROOT = os.path.dirname(__file__)
@@ -12,6 +21,13 @@ DATA_FILE = os.path.join(APP_HOME, 'data', 'students.json')
 EXPORT_DIR = os.path.join(APP_HOME, 'exports')
 EXPORT_METADATA = os.path.join(EXPORT_DIR, 'exports.json')
 
+
+def _warn(msg: str, *args) -> None:
+    # logging is only imported once there is something to report
+    import logging
+    logging.getLogger(__name__).warning(msg, *args)
+
+
 STUDENT_FIELDS = ['id','name','gender','age','college','classnum','plcstatus','phone','province','parphone']
 STUDENT_LABELS = {
     'id': '学号',
@@ -38,16 +54,75 @@ def ensure_data_dir() -> None:
             json.dump([], f, ensure_ascii=False, indent=2)
 
 
+def journal_path() -> str:
+    """The change journal lives next to DATA_FILE (students.json -> students.journal)."""
+    return os.path.splitext(DATA_FILE)[0] + '.journal'
+
+
+def changes_path() -> str:
+    """Which students changed, for delta exports (students.json -> students.changes)."""
+    return os.path.splitext(DATA_FILE)[0] + '.changes'
+
+
+def sqlite_path() -> str:
+    return os.path.splitext(DATA_FILE)[0] + '.db'
+
+
+def get_backend(name: Optional[str] = None):
+    """Return the storage backend: 'json' (default) or 'sqlite'.
+
+    The default can be switched with the SIMS_BACKEND environment variable.
+    """
+    name = (name or os.environ.get('SIMS_BACKEND') or 'json').lower()
+    if name == 'json':
+        return JsonBackend()
+    if name == 'sqlite':
+        from .sqlite_backend import SQLiteBackend
+        return SQLiteBackend(sqlite_path())
+    raise ValueError(f"未知的存储后端: {name}")
+
+
+# Full roster reads / writes that reached the storage backend, see io_counts()
+_IO_COUNTS = {'load': 0, 'save': 0}
+
+
+def _count_io(kind: str) -> None:
+    _IO_COUNTS[kind] += 1
+
+
+def io_counts() -> Dict[str, int]:
+    """Snapshot of the load/save counters; diff two snapshots to measure one action."""
+    return dict(_IO_COUNTS)
+
+
+def _stored_bytes(backend) -> int:
+    """Size of what the backend keeps on disk (snapshot plus journal, or the database)."""
+    if getattr(backend, 'name', 'json') == 'sqlite':
+        return instrument.file_size(sqlite_path())
+    return instrument.file_size(DATA_FILE) + instrument.file_size(journal_path())
+
+
+@instrument.timed('load_students')
 def load_students() -> List[Dict[str, Any]]:
-    ensure_data_dir()
-    with open(DATA_FILE, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    """Return the current roster as a list of plain dicts (copies; changing
+    them does not touch the store). Use load_store() for the live records."""
+    return [s.to_dict() for s in load_store()]
 
 
+@instrument.timed('save_students')
 def save_students(lst: List[Dict[str, Any]]) -> None:
-    ensure_data_dir()
-    with open(DATA_FILE, 'w', encoding='utf-8') as f:
-        json.dump(lst, f, ensure_ascii=False, indent=2)
+    """Replace the stored roster with ``lst``."""
+    _count_io('save')
+    backend = get_backend()
+    backend.save_all(lst)
+    # The whole roster was replaced: changes since earlier exports are unknown
+    ChangeLog(changes_path()).rotate()
+    if instrument.enabled():
+        instrument.add_bytes('save_students', written=_stored_bytes(backend))
+
+
+# Verify every cached GPA read against a full recompute (slow; for debugging)
+GPA_CACHE_CHECK = os.environ.get('SIMS_CHECK_GPA_CACHE', '') not in ('', '0')
 
 
 def calc_gpa(courses: List[Dict[str, Any]]):
@@ -59,10 +134,587 @@ def calc_gpa(courses: List[Dict[str, Any]]):
     return (total1 / total2) if total2 > 0 else None
 
 
-def update_score_in_memory(students: List[Dict[str, Any]], sid: str, course: str, credit: float, score: float) -> bool:
-    """Update or insert a course score for the student id in the provided list. Returns True if applied, False if sid not found."""
+# Fields with few distinct values: every record shares one string object per value
+INTERNED_FIELDS = ('gender', 'college', 'classnum', 'plcstatus', 'province')
+
+_FIELD_SET = frozenset(STUDENT_FIELDS)
+_INTERNED_SET = frozenset(INTERNED_FIELDS)
+_MISSING = object()
+
+# Course names are dictionary-encoded: records store ids into this shared table
+_COURSE_NAMES: List[Any] = []
+_COURSE_IDS: Dict[Any, int] = {}
+_COURSE_LOCK = threading.Lock()
+
+
+def _course_id(name: Any) -> int:
+    cid = _COURSE_IDS.get(name)
+    if cid is None:
+        with _COURSE_LOCK:
+            cid = _COURSE_IDS.get(name)
+            if cid is None:
+                cid = len(_COURSE_NAMES)
+                _COURSE_NAMES.append(name)
+                _COURSE_IDS[name] = cid
+    return cid
+
+
+def _num(v: float):
+    # Credits and scores are stored as doubles; give 4 back for 4.0 like the JSON had it
+    return int(v) if v.is_integer() else v
+
+
+class StudentRecord(MutableMapping):
+    """Compact student record that reads and writes like the dict it replaces.
+
+    The STUDENT_FIELDS live in slots (low-cardinality ones interned), any other
+    keys in ``extra``, and courses in three parallel arrays: course-name ids into
+    a shared table, credits and scores. ``wsum``/``csum`` keep
+    sum(score * credit) and sum(credit) current for gpa(). ``rec['courses']``
+    is a live, read-only CourseList view; to_dict() returns a plain copy.
+
+    Credits and scores are held as floats, so integral values come back as int
+    and keys other than name/credit/score inside course entries are not kept.
+    """
+
+    __slots__ = tuple(STUDENT_FIELDS) + ('extra', 'course_ids', 'credits', 'scores', 'wsum', 'csum')
+
+    def __init__(self, data: Optional[Dict[str, Any]] = None):
+        for k in STUDENT_FIELDS:
+            setattr(self, k, _MISSING)
+        self.extra: Optional[Dict[str, Any]] = None
+        self.course_ids = array('I')
+        self.credits = array('d')
+        self.scores = array('d')
+        self.wsum = 0.0
+        self.csum = 0.0
+        if data:
+            # Inlined __setitem__: this runs once per student on every load
+            for k, v in data.items():
+                if k in _FIELD_SET:
+                    if k in _INTERNED_SET and type(v) is str:
+                        v = sys.intern(v)
+                    setattr(self, k, v)
+                elif k == 'courses':
+                    if v:
+                        self.set_courses(v)
+                else:
+                    if self.extra is None:
+                        self.extra = {}
+                    self.extra[k] = v
+
+    def __getitem__(self, key):
+        if key in _FIELD_SET:
+            v = getattr(self, key)
+            if v is _MISSING:
+                raise KeyError(key)
+            return v
+        if key == 'courses':
+            return CourseList(self)
+        if self.extra is not None and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        if key in _FIELD_SET:
+            v = getattr(self, key)
+            return default if v is _MISSING else v
+        if key == 'courses':
+            return CourseList(self)
+        return self.extra.get(key, default) if self.extra is not None else default
+
+    def __setitem__(self, key, value) -> None:
+        if key in _FIELD_SET:
+            if key in _INTERNED_SET and type(value) is str:
+                value = sys.intern(value)
+            setattr(self, key, value)
+        elif key == 'courses':
+            self.set_courses(value or [])
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __delitem__(self, key) -> None:
+        if key in _FIELD_SET:
+            if getattr(self, key) is _MISSING:
+                raise KeyError(key)
+            setattr(self, key, _MISSING)
+        elif key == 'courses':
+            self.set_courses([])
+        elif self.extra is not None and key in self.extra:
+            del self.extra[key]
+        else:
+            raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        for k in STUDENT_FIELDS:
+            if getattr(self, k) is not _MISSING:
+                yield k
+        if self.extra:
+            yield from self.extra
+        yield 'courses'
+
+    def __len__(self) -> int:
+        return sum(1 for k in STUDENT_FIELDS if getattr(self, k) is not _MISSING) + len(self.extra or ()) + 1
+
+    def __eq__(self, other):
+        if not isinstance(other, Mapping):
+            return NotImplemented
+        return self.to_dict() == {k: ([dict(c) for c in v] if k == 'courses' else v) for k, v in other.items()}
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"StudentRecord({self.to_dict()!r})"
+
+    def __reduce__(self):
+        return StudentRecord, (self.to_dict(),)
+
+    def to_dict(self) -> Dict[str, Any]:
+        out = {k: v for k in STUDENT_FIELDS for v in (getattr(self, k),) if v is not _MISSING}
+        if self.extra:
+            out.update(self.extra)
+        out['courses'] = self.course_dicts()
+        return out
+
+    copy = to_dict
+
+    # -- courses ---------------------------------------------------------
+
+    def course_dicts(self) -> List[Dict[str, Any]]:
+        return [{'name': n, 'credit': c, 'score': s} for n, c, s in self.course_tuples()]
+
+    def course_tuples(self) -> List[Tuple[Any, Any, Any]]:
+        """[(name, credit, score)] without building per-course dicts."""
+        names = _COURSE_NAMES
+        return [(names[i], int(c) if c.is_integer() else c, int(s) if s.is_integer() else s)
+                for i, c, s in zip(self.course_ids.tolist(), self.credits.tolist(), self.scores.tolist())]
+
+    def set_courses(self, courses: Iterable[Dict[str, Any]]) -> None:
+        courses = list(courses)
+        ids = _COURSE_IDS
+        self.course_ids = array('I', [ids[n] if n in ids else _course_id(n)
+                                      for n in [c.get('name') for c in courses]])
+        self.credits = credits = array('d', [float(c.get('credit', 0)) for c in courses])
+        self.scores = scores = array('d', [float(c.get('score', 0)) for c in courses])
+        # Same summation order as calc_gpa, so a freshly built record agrees with it exactly
+        wsum = csum = 0.0
+        for s, c in zip(scores, credits):
+            wsum += s * c
+            csum += c
+        self.wsum = wsum
+        self.csum = csum
+
+    def course_index(self, name: Any) -> int:
+        """Position of the first course called ``name``, or -1."""
+        cid = _COURSE_IDS.get(name)
+        if cid is None:
+            return -1
+        try:
+            return self.course_ids.index(cid)
+        except ValueError:
+            return -1
+
+    def course_name(self, i: int) -> Any:
+        return _COURSE_NAMES[self.course_ids[i]]
+
+    def set_course(self, i: int, credit: float, score: float) -> None:
+        self.wsum -= self.scores[i] * self.credits[i]
+        self.csum -= self.credits[i]
+        self.credits[i] = credit = float(credit)
+        self.scores[i] = score = float(score)
+        self.wsum += score * credit
+        self.csum += credit
+
+    def rename_course_at(self, i: int, name: Any, credit: float, score: float) -> None:
+        self.course_ids[i] = _course_id(name)
+        self.set_course(i, credit, score)
+
+    def insert_course(self, i: int, name: Any, credit: float, score: float) -> None:
+        credit = float(credit)
+        score = float(score)
+        self.course_ids.insert(i, _course_id(name))
+        self.credits.insert(i, credit)
+        self.scores.insert(i, score)
+        self.wsum += score * credit
+        self.csum += credit
+
+    def append_course(self, name: Any, credit: float, score: float) -> None:
+        self.insert_course(len(self.course_ids), name, credit, score)
+
+    def del_course(self, i: int) -> None:
+        self.wsum -= self.scores[i] * self.credits[i]
+        self.csum -= self.credits[i]
+        del self.course_ids[i]
+        del self.credits[i]
+        del self.scores[i]
+        if not self.course_ids:
+            # Drop accumulated rounding error
+            self.wsum = self.csum = 0.0
+
+    def gpa(self) -> Optional[float]:
+        return (self.wsum / self.csum) if self.csum > 0 else None
+
+
+_READ_ONLY_COURSES = "课程是只读视图，请通过 StudentStore 的 set_score / rename_course / remove_course 修改"
+
+
+def _read_only(self, *args, **kwargs):
+    # Writes through a view would bypass the store: no event, so nothing is
+    # journaled and the ranking / search / statistics indexes go stale
+    raise TypeError(_READ_ONLY_COURSES)
+
+
+class CourseView(Mapping):
+    """Live, read-only {'name', 'credit', 'score'} view of one course slot of a StudentRecord.
+
+    Views are positional: removing an earlier course shifts what they point to.
+    """
+
+    __slots__ = ('_rec', '_i')
+    _KEYS = ('name', 'credit', 'score')
+
+    def __init__(self, rec: StudentRecord, i: int):
+        self._rec = rec
+        self._i = i
+
+    def __getitem__(self, key):
+        rec, i = self._rec, self._i
+        if key == 'name':
+            return _COURSE_NAMES[rec.course_ids[i]]
+        if key == 'credit':
+            return _num(rec.credits[i])
+        if key == 'score':
+            return _num(rec.scores[i])
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        return self[key] if key in self._KEYS else default
+
+    __setitem__ = __delitem__ = update = pop = setdefault = _read_only
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._KEYS)
+
+    def __len__(self) -> int:
+        return 3
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+class CourseList(Sequence):
+    """Read-only list-like view over a StudentRecord's course arrays; items are CourseViews."""
+
+    __slots__ = ('_rec',)
+
+    def __init__(self, rec: StudentRecord):
+        self._rec = rec
+
+    def __len__(self) -> int:
+        return len(self._rec.course_ids)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        n = len(self)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError('course index out of range')
+        return CourseView(self._rec, i)
+
+    def __iter__(self) -> Iterator[CourseView]:
+        rec = self._rec
+        return (CourseView(rec, i) for i in range(len(rec.course_ids)))
+
+    __setitem__ = __delitem__ = __iadd__ = _read_only
+    insert = append = extend = pop = remove = clear = reverse = sort = _read_only
+
+    def __eq__(self, other):
+        if not isinstance(other, (list, tuple, CourseList)):
+            return NotImplemented
+        return self._rec.course_dicts() == [dict(c) for c in other]
+
+    def __repr__(self) -> str:
+        return repr(self._rec.course_dicts())
+
+
+def _plain(obj: Any) -> Any:
+    """json ``default`` hook: serialize compact records as the dicts they stand for."""
+    if isinstance(obj, StudentRecord):
+        return obj.to_dict()
+    if isinstance(obj, CourseList):
+        return obj._rec.course_dicts()
+    if isinstance(obj, CourseView):
+        return dict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _record_hook(d: Dict[str, Any]):
+    """json ``object_hook`` building StudentRecords while parsing, so the course
+    dicts of one student are freed before the next one is read."""
+    if 'courses' in d and 'id' in d:
+        return StudentRecord(d)
+    return d
+
+
+def _synchronized(method):
+    """Run a StudentStore method while holding the store lock."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+class StudentStore:
+    """In-memory roster of StudentRecords with a hash index over student ids.
+
+    ``students`` keeps the list order used for display and saving, ``_by_id``
+    maps id -> record and ``_pos`` id -> position in ``students``. Records keep their own GPA sums, so gpa() is O(1) and
+    score changes adjust it in O(1); course lookups scan the record's compact
+    course-id array. Dicts passed to add() are converted to StudentRecords.
+    All mutations go through the store; they hold ``lock`` (re-entrant), which
+    readers on other threads (saving, exporting) take to see a consistent roster.
+
+    When loading, a repeated id keeps the first record in the roster and sets
+    the later copies aside in ``duplicates`` (logged), so a legacy file with
+    duplicates still opens. Full snapshots write them back (see
+    saved_records()) until the file is fixed; nothing is dropped silently.
+    """
+
+    def __init__(self, students: Optional[Iterable[Dict[str, Any]]] = None):
+        self.students: List[StudentRecord] = []
+        self._by_id: Dict[str, StudentRecord] = {}
+        self._pos: Dict[str, int] = {}
+        self._listeners: List[Callable[[str, str, Dict[str, Any]], None]] = []
+        self.journal: Optional['ChangeJournal'] = None
+        self.changes: Optional['ChangeLog'] = None
+        self.backend = None
+        self.lock = threading.RLock()
+        self.duplicates: List[StudentRecord] = []
+        for s in students or []:
+            if s.get('id') in self._by_id:
+                self.duplicates.append(s if isinstance(s, StudentRecord) else StudentRecord(s))
+                continue
+            self.add(s)
+        if self.duplicates:
+            _warn("学号重复: %d 条记录未载入名单（保存时原样保留在数据文件中）: %s", len(self.duplicates),
+                  ', '.join(str(d.get('id')) for d in self.duplicates[:20]))
+
+    def saved_records(self) -> List[StudentRecord]:
+        """What a full snapshot must hold: ``students`` plus the set-aside duplicates."""
+        return self.students + self.duplicates if self.duplicates else self.students
+
+    def subscribe(self, fn: Callable[[str, str, Dict[str, Any]], None]) -> None:
+        """Register ``fn(op, sid, data)`` to be called after every mutation."""
+        self._listeners.append(fn)
+
+    def unsubscribe(self, fn: Callable[[str, str, Dict[str, Any]], None]) -> None:
+        self._listeners.remove(fn)
+
+    def _emit(self, op: str, sid: str, data: Dict[str, Any]) -> None:
+        for fn in self._listeners:
+            fn(op, sid, data)
+
+    def __len__(self) -> int:
+        return len(self.students)
+
+    def __iter__(self) -> Iterator[StudentRecord]:
+        return iter(self.students)
+
+    def __contains__(self, sid: object) -> bool:
+        return sid in self._by_id
+
+    def get(self, sid: str) -> Optional[StudentRecord]:
+        return self._by_id.get(sid)
+
+    def index_of(self, sid: str) -> Optional[int]:
+        """Position of ``sid`` in ``students`` (O(1)), or None if unknown."""
+        return self._pos.get(sid)
+
+    def gpa(self, sid: str) -> Optional[float]:
+        """Cached credit-weighted average, same value as calc_gpa(courses)."""
+        s = self._by_id[sid]
+        g = s.gpa()
+        if GPA_CACHE_CHECK:
+            expected = calc_gpa(s['courses'])
+            if not _gpa_close(g, expected):
+                raise AssertionError(f"GPA 缓存不一致: {sid} cached={g} expected={expected}")
+        return g
+
+    def verify_gpa_cache(self) -> List[str]:
+        """Recompute every GPA from scratch; return ids whose cached value differs."""
+        return [sid for sid, s in self._by_id.items() if not _gpa_close(s.gpa(), calc_gpa(s['courses']))]
+
+    @_synchronized
+    def add(self, student: Dict[str, Any]) -> StudentRecord:
+        """Append a student record. Raises ValueError if the id is already present."""
+        sid = student.get('id')
+        if sid in self._by_id:
+            raise ValueError(f"学号重复: {sid}")
+        if not isinstance(student, StudentRecord):
+            student = StudentRecord(student)
+        self._pos[sid] = len(self.students)
+        self.students.append(student)
+        self._by_id[sid] = student
+        self._emit('add', sid, {'rec': student})
+        return student
+
+    @_synchronized
+    def update(self, sid: str, fields: Dict[str, Any]) -> StudentRecord:
+        """Update fields of a student, re-keying the index if the id changes."""
+        student = self._by_id[sid]
+        new_sid = fields.get('id', sid)
+        if new_sid != sid and new_sid in self._by_id:
+            raise ValueError(f"学号重复: {new_sid}")
+        student.update(fields)
+        if new_sid != sid:
+            del self._by_id[sid]
+            self._by_id[new_sid] = student
+            self._pos[new_sid] = self._pos.pop(sid)
+        self._emit('edit', sid, {'set': fields})
+        return student
+
+    @_synchronized
+    def update_many(self, sids: Iterable[str], fields: Dict[str, Any]) -> int:
+        """Apply the same field changes to several students; returns how many.
+        Unknown ids raise KeyError before anything is changed."""
+        sids = list(dict.fromkeys(sids))
+        if 'id' in fields and len(sids) > 1:
+            raise ValueError("不能把多名学生改为同一学号")
+        missing = [sid for sid in sids if sid not in self._by_id]
+        if missing:
+            raise KeyError(missing[0])
+        for sid in sids:
+            self.update(sid, fields)
+        return len(sids)
+
+    def _reindex(self, start: int = 0) -> None:
+        pos = self._pos
+        for i in range(start, len(self.students)):
+            pos[self.students[i]['id']] = i
+
+    @_synchronized
+    def remove(self, sid: str) -> StudentRecord:
+        student = self._by_id.pop(sid)
+        i = self._pos.pop(sid)
+        del self.students[i]
+        self._reindex(i)
+        self._emit('del', sid, {})
+        return student
+
+    @_synchronized
+    def remove_many(self, sids: Iterable[str]) -> List[StudentRecord]:
+        """Remove several students in one pass over the roster (instead of one
+        pass per student). Unknown ids raise KeyError before anything is removed."""
+        sids = list(dict.fromkeys(sids))
+        missing = [sid for sid in sids if sid not in self._by_id]
+        if missing:
+            raise KeyError(missing[0])
+        removed = [self._by_id.pop(sid) for sid in sids]
+        first = min(self._pos.pop(sid) for sid in sids) if sids else len(self.students)
+        gone = set(map(id, removed))
+        # In place: callers may hold a reference to the list
+        self.students[first:] = [s for s in self.students[first:] if id(s) not in gone]
+        self._reindex(first)
+        for sid in sids:
+            self._emit('del', sid, {})
+        return removed
+
+    def course(self, sid: str, course: str) -> Optional[CourseView]:
+        s = self._by_id.get(sid)
+        i = s.course_index(course) if s is not None else -1
+        return CourseView(s, i) if i >= 0 else None
+
+    @_synchronized
+    def set_score(self, sid: str, course: str, credit: float, score: float) -> bool:
+        """Update or insert a course score. Returns False if sid is unknown."""
+        s = self._by_id.get(sid)
+        if s is None:
+            return False
+        i = s.course_index(course)
+        if i >= 0:
+            s.set_course(i, credit, score)
+        else:
+            s.append_course(course, credit, score)
+        self._emit('score', sid, {'course': course, 'credit': credit, 'score': score})
+        return True
+
+    @_synchronized
+    def rename_course(self, sid: str, old: str, course: str, credit: float, score: float) -> None:
+        """Replace course ``old`` in place; merges into ``course`` if that name already exists."""
+        s = self._by_id[sid]
+        i = s.course_index(old)
+        if i < 0 or (course != old and s.course_index(course) >= 0):
+            if i >= 0:
+                self.remove_course(sid, old)
+            self.set_score(sid, course, credit, score)
+            return
+        s.rename_course_at(i, course, credit, score)
+        self._emit('rncourse', sid, {'old': old, 'course': course, 'credit': credit, 'score': score})
+
+    @_synchronized
+    def remove_course(self, sid: str, course: str) -> bool:
+        """Remove the first course called ``course``; a later duplicate then takes its place."""
+        s = self._by_id.get(sid)
+        i = s.course_index(course) if s is not None else -1
+        if i < 0:
+            return False
+        s.del_course(i)
+        self._emit('rmcourse', sid, {'course': course})
+        return True
+
+    def apply_change(self, rec: Dict[str, Any]) -> None:
+        """Apply one journal record. Records are absolute assignments, so replaying
+        a journal over a snapshot that already contains some of it is harmless."""
+        op, sid = rec.get('op'), rec.get('id')
+        if op == 'add':
+            if sid in self._by_id:
+                self.update(sid, rec['rec'])
+            else:
+                self.add(dict(rec['rec']))
+        elif sid not in self._by_id:
+            return
+        elif op == 'edit':
+            new_sid = rec['set'].get('id', sid)
+            if new_sid == sid or new_sid not in self._by_id:
+                self.update(sid, rec['set'])
+        elif op == 'del':
+            self.remove(sid)
+        elif op == 'score':
+            self.set_score(sid, rec['course'], rec['credit'], rec['score'])
+        elif op == 'rncourse':
+            self.rename_course(sid, rec['old'], rec['course'], rec['credit'], rec['score'])
+        elif op == 'rmcourse':
+            self.remove_course(sid, rec['course'])
+
+
+def _gpa_close(a: Optional[float], b: Optional[float]) -> bool:
+    if a is None or b is None:
+        return a is b
+    return abs(a - b) <= 1e-6 * max(1.0, abs(b))
+
+
+def update_score_in_memory(students, sid: str, course: str, credit: float, score: float) -> bool:
+    """Update or insert a course score for the student id.
+
+    ``students`` is normally a StudentStore (O(1) lookup); a plain list is still
+    accepted and scanned linearly. Returns True if applied, False if sid not found.
+    """
+    if isinstance(students, StudentStore):
+        return students.set_score(sid, course, credit, score)
     for s in students:
         if s.get('id') == sid:
+            if isinstance(s, StudentRecord):
+                i = s.course_index(course)
+                if i >= 0:
+                    s.set_course(i, credit, score)
+                else:
+                    s.append_course(course, credit, score)
+                return True
             courses = s.setdefault('courses', [])
             for c in courses:
                 if c.get('name') == course:
@@ -74,177 +726,1789 @@ def update_score_in_memory(students: List[Dict[str, Any]], sid: str, course: str
     return False
 
 
-def import_scores(file_path: str) -> Tuple[int, int, int]:
+RANK_METHODS = ('ordinal', 'competition', 'dense')
+RANK_GROUPS = ('college', 'classnum')
+
+
+class _RankList:
+    """Sorted (key, seq) list for one ranking group, with distinct-key counts for ties.
+
+    key is -gpa (inf when the student has no GPA), so ascending order is best
+    first; seq is the order the student entered the index, which keeps equal
+    GPAs in roster order like the old stable sort.
+    """
+
+    def __init__(self, items: List[Tuple[float, int]]):
+        self.keys = sorted(items)
+        self.counts: Dict[float, int] = {}
+        for k, _ in self.keys:
+            self.counts[k] = self.counts.get(k, 0) + 1
+        self.distinct = sorted(self.counts)
+
+    def insert(self, item: Tuple[float, int]) -> None:
+        bisect.insort(self.keys, item)
+        k = item[0]
+        n = self.counts.get(k, 0)
+        self.counts[k] = n + 1
+        if n == 0:
+            bisect.insort(self.distinct, k)
+
+    def remove(self, item: Tuple[float, int]) -> None:
+        del self.keys[bisect.bisect_left(self.keys, item)]
+        k = item[0]
+        n = self.counts[k] - 1
+        if n:
+            self.counts[k] = n
+        else:
+            del self.counts[k]
+            del self.distinct[bisect.bisect_left(self.distinct, k)]
+
+    def rank(self, pos: int, method: str) -> int:
+        k = self.keys[pos][0]
+        if method == 'competition':
+            return bisect.bisect_left(self.keys, (k,)) + 1
+        if method == 'dense':
+            return bisect.bisect_left(self.distinct, k) + 1
+        return pos + 1
+
+
+class RankingIndex:
+    """GPA ranking over a StudentStore, maintained incrementally from store events.
+
+    Supports top_k(), rank_of(), percentile lookups and ordinal / competition
+    (1,2,2,4) / dense (1,2,2,3) tie ranking. With ``group_by`` ('college' or
+    'classnum') each group is ranked separately and queries take ``group=``.
+    Updates cost O(log n) comparisons plus a list memmove.
+    """
+
+    def __init__(self, store: StudentStore, group_by: Optional[str] = None):
+        if group_by is not None and group_by not in RANK_GROUPS:
+            raise ValueError(f"不支持的分组: {group_by}")
+        self.store = store
+        self.group_by = group_by
+        self._entry: Dict[str, Tuple[Any, Tuple[float, int]]] = {}  # sid -> (group, item)
+        self._seq = 0
+        items: Dict[Any, List[Tuple[float, int]]] = {}
+        for s in store:
+            sid = s.get('id')
+            group, item = self._make(sid, s)
+            self._entry[sid] = (group, item)
+            items.setdefault(group, []).append(item)
+        self._groups: Dict[Any, _RankList] = {g: _RankList(v) for g, v in items.items()}
+        self._sid_of: Dict[int, str] = {item[1]: sid for sid, (_, item) in self._entry.items()}
+        store.subscribe(self._on_change)
+
+    def close(self) -> None:
+        self.store.unsubscribe(self._on_change)
+
+    def _make(self, sid: str, s: Dict[str, Any], seq: Optional[int] = None) -> Tuple[Any, Tuple[float, int]]:
+        if seq is None:
+            seq = self._seq
+            self._seq += 1
+        g = self.store.gpa(sid)
+        group = s.get(self.group_by, '') if self.group_by else None
+        return group, (-g if g is not None else math.inf, seq)
+
+    def _insert(self, sid: str, seq: Optional[int] = None) -> None:
+        group, item = self._make(sid, self.store.get(sid), seq)
+        self._entry[sid] = (group, item)
+        self._sid_of[item[1]] = sid
+        ranks = self._groups.get(group)
+        if ranks is None:
+            self._groups[group] = _RankList([item])
+        else:
+            ranks.insert(item)
+
+    def _remove(self, sid: str) -> Optional[int]:
+        entry = self._entry.pop(sid, None)
+        if entry is None:
+            return None
+        group, item = entry
+        del self._sid_of[item[1]]
+        ranks = self._groups[group]
+        ranks.remove(item)
+        if not ranks.keys:
+            del self._groups[group]
+        return item[1]
+
+    def _on_change(self, op: str, sid: str, data: Dict[str, Any]) -> None:
+        if op == 'add':
+            self._remove(sid)
+            self._insert(sid)
+        elif op == 'del':
+            self._remove(sid)
+        else:
+            new_sid = data['set'].get('id', sid) if op == 'edit' else sid
+            self._insert(new_sid, self._remove(sid))
+
+    def groups(self) -> List[Any]:
+        return sorted(self._groups, key=lambda g: (g is None, str(g)))
+
+    def size(self, group: Any = None) -> int:
+        ranks = self._groups.get(group)
+        return len(ranks.keys) if ranks else 0
+
+    def _check_method(self, method: str) -> None:
+        if method not in RANK_METHODS:
+            raise ValueError(f"不支持的排名方式: {method}")
+
+    def entry(self, pos: int, group: Any = None, method: str = 'ordinal') -> Dict[str, Any]:
+        """The ranking row at 0-based position ``pos`` within ``group``."""
+        self._check_method(method)
+        ranks = self._groups[group]
+        k, seq = ranks.keys[pos]
+        sid = self._sid_of[seq]
+        out = {'rank': ranks.rank(pos, method), 'id': sid,
+               'name': self.store.get(sid).get('name', ''), 'gpa': None if k == math.inf else -k}
+        if self.group_by:
+            out['group'] = group
+        return out
+
+    def top_k(self, k: Optional[int] = None, group: Any = None, method: str = 'ordinal') -> List[Dict[str, Any]]:
+        n = self.size(group)
+        return [self.entry(i, group, method) for i in range(n if k is None else min(k, n))]
+
+    def rank_of(self, sid: str, method: str = 'ordinal') -> Optional[int]:
+        """Rank of a student within their group, or None if unknown."""
+        self._check_method(method)
+        entry = self._entry.get(sid)
+        if entry is None:
+            return None
+        group, item = entry
+        ranks = self._groups[group]
+        return ranks.rank(bisect.bisect_left(ranks.keys, item), method)
+
+    def group_of(self, sid: str) -> Any:
+        entry = self._entry.get(sid)
+        return entry[0] if entry else None
+
+    def percentile_of(self, sid: str) -> Optional[float]:
+        """Percentage of the student's group with a strictly lower GPA (0-100)."""
+        entry = self._entry.get(sid)
+        if entry is None:
+            return None
+        group, (k, _) = entry
+        ranks = self._groups[group]
+        below = len(ranks.keys) - bisect.bisect_right(ranks.keys, (k, math.inf))
+        return 100.0 * below / len(ranks.keys)
+
+    def gpa_at_percentile(self, p: float, group: Any = None) -> Optional[float]:
+        """Lowest GPA that is still within the top ``p`` percent of the group."""
+        n = self.size(group)
+        if n == 0:
+            return None
+        pos = min(n - 1, max(0, math.ceil(n * p / 100.0) - 1))
+        k = self._groups[group].keys[pos][0]
+        return None if k == math.inf else -k
+
+    def ranking(self, method: str = 'ordinal') -> List[Dict[str, Any]]:
+        """Every group's full ranking, groups in sorted order."""
+        out = []
+        for g in self.groups():
+            out.extend(self.top_k(None, g, method))
+        return out
+
+
+STATS_DIMENSIONS = ('college', 'classnum', 'province', 'course')
+# Histogram bucket edges: <60, 60-69, 70-79, 80-89, 90 and above
+STATS_BUCKETS = (60, 70, 80, 90)
+STATS_BUCKET_LABELS = tuple([f"<{STATS_BUCKETS[0]}"]
+                            + [f"{lo}-{hi - 1}" for lo, hi in zip(STATS_BUCKETS, STATS_BUCKETS[1:])]
+                            + [f"≥{STATS_BUCKETS[-1]}"])
+_STUDENT_DIMS = STATS_DIMENSIONS[:3]
+
+
+class _Aggregate:
+    """Running count / sum / sum of squares / histogram of a bag of values.
+
+    Values are also counted per distinct value (exactly, not rounded: display
+    code formats them), so min and max survive removals: they are cached and
+    only recomputed (over the distinct values) after an extreme is removed. ``members`` counts the group's students,
+    including those without a GPA.
+    """
+
+    __slots__ = ('members', 'count', 'total', 'sumsq', 'buckets', 'values', '_extremes')
+
+    def __init__(self):
+        self.members = 0
+        self.count = 0
+        self.total = 0.0
+        self.sumsq = 0.0
+        self.buckets = [0] * (len(STATS_BUCKETS) + 1)
+        self.values: Dict[float, int] = {}
+        self._extremes: Optional[Tuple[float, float]] = None
+
+    def add(self, v: float) -> None:
+        self.count += 1
+        self.total += v
+        self.sumsq += v * v
+        self.buckets[bisect.bisect_right(STATS_BUCKETS, v)] += 1
+        self.values[v] = self.values.get(v, 0) + 1
+        if self._extremes is not None:
+            lo, hi = self._extremes
+            self._extremes = (min(lo, v), max(hi, v))
+
+    def remove(self, v: float) -> None:
+        self.count -= 1
+        if self.count:
+            self.total -= v
+            self.sumsq -= v * v
+        else:
+            # Start from exact zeros instead of accumulated rounding error
+            self.total = self.sumsq = 0.0
+        self.buckets[bisect.bisect_right(STATS_BUCKETS, v)] -= 1
+        n = self.values[v] - 1
+        if n:
+            self.values[v] = n
+        else:
+            del self.values[v]
+            if self._extremes is not None and v in self._extremes:
+                self._extremes = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        n = self.count
+        if n and self._extremes is None:
+            self._extremes = (min(self.values), max(self.values))
+        mean = self.total / n if n else None
+        return {
+            'students': self.members, 'count': n, 'mean': mean,
+            'std': math.sqrt(max(self.sumsq / n - mean * mean, 0.0)) if n else None,
+            'min': self._extremes[0] if n else None, 'max': self._extremes[1] if n else None,
+            'histogram': list(self.buckets),
+        }
+
+
+class StatsEngine:
+    """Aggregates per college / classnum / province (over student GPAs) and per
+    course name (over that course's scores), maintained incrementally from store
+    events like RankingIndex.
+
+    Each group keeps count, sum, sum of squares, min/max and a histogram over
+    STATS_BUCKETS, so stats() costs O(1) per group. A change to a student
+    takes back that student's previous contribution (kept per id) and adds the
+    new one: O(courses of the student). ``overall`` aggregates every GPA.
+    """
+
+    def __init__(self, store: StudentStore):
+        self.store = store
+        self.overall = _Aggregate()
+        self._aggs: Dict[str, Dict[Any, _Aggregate]] = {d: {} for d in STATS_DIMENSIONS}
+        # sid -> (college, classnum, province), gpa, course ids, scores
+        self._entry: Dict[str, Tuple[Tuple[Any, ...], Optional[float], array, array]] = {}
+        for s in store:
+            self._add(s.get('id'), s)
+        store.subscribe(self._on_change)
+
+    def close(self) -> None:
+        self.store.unsubscribe(self._on_change)
+
+    def _add(self, sid: str, s: StudentRecord) -> None:
+        keys = tuple(s.get(d, '') for d in _STUDENT_DIMS)
+        g = s.gpa()
+        entry = (keys, g, s.course_ids[:], s.scores[:])
+        self._entry[sid] = entry
+        self._apply(entry, 1)
+
+    def _remove(self, sid: str) -> None:
+        entry = self._entry.pop(sid, None)
+        if entry is not None:
+            self._apply(entry, -1)
+
+    def _apply(self, entry, sign: int) -> None:
+        keys, g, course_ids, scores = entry
+        targets = [self.overall]
+        for dim, key in zip(_STUDENT_DIMS, keys):
+            groups = self._aggs[dim]
+            agg = groups.get(key)
+            if agg is None:
+                agg = groups[key] = _Aggregate()
+            targets.append(agg)
+        courses = self._aggs['course']
+        for cid, score in zip(course_ids, scores):
+            agg = courses.get(cid)
+            if agg is None:
+                agg = courses[cid] = _Aggregate()
+            if sign > 0:
+                agg.members += 1
+                agg.add(score)
+            else:
+                agg.members -= 1
+                agg.remove(score)
+                if not agg.members:
+                    del courses[cid]
+        for agg in targets:
+            agg.members += sign
+            if g is not None:
+                if sign > 0:
+                    agg.add(g)
+                else:
+                    agg.remove(g)
+        for dim, key in zip(_STUDENT_DIMS, keys):
+            if not self._aggs[dim][key].members:
+                del self._aggs[dim][key]
+
+    def _on_change(self, op: str, sid: str, data: Dict[str, Any]) -> None:
+        self._remove(sid)
+        if op == 'del':
+            return
+        if op == 'edit':
+            sid = data['set'].get('id', sid)
+        self._add(sid, self.store.get(sid))
+
+    @staticmethod
+    def _check(dim: str) -> None:
+        if dim not in STATS_DIMENSIONS:
+            raise ValueError(f"不支持的统计维度: {dim}")
+
+    def groups(self, dim: str) -> List[Any]:
+        self._check(dim)
+        keys = self._aggs[dim]
+        names = [_COURSE_NAMES[k] for k in keys] if dim == 'course' else list(keys)
+        return sorted(names, key=lambda g: (g is None, str(g)))
+
+    def stats(self, dim: str, group: Any) -> Optional[Dict[str, Any]]:
+        """Aggregates of one group (None if it has no members)."""
+        self._check(dim)
+        key = _COURSE_IDS.get(group) if dim == 'course' else group
+        agg = self._aggs[dim].get(key)
+        return agg.to_dict() if agg is not None else None
+
+    def table(self, dim: str) -> Dict[Any, Dict[str, Any]]:
+        """Every group of ``dim`` with its aggregates, in sorted group order."""
+        return {g: self.stats(dim, g) for g in self.groups(dim)}
+
+    def summary(self) -> Dict[str, Any]:
+        return self.overall.to_dict()
+
+
+def group_stats(dim: str, store: Optional[StudentStore] = None) -> Dict[Any, Dict[str, Any]]:
+    """Aggregates for every group of ``dim`` (one of STATS_DIMENSIONS).
+
+    Builds a StatsEngine over ``store`` (default: the saved roster) in one pass
+    and reads each group from its running aggregates. Long-running callers
+    should keep a StatsEngine instead, so later reads cost O(1) per group.
+    """
+    if dim not in STATS_DIMENSIONS:
+        raise ValueError(f"不支持的统计维度: {dim}")
+    store = load_store() if store is None else store
+    with store.lock:
+        engine = StatsEngine(store)
+        try:
+            return engine.table(dim)
+        finally:
+            engine.close()
+
+
+JOURNAL_COMPACT_MIN_BYTES = 256 * 1024
+# Past this many unsaved records a snapshot is cheaper than the journal
+JOURNAL_MAX_PENDING = 50000
+
+
+def _complete_size(f) -> int:
+    """Size of a line file up to and including its last newline; anything after
+    it is a torn line from an interrupted append."""
+    end = f.seek(0, os.SEEK_END)
+    pos = end
+    while pos > 0:
+        step = min(pos, 64 * 1024)
+        f.seek(pos - step)
+        nl = f.read(step).rfind(b'\n')
+        if nl >= 0:
+            return pos - step + nl + 1
+        pos -= step
+    return 0
+
+
+def _append_lines(path: str, data: bytes) -> int:
+    """Append complete lines to ``path`` and fsync; returns the new file size.
+
+    A torn last line is cut off first, so the new records never end up glued
+    onto it (and lost with it) on the next read.
+    """
+    with open(path, 'a+b') as f:
+        keep = _complete_size(f)
+        if keep != f.tell():
+            f.truncate(keep)
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+        return f.tell()
+
+
+class ChangeJournal:
+    """Append-only log of StudentStore mutations, one compact JSON record per line.
+
+    Records are buffered as they happen and appended on flush(), so a save costs
+    O(changes). The journal is folded into the snapshot by JsonBackend.compact() once
+    it grows past half the snapshot size (or JOURNAL_COMPACT_MIN_BYTES). Bulk
+    changes beyond JOURNAL_MAX_PENDING records stop buffering and force a snapshot.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.pending: List[str] = []
+        self.overflow = False
+        try:
+            self.size = os.path.getsize(path)
+        except OSError:
+            self.size = 0
+
+    def __call__(self, op: str, sid: str, data: Dict[str, Any]) -> None:
+        if self.overflow:
+            return
+        if len(self.pending) >= JOURNAL_MAX_PENDING:
+            self.overflow = True
+            self.pending.clear()
+            return
+        rec = {'op': op, 'id': sid}
+        rec.update(data)
+        self.pending.append(serialization.dumps(rec, default=_plain))
+
+    def replay(self, store: StudentStore) -> int:
+        """Apply the on-disk journal to ``store``. Returns the number of records applied."""
+        n = 0
+        try:
+            f = open(self.path, 'r', encoding='utf-8')
+        except FileNotFoundError:
+            return 0
+        with f:
+            for line in f:
+                try:
+                    rec = serialization.loads(line)
+                except ValueError:
+                    # Torn tail from an interrupted append; flush() cuts it off
+                    continue
+                store.apply_change(rec)
+                n += 1
+        return n
+
+    def flush(self) -> int:
+        """Append buffered records and fsync. Returns the number of bytes written."""
+        if not self.pending:
+            return 0
+        data = ('\n'.join(self.pending) + '\n').encode('utf-8')
+        self.size = _append_lines(self.path, data)
+        self.pending.clear()
+        return len(data)
+
+    def should_compact(self) -> bool:
+        if self.overflow:
+            return True
+        try:
+            snapshot = os.path.getsize(DATA_FILE)
+        except OSError:
+            snapshot = 0
+        return self.size > max(JOURNAL_COMPACT_MIN_BYTES, snapshot // 2)
+
+    def reset(self) -> None:
+        self.pending.clear()
+        self.overflow = False
+        self.size = 0
+
+
+# A full export into EXPORT_DIR starts a new change log once it grows past this
+CHANGE_LOG_ROTATE_BYTES = 16 * 1024 * 1024
+
+
+class ChangeLog:
+    """Persistent list of which students were added, updated or deleted, for
+    export_students_delta().
+
+    The file starts with a header line holding a random generation id, then one
+    JSON line ``["a" | "u" | "d", id]`` per change. Changes are buffered (the
+    first one per id) and appended by flush() from save_store(). An export
+    records the generation and byte offset as its baseline, so a later delta
+    reads only what was appended since: O(changes), not O(roster). rotate()
+    starts a new generation; baselines from older ones can no longer be used.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.pending: Dict[str, str] = {}
+        self.generation: Optional[str] = None
+        self.size = 0
+        try:
+            with open(path, 'rb') as f:
+                self.generation = serialization.loads(f.readline())['gen']
+                # A baseline must not point past a torn tail: flush() cuts it off
+                self.size = _complete_size(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            _warn("变更记录 %s 无法读取，将重新开始: %s", path, e)
+            self.rotate(keep_pending=True)
+
+    def __call__(self, op: str, sid: str, data: Dict[str, Any]) -> None:
+        if op == 'edit':
+            new_sid = data['set'].get('id', sid)
+            if new_sid != sid:
+                # A changed id is the old student leaving and a new one arriving
+                self.pending.setdefault(sid, 'd')
+                self.pending.setdefault(new_sid, 'a')
+                return
+        self.pending.setdefault(sid, 'a' if op == 'add' else 'd' if op == 'del' else 'u')
+
+    def ensure(self) -> None:
+        if self.generation is None:
+            self.rotate(keep_pending=True)
+
+    def rotate(self, keep_pending: bool = False) -> None:
+        """Start a new, empty generation (temp file + rename)."""
+        import uuid
+        import time
+        header = serialization.dumps({'gen': uuid.uuid4().hex, 'created': int(time.time())}) + '\n'
+        data = header.encode('utf-8')
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp = self.path + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, self.path)
+        self.generation = serialization.loads(header)['gen']
+        self.size = len(data)
+        if not keep_pending:
+            self.pending.clear()
+
+    def flush(self) -> int:
+        """Append buffered changes. Returns the number of bytes written."""
+        if not self.pending:
+            return 0
+        self.ensure()
+        data = ''.join(serialization.dumps([op, sid]) + '\n' for sid, op in self.pending.items()).encode('utf-8')
+        self.size = _append_lines(self.path, data)
+        self.pending.clear()
+        return len(data)
+
+    def baseline(self, exists: Callable[[str], bool]) -> Dict[str, Any]:
+        """Where an export taken now starts from. Unsaved changes are listed
+        with whether each id was in the export, since they may never be saved."""
+        self.ensure()
+        return {'change_gen': self.generation, 'change_offset': self.size,
+                'change_pending': {sid: exists(sid) for sid in self.pending}}
+
+    def since(self, baseline: Dict[str, Any]) -> Dict[str, bool]:
+        """Every id touched after ``baseline``, mapped to whether it existed then."""
+        if baseline.get('change_gen') != self.generation:
+            raise ValueError("变更记录已重新开始（整表保存或文件轮换），请先做一次完整导出作为新的基线")
+        first: Dict[str, str] = {}
+        with open(self.path, 'rb') as f:
+            f.seek(baseline['change_offset'])
+            for line in f:
+                try:
+                    op, sid = serialization.loads(line)
+                except (ValueError, TypeError):
+                    continue  # torn tail from an interrupted append
+                first.setdefault(sid, op)
+        for sid, op in self.pending.items():
+            first.setdefault(sid, op)
+        existed = {sid: op != 'a' for sid, op in first.items()}
+        existed.update(baseline.get('change_pending') or {})
+        return existed
+
+
+def student_matches(s: Dict[str, Any], text: str) -> bool:
+    """Case-insensitive substring match on id, name, college and classnum."""
+    text = text.lower()
+    return (text in str(s.get('id', '')).lower()
+            or text in str(s.get('name', '')).lower()
+            or text in str(s.get('college', '')).lower()
+            or text in str(s.get('classnum', '')).lower())
+
+
+
+def _is_number(v: Any) -> bool:
+    if isinstance(v, bool):
+        return False
+    if isinstance(v, (int, float)):
+        return v == v
+    try:
+        float(v)
+    except (TypeError, ValueError):
+        return False
+    return True
+
+
+def validate_students(students: Iterable[Dict[str, Any]]) -> List[Tuple[Any, str]]:
+    """Check a roster for data problems; returns [(student id, message)].
+
+    Flags missing or duplicate ids, empty names, ages that are not whole
+    numbers, and courses with no name, a repeated name, a non-positive or
+    non-numeric credit, or a score outside 0-100.
+    """
+    problems: List[Tuple[Any, str]] = []
+    seen = set()
+    for s in students:
+        sid = s.get('id')
+        if sid in (None, ''):
+            problems.append((sid, "缺少学号"))
+        elif sid in seen:
+            problems.append((sid, "学号重复"))
+        else:
+            seen.add(sid)
+        if not str(s.get('name') or '').strip():
+            problems.append((sid, "缺少姓名"))
+        age = s.get('age')
+        if age not in (None, '') and not (_is_number(age) and float(age).is_integer() and float(age) >= 0):
+            problems.append((sid, f"年龄无效: {age!r}"))
+        names = set()
+        for name, credit, score in _course_tuples(s):
+            if name in (None, ''):
+                problems.append((sid, "课程缺少名称"))
+            elif name in names:
+                problems.append((sid, f"课程重复: {name}"))
+            names.add(name)
+            if not _is_number(credit) or float(credit) <= 0:
+                problems.append((sid, f"{name} 学分无效: {credit!r}"))
+            if not _is_number(score) or not 0 <= float(score) <= 100:
+                problems.append((sid, f"{name} 成绩超出范围: {score!r}"))
+    return problems
+
+class SearchIndex:
+    """Incremental index answering student_matches() queries without a full scan.
+
+    - name: unigram + bigram postings (works for Chinese names, no tokenizing)
+    - id: trigram postings for infixes, plus a sorted id list for ids_with_prefix()
+    - college / classnum: few distinct values, so value -> students maps are scanned
+    Students get integer handles in roster order, so sorting handles restores
+    display order. A query that extends the previous one filters the previous
+    result instead of hitting the index when that set is small.
+    """
+
+    REUSE_MAX = 5000
+
+    def __init__(self, store: StudentStore):
+        self.store = store
+        self._handle: Dict[str, int] = {}
+        self._sid: Dict[int, str] = {}
+        self._texts: Dict[int, Tuple[str, str, str, str]] = {}
+        self._grams: Dict[str, set] = {}
+        self._id_grams: Dict[str, set] = {}
+        self._ids: List[Tuple[str, int]] = []
+        self._values: Dict[str, Dict[str, set]] = {'college': {}, 'classnum': {}}
+        self._next = 0
+        self._last: Optional[Tuple[str, set]] = None
+        for s in store:
+            self._index(s)
+        self._ids.sort()
+        store.subscribe(self._on_change)
+
+    def close(self) -> None:
+        self.store.unsubscribe(self._on_change)
+
+    @staticmethod
+    def _ngrams(text: str, n: int):
+        return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+    def _index(self, s: Dict[str, Any], keep_sorted: bool = False) -> None:
+        sid = s.get('id')
+        h = self._next
+        self._next += 1
+        texts = tuple(str(s.get(k, '')).lower() for k in ('id', 'name', 'college', 'classnum'))
+        self._handle[sid] = h
+        self._sid[h] = sid
+        self._texts[h] = texts
+        sid_l, name, college, classnum = texts
+        for g in self._ngrams(name, 1) | self._ngrams(name, 2):
+            self._grams.setdefault(g, set()).add(h)
+        for g in self._ngrams(sid_l, 3):
+            self._id_grams.setdefault(g, set()).add(h)
+        if keep_sorted:
+            bisect.insort(self._ids, (sid_l, h))
+        else:
+            self._ids.append((sid_l, h))
+        self._values['college'].setdefault(college, set()).add(h)
+        self._values['classnum'].setdefault(classnum, set()).add(h)
+
+    def _unindex(self, sid: str) -> None:
+        h = self._handle.pop(sid)
+        del self._sid[h]
+        sid_l, name, college, classnum = self._texts.pop(h)
+        for postings, grams in ((self._grams, self._ngrams(name, 1) | self._ngrams(name, 2)),
+                                (self._id_grams, self._ngrams(sid_l, 3))):
+            for g in grams:
+                hs = postings[g]
+                hs.discard(h)
+                if not hs:
+                    del postings[g]
+        del self._ids[bisect.bisect_left(self._ids, (sid_l, h))]
+        for field, value in (('college', college), ('classnum', classnum)):
+            hs = self._values[field][value]
+            hs.discard(h)
+            if not hs:
+                del self._values[field][value]
+
+    def _on_change(self, op: str, sid: str, data: Dict[str, Any]) -> None:
+        if op == 'add':
+            self._index(self.store.get(sid), keep_sorted=True)
+        elif op == 'del':
+            self._unindex(sid)
+        elif op == 'edit':
+            fields = data['set']
+            if any(k in fields for k in ('id', 'name', 'college', 'classnum')):
+                # Re-index under the old handle so roster order is preserved
+                h = self._handle[sid]
+                self._unindex(sid)
+                saved, self._next = self._next, h
+                self._index(self.store.get(fields.get('id', sid)), keep_sorted=True)
+                self._next = saved
+        else:
+            return
+        self._last = None
+
+    def ids_with_prefix(self, prefix: str) -> List[str]:
+        """Student ids starting with ``prefix`` (case-insensitive), via the sorted id list."""
+        prefix = prefix.lower()
+        i = bisect.bisect_left(self._ids, (prefix,))
+        out = []
+        while i < len(self._ids) and self._ids[i][0].startswith(prefix):
+            out.append(self._sid[self._ids[i][1]])
+            i += 1
+        return out
+
+    def _matches(self, h: int, q: str) -> bool:
+        return any(q in t for t in self._texts[h])
+
+    def _lookup(self, q: str) -> set:
+        # id: trigram postings; a single trigram is exact, longer queries are verified
+        if len(q) >= 3:
+            found = self._intersect(self._id_grams, self._ngrams(q, 3))
+            if len(q) > 3:
+                found = {h for h in found if q in self._texts[h][0]}
+        else:
+            found = {h for sid_l, h in self._ids if q in sid_l}
+        # name: unigram / bigram postings, same exactness rule
+        if len(q) <= 2:
+            found |= self._grams.get(q, set())
+        else:
+            cand = self._intersect(self._grams, self._ngrams(q, 2))
+            found.update(h for h in cand if q in self._texts[h][1])
+        # college / classnum
+        for values in self._values.values():
+            for value, hs in values.items():
+                if q in value:
+                    found |= hs
+        return found
+
+    @staticmethod
+    def _intersect(postings: Dict[str, set], grams) -> set:
+        sets = []
+        for g in grams:
+            hs = postings.get(g)
+            if not hs:
+                return set()
+            sets.append(hs)
+        sets.sort(key=len)
+        if not sets:
+            return set()
+        return set(sets[0]).intersection(*sets[1:]) if len(sets) > 1 else set(sets[0])
+
+    def search(self, text: str) -> List[str]:
+        """Ids of students matching ``text`` (same semantics as student_matches), in roster order."""
+        q = text.lower()
+        if not q:
+            return [s.get('id') for s in self.store]
+        last = self._last
+        if last is not None and last[0] in q and len(last[1]) <= self.REUSE_MAX:
+            found = {h for h in last[1] if self._matches(h, q)}
+        else:
+            found = self._lookup(q)
+        self._last = (q, found)
+        return [self._sid[h] for h in sorted(found)]
+
+
+class JsonBackend:
+    """Default storage: students.json snapshot plus the students.journal change log.
+
+    The snapshot is compact JSON unless SIMS_FORMAT picks another format from
+    serialization.FORMATS; loading detects the format from the file itself.
+    """
+
+    name = 'json'
+
+    def load_store(self) -> StudentStore:
+        """Load the snapshot, replay the journal and attach a journal for new changes."""
+        ensure_data_dir()
+        _count_io('load')
+        store = StudentStore(serialization.load(DATA_FILE, object_hook=_record_hook))
+        journal = ChangeJournal(journal_path())
+        journal.replay(store)
+        store.journal = journal
+        store.backend = self
+        store.subscribe(journal)
+        return store
+
+    def save_store(self, store: StudentStore) -> None:
+        """Append the buffered journal records; write a snapshot when due for compaction."""
+        ensure_data_dir()
+        if store.journal is None:
+            self.save_all(store.saved_records())
+            return
+        if not store.journal.overflow:
+            instrument.add_bytes('save_store', written=store.journal.flush())
+        if store.journal.should_compact():
+            self.compact(store)
+            instrument.add_bytes('save_store', written=instrument.file_size(DATA_FILE))
+
+    def compact(self, store: StudentStore) -> None:
+        """Fold the journal into a fresh snapshot (temp file + rename)."""
+        self.save_all(store.saved_records())
+        if store.journal is not None:
+            store.journal.reset()
+
+    def save_all(self, students: List[Dict[str, Any]]) -> None:
+        """Write a full snapshot atomically. The journal is folded in, so it is removed."""
+        ensure_data_dir()
+        serialization.dump(DATA_FILE, students, default=_plain)
+        try:
+            os.remove(journal_path())
+        except FileNotFoundError:
+            pass
+
+    def iter_students(self) -> Iterator[Dict[str, Any]]:
+        return iter(self.load_store().students)
+
+    def roster(self) -> StudentStore:
+        """Re-iterable view of all students (supports len())."""
+        return self.load_store()
+
+    def _record_file(self) -> Optional[serialization.RecordFile]:
+        """The snapshot opened for random access, if it is a record file with no
+        journal on top (otherwise it may be stale)."""
+        ensure_data_dir()
+        try:
+            if os.path.getsize(journal_path()) > 0:
+                return None
+        except OSError:
+            pass
+        if serialization.detect_format(DATA_FILE) != 'records':
+            return None
+        return serialization.RecordFile(DATA_FILE)
+
+    def count(self) -> int:
+        rf = self._record_file()
+        if rf is not None:
+            with rf:
+                return len(rf)
+        return len(self.load_store())
+
+    def get(self, sid: str) -> Optional[Dict[str, Any]]:
+        rf = self._record_file()
+        if rf is not None:
+            with rf:
+                return rf.get(sid, object_hook=_record_hook)
+        return self.load_store().get(sid)
+
+    def search(self, text: str = '', college: Optional[str] = None, classnum: Optional[str] = None,
+               limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        out = []
+        for s in self.load_store():
+            if college is not None and s.get('college') != college:
+                continue
+            if classnum is not None and s.get('classnum') != classnum:
+                continue
+            if text and not student_matches(s, text):
+                continue
+            out.append(s)
+            if limit is not None and len(out) >= limit:
+                break
+        return out
+
+    def rank(self, group_by: Optional[str] = None, method: str = 'ordinal',
+             top: Optional[int] = None) -> List[Dict[str, Any]]:
+        return _rank_store(self.load_store(), group_by, method, top)
+
+
+# Below this many students, importing NumPy (~150 ms) costs more than the
+# vectorized path saves, unless something has imported it already
+VECTOR_MIN_STUDENTS = 20000
+
+
+def _use_vector(n: int) -> bool:
+    if n < VECTOR_MIN_STUDENTS and 'numpy' not in sys.modules:
+        return False
+    from .vector_stats import HAVE_NUMPY
+    return HAVE_NUMPY
+
+
+def _rank_store(store: StudentStore, group_by: Optional[str], method: str,
+                top: Optional[int]) -> List[Dict[str, Any]]:
+    if _use_vector(len(store)):
+        from .vector_stats import ScoreArrays
+        return ScoreArrays(store).ranking(method, group_by, top)
+    index = RankingIndex(store, group_by)
+    try:
+        if top is None:
+            return index.ranking(method)
+        out = []
+        for g in index.groups():
+            out.extend(index.top_k(top, g, method))
+        return out
+    finally:
+        index.close()
+
+
+@instrument.timed('load_store')
+def load_store() -> StudentStore:
+    """Load the roster from the configured backend, tracking changes for save_store()."""
+    backend = get_backend()
+    store = backend.load_store()
+    store.changes = ChangeLog(changes_path())
+    store.subscribe(store.changes)
+    if instrument.enabled():
+        instrument.add_bytes('load_store', read=_stored_bytes(backend))
+    return store
+
+
+@instrument.timed('save_store')
+def save_store(store: StudentStore) -> None:
+    """Persist the pending changes of a store returned by load_store()."""
+    _count_io('save')
+    with store.lock:
+        if store.changes is not None:
+            # Before the data: a crash in between then only repeats rows in the next delta export
+            store.changes.flush()
+        (store.backend or get_backend()).save_store(store)
+
+
+IMPORT_CHUNK_ROWS = 5000
+
+
+class ImportCancelled(Exception):
+    """Raised when a score import is cancelled. Nothing has been saved."""
+
+    def __init__(self, total: int, applied: int, skipped: int):
+        super().__init__(f"导入已取消 (已读取 {total} 行)")
+        self.total = total
+        self.applied = applied
+        self.skipped = skipped
+
+
+def iter_score_chunks(file_path: str, chunk_size: int = IMPORT_CHUNK_ROWS) -> Iterator[Dict[str, Any]]:
+    """Parse a score file lazily, yielding at most ``chunk_size`` rows at a time.
+
+    Each chunk is ``{'rows': [(id, course, credit, score), ...], 'lines': n,
+    'malformed': n, 'bytes_read': n}``; ``lines`` counts data lines in the chunk
+    (header excluded) and ``bytes_read`` is cumulative. Only one chunk is held in
+    memory, so the file size does not matter.
+    """
+    import csv
+    is_csv = str(file_path).lower().endswith('.csv')
+    pos = [0]
+
+    def lines(f):
+        first = True
+        for raw in f:
+            pos[0] += len(raw)
+            line = raw.decode('utf-8')
+            if first:
+                line = line.lstrip('\ufeff')
+                first = False
+            yield line
+
+    with open(file_path, 'rb') as f:
+        if is_csv:
+            records = (row for row in csv.reader(lines(f)) if row)
+        else:
+            records = (line.split() for line in lines(f) if line.strip())
+        rows: List[Tuple[str, str, float, float]] = []
+        count = 0
+        malformed = 0
+        first = True
+        for rec in records:
+            if first:
+                first = False
+                # Optional header check
+                if is_csv and len(rec) >= 4 and rec[0].lower() in ('id', '学号'):
+                    continue
+            count += 1
+            if len(rec) < 4:
+                malformed += 1
+            else:
+                try:
+                    rows.append((rec[0], rec[1], float(rec[2]), float(rec[3])))
+                except ValueError:
+                    malformed += 1
+            if count >= chunk_size:
+                yield {'rows': rows, 'lines': count, 'malformed': malformed, 'bytes_read': pos[0]}
+                rows, count, malformed = [], 0, 0
+        if count:
+            yield {'rows': rows, 'lines': count, 'malformed': malformed, 'bytes_read': pos[0]}
+
+
+def import_scores_iter(file_path: str, store: StudentStore,
+                       chunk_size: int = IMPORT_CHUNK_ROWS) -> Iterator[Dict[str, Any]]:
+    """Apply a score file to ``store`` chunk by chunk, yielding progress after each chunk.
+
+    Progress dicts carry running ``total``, ``applied``, ``skipped`` counts plus
+    ``bytes_read``, ``bytes_total``, ``elapsed`` and ``rows_per_sec``. Stopping
+    iteration early leaves the already-applied chunks in the store.
+    """
+    import time
+    bytes_total = os.path.getsize(file_path)
+    started = time.perf_counter()
+    total = applied = skipped = 0
+    for chunk in iter_score_chunks(file_path, chunk_size):
+        total += chunk['lines']
+        skipped += chunk['malformed']
+        with store.lock:
+            for sid, cname, credit, score in chunk['rows']:
+                if store.set_score(sid, cname, credit, score):
+                    applied += 1
+                else:
+                    skipped += 1
+        elapsed = time.perf_counter() - started
+        yield {
+            'total': total,
+            'applied': applied,
+            'skipped': skipped,
+            'bytes_read': chunk['bytes_read'],
+            'bytes_total': bytes_total,
+            'elapsed': elapsed,
+            'rows_per_sec': total / elapsed if elapsed > 0 else 0.0,
+        }
+
+
+@instrument.timed('import_scores')
+def import_scores(file_path: str, progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+                  cancel: Optional[Callable[[], bool]] = None,
+                  chunk_size: int = IMPORT_CHUNK_ROWS,
+                  store: Optional[StudentStore] = None) -> Tuple[int, int, int]:
     """
     Import scores from file.
     Supports CSV (id,course,credit,score) or whitespace-delimited with the same order.
+    The file is streamed in chunks; ``progress`` is called with the progress dict
+    from import_scores_iter after every chunk, and ``cancel`` is polled between
+    chunks (raises ImportCancelled without saving when it returns True).
+
+    Without ``store`` the roster is loaded, updated and saved. With ``store`` the
+    scores are applied to it in memory only and saving is left to the caller; on
+    cancel the chunks already applied stay in that store.
     Returns (total_lines, applied, skipped_unknown_id).
     """
-    ensure_data_dir()
-    students = load_students()
-    total = 0
-    applied = 0
-    skipped = 0
-    try:
-        import csv
-        is_csv = str(file_path).lower().endswith('.csv')
-        with open(file_path, 'r', encoding='utf-8') as f:
-            if is_csv:
-                reader = csv.reader(f)
-                for row in reader:
-                    if not row:
-                        continue
-                    total += 1
-                    # Optional header check
-                    if total == 1 and len(row) >= 4 and row[0].lower() in ('id','学号'):
-                        total -= 1
-                        continue
-                    try:
-                        sid, cname, credit, score = row[0], row[1], float(row[2]), float(row[3])
-                    except Exception:
-                        skipped += 1
-                        continue
-                    if update_score_in_memory(students, sid, cname, credit, score):
-                        applied += 1
-                    else:
-                        skipped += 1
-            else:
-                for line in f:
-                    line = line.strip()
-                    if not line:
-                        continue
-                    total += 1
-                    parts = line.split()
-                    if len(parts) < 4:
-                        skipped += 1
-                        continue
-                    sid, cname, credit_s, score_s = parts[0], parts[1], parts[2], parts[3]
-                    try:
-                        credit = float(credit_s)
-                        score = float(score_s)
-                    except Exception:
-                        skipped += 1
-                        continue
-                    if update_score_in_memory(students, sid, cname, credit, score):
-                        applied += 1
-                    else:
-                        skipped += 1
-    except Exception:
-        raise
-    save_students(students)
+    students = load_store() if store is None else store
+    instrument.add_bytes('import_scores', read=instrument.file_size(file_path))
+    total = applied = skipped = 0
+    for info in import_scores_iter(file_path, students, chunk_size):
+        total, applied, skipped = info['total'], info['applied'], info['skipped']
+        if progress is not None:
+            progress(info)
+        if cancel is not None and cancel():
+            raise ImportCancelled(total, applied, skipped)
+    if store is None:
+        save_store(students)
     return total, applied, skipped
 
 
-def rank_students() -> List[Dict[str, Any]]:
-    """Return ranking list: [{'rank', 'id', 'name', 'gpa'}] sorted by GPA desc."""
-    students = load_students()
-    enriched = []
-    for s in students:
-        g = calc_gpa(s.get('courses', []))
-        enriched.append({'id': s.get('id',''), 'name': s.get('name',''), 'gpa': g})
-    enriched.sort(key=lambda x: (x['gpa'] if x['gpa'] is not None else -1), reverse=True)
-    out = []
-    r = 1
-    for e in enriched:
-        out.append({'rank': r, **e})
-        r += 1
+SCORE_FILE_EXTS = ('.csv', '.txt')
+
+
+def score_files(paths: Iterable[str]) -> List[str]:
+    """Expand ``paths`` into score files, keeping their order. A directory
+    contributes its .csv/.txt files (not recursive), sorted by name."""
+    out: List[str] = []
+    for p in paths:
+        if os.path.isdir(p):
+            names = sorted(n for n in os.listdir(p) if n.lower().endswith(SCORE_FILE_EXTS))
+            out.extend(os.path.join(p, n) for n in names if os.path.isfile(os.path.join(p, n)))
+        else:
+            out.append(p)
     return out
 
 
-def export_students_csv(dest_path: str = None) -> str:
-    """Export students to CSV (UTF-8 BOM). If dest_path is provided, write there; else write into EXPORT_DIR.
-    Returns the file path written.
+def parse_score_file(file_path: str) -> Dict[str, Any]:
+    """Parse and validate a whole score file.
+
+    Returns ``{'path', 'rows': [(id, course, credit, score), ...], 'lines',
+    'malformed'}``. Module-level so it can run in a worker process.
     """
-    ensure_data_dir()
-    students = load_students()
-    header_keys = STUDENT_FIELDS
-    header_labels = [STUDENT_LABELS.get(k, k) for k in header_keys]
-    lines = [','.join(header_labels)]
-    def esc(field: Any) -> str:
-        f = str(field)
-        if ',' in f or '"' in f or '\n' in f:
-            f = '"' + f.replace('"','""') + '"'
-        return f
-    for s in students:
-        row = [esc(s.get(k, '')) for k in header_keys]
-        lines.append(','.join(row))
-    data = ('\ufeff' + '\n'.join(lines)).encode('utf-8')
+    rows: List[Tuple[str, str, float, float]] = []
+    lines = malformed = 0
+    for chunk in iter_score_chunks(file_path):
+        rows.extend(chunk['rows'])
+        lines += chunk['lines']
+        malformed += chunk['malformed']
+    return {'path': file_path, 'rows': rows, 'lines': lines, 'malformed': malformed}
+
+
+@instrument.timed('import_scores_batch')
+def import_scores_batch(paths: Iterable[str], workers: Optional[int] = None,
+                        progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+                        cancel: Optional[Callable[[], bool]] = None,
+                        store: Optional[StudentStore] = None) -> Dict[str, Tuple[int, int, int]]:
+    """Import many score files (or directories of them) at once.
+
+    Files are parsed in parallel in a ProcessPoolExecutor with ``workers``
+    processes (default: one per CPU; 1 parses in this process), then merged
+    into the roster in one pass. Conflicts are last-writer-wins: files count in
+    the order given (a directory's files by name) and rows in file order, so
+    the last row for an (id, course) pair is the one stored.
+
+    ``progress`` gets ``{'files_done', 'files_total', 'path', 'total',
+    'skipped'}`` as each file finishes parsing; ``cancel`` is polled then and
+    raises ImportCancelled before anything is applied. ``store`` works as in
+    import_scores(). Returns {path: (total_lines, applied, skipped)} in input
+    order; applied counts rows for known ids, including ones a later row
+    overrides.
+    """
+    files = score_files(paths)
+    if not files:
+        return {}
+    if instrument.enabled():
+        instrument.add_bytes('import_scores_batch', read=sum(map(instrument.file_size, files)))
+    parsed: Dict[int, Dict[str, Any]] = {}
+    total = skipped = 0
+
+    def collect(i: int, result: Dict[str, Any]) -> None:
+        nonlocal total, skipped
+        parsed[i] = result
+        total += result['lines']
+        skipped += result['malformed']
+        if progress is not None:
+            progress({'files_done': len(parsed), 'files_total': len(files), 'path': files[i],
+                      'total': total, 'skipped': skipped})
+        if cancel is not None and cancel():
+            raise ImportCancelled(total, 0, skipped)
+
+    workers = min(workers or os.cpu_count() or 1, len(files))
+    if workers <= 1:
+        for i, path in enumerate(files):
+            collect(i, parse_score_file(path))
+    else:
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+        # spawn, not fork: this usually runs on a worker thread of the GUI process
+        ctx = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+            futures = {pool.submit(parse_score_file, path): i for i, path in enumerate(files)}
+            try:
+                for fut in as_completed(futures):
+                    collect(futures[fut], fut.result())
+            except BaseException:
+                pool.shutdown(wait=True, cancel_futures=True)
+                raise
+
+    students = load_store() if store is None else store
+    stats: Dict[str, Tuple[int, int, int]] = {}
+    with students.lock:
+        # Later files and rows overwrite earlier ones; each pair is then stored once
+        merged: Dict[Tuple[str, str], Tuple[float, float]] = {}
+        for i, path in enumerate(files):
+            result = parsed[i]
+            applied = 0
+            for sid, cname, credit, score in result['rows']:
+                if sid in students:
+                    merged[(sid, cname)] = (credit, score)
+                    applied += 1
+            stats[path] = (result['lines'], applied, result['lines'] - applied)
+            parsed[i] = None  # release the rows as we go
+        for (sid, cname), (credit, score) in merged.items():
+            students.set_score(sid, cname, credit, score)
+    if store is None:
+        save_store(students)
+    return stats
+
+
+STUDENT_FILE_EXTS = ('.csv', '.txt', '.xlsx')
+STUDENT_IMPORT_MODES = ('upsert', 'insert', 'replace')
+STUDENT_IMPORT_CHUNK_ROWS = 20000
+_FIELD_OF_LABEL = {**{v: k for k, v in STUDENT_LABELS.items()}, **{k: k for k in STUDENT_FIELDS}}
+
+
+def _student_file_rows(file_path: str, info: Dict[str, Any]) -> Iterator[List[Any]]:
+    """Raw rows of a student file: XLSX (first sheet, read-only), CSV, or
+    whitespace-separated text in main.cpp's order. ``info`` is kept updated with
+    ``bytes_read``/``bytes_total`` (text) or ``rows_total`` (XLSX)."""
+    ext = os.path.splitext(str(file_path))[1].lower()
+    if ext == '.xlsx':
+        from openpyxl import load_workbook
+        wb = load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            ws = wb.worksheets[0]
+            info['rows_total'] = ws.max_row
+            for row in ws.iter_rows(values_only=True):
+                yield list(row)
+        finally:
+            wb.close()
+        return
+    import csv
+    info['bytes_total'] = os.path.getsize(file_path)
+    info['bytes_read'] = 0
+
+    def lines(f):
+        first = True
+        for raw in f:
+            info['bytes_read'] += len(raw)
+            line = raw.decode('utf-8')
+            if first:
+                line = line.lstrip('\ufeff')
+                first = False
+            yield line
+
+    with open(file_path, 'rb') as f:
+        if ext == '.csv':
+            yield from csv.reader(lines(f))
+        else:
+            for line in lines(f):
+                yield line.split()
+
+
+def _student_cell(v: Any) -> str:
+    if v is None:
+        return ''
+    if isinstance(v, float) and v.is_integer():
+        # Excel stores ids and phone numbers typed as numbers as floats
+        return str(int(v))
+    return str(v).strip()
+
+
+def parse_student_file(file_path: str, progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+                       cancel: Optional[Callable[[], bool]] = None) -> Dict[str, Any]:
+    """Read and validate a student file (.csv / .xlsx / whitespace text).
+
+    The first row is a header when its first cell is 'id' or '学号'; columns
+    are then matched to STUDENT_FIELDS by key or label (STUDENT_LABELS) and
+    unknown columns are ignored. Without a header the columns are
+    STUDENT_FIELDS in order, as written by main.cpp. Rows without an id or
+    name, with a bad age or with an id already seen in the file are rejected.
+
+    Returns ``{'path', 'students': [dict], 'lines', 'errors': [(line, message)],
+    'columns'}``. ``progress`` gets ``{'students_read', 'bytes_read',
+    'bytes_total' | 'rows_total'}`` every STUDENT_IMPORT_CHUNK_ROWS rows;
+    ``cancel`` is polled then and raises ImportCancelled.
+    """
+    info: Dict[str, Any] = {}
+    students: List[Dict[str, Any]] = []
+    errors: List[Tuple[int, str]] = []
+    seen = set()
+    keys: Optional[List[Optional[str]]] = None
+    positional = True
+    lines = 0
+    for line_no, row in enumerate(_student_file_rows(file_path, info), 1):
+        cells = [_student_cell(v) for v in row]
+        if not any(cells):
+            continue
+        if keys is None:
+            keys = list(STUDENT_FIELDS)
+            if cells[0].lower() in ('id', '学号'):
+                keys = [_FIELD_OF_LABEL.get(c, _FIELD_OF_LABEL.get(c.lower())) for c in cells]
+                positional = False
+                unknown = [c for c, k in zip(cells, keys) if k is None and c]
+                if unknown:
+                    errors.append((line_no, f"忽略未知列: {', '.join(unknown)}"))
+                continue
+        lines += 1
+        if positional and len(cells) < len(keys):
+            errors.append((line_no, f"字段数不足: 需要 {len(keys)} 个，实际 {len(cells)} 个"))
+            continue
+        s = {k: v for k, v in zip(keys, cells) if k is not None}
+        sid = s.get('id', '')
+        if not sid:
+            errors.append((line_no, "缺少学号"))
+            continue
+        if not s.get('name'):
+            errors.append((line_no, f"{sid}: 缺少姓名"))
+            continue
+        age = s.get('age')
+        if age:
+            if not (_is_number(age) and float(age).is_integer() and float(age) >= 0):
+                errors.append((line_no, f"{sid}: 年龄无效: {age!r}"))
+                continue
+            s['age'] = int(float(age))
+        if sid in seen:
+            errors.append((line_no, f"{sid}: 文件内学号重复"))
+            continue
+        seen.add(sid)
+        students.append(s)
+        if lines % STUDENT_IMPORT_CHUNK_ROWS == 0:
+            if progress is not None:
+                progress(dict(info, students_read=len(students)))
+            if cancel is not None and cancel():
+                raise ImportCancelled(lines, 0, lines - len(students))
+    return {'path': file_path, 'students': students, 'lines': lines, 'errors': errors,
+            'columns': [k for k in keys or STUDENT_FIELDS if k is not None]}
+
+
+@instrument.timed('import_students')
+def import_students(file_path: str, mode: str = 'upsert',
+                    progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+                    cancel: Optional[Callable[[], bool]] = None,
+                    store: Optional[StudentStore] = None) -> Dict[str, Any]:
+    """Bulk-import students from a .csv / .xlsx / whitespace text file.
+
+    The whole file is parsed and validated first (see parse_student_file), then
+    applied to the roster in one batch under the store lock and saved once:
+
+    - 'upsert': add new ids, update the file's columns of existing ones
+    - 'insert': add new ids only; existing ids are skipped
+    - 'replace': the roster becomes exactly the file's students; students
+      not in the file are removed, existing ones are updated and keep their
+      courses
+
+    Cancelling (polled while parsing) raises ImportCancelled before anything
+    is applied. ``store`` works as in import_scores(). Returns ``{'total',
+    'added', 'updated', 'unchanged', 'removed', 'skipped', 'errors'}``; skipped
+    counts rejected rows plus existing ids in 'insert' mode.
+    """
+    if mode not in STUDENT_IMPORT_MODES:
+        raise ValueError(f"未知的导入模式: {mode}")
+    instrument.add_bytes('import_students', read=instrument.file_size(file_path))
+    parsed = parse_student_file(file_path, progress, cancel)
+    skipped = parsed['lines'] - len(parsed['students'])
+    if mode == 'replace' and skipped:
+        # A rejected row may be a student who would otherwise be removed
+        raise ValueError(f"文件中有 {skipped} 行无效，替换模式下不修改名单，请先修正")
+    students = load_store() if store is None else store
+    added = updated = unchanged = removed = 0
+    with students.lock:
+        if mode == 'replace':
+            keep = {s['id'] for s in parsed['students']}
+            gone = [s['id'] for s in students if s['id'] not in keep]
+            students.remove_many(gone)
+            removed = len(gone)
+        for s in parsed['students']:
+            sid = s['id']
+            rec = students.get(sid)
+            if rec is None:
+                new = {k: '' for k in STUDENT_FIELDS}
+                new.update(s)
+                new['courses'] = []
+                students.add(new)
+                added += 1
+            elif mode == 'insert':
+                skipped += 1
+            else:
+                changes = {k: v for k, v in s.items() if k != 'id' and rec.get(k) != v}
+                if changes:
+                    students.update(sid, changes)
+                    updated += 1
+                else:
+                    unchanged += 1
+    if store is None:
+        save_store(students)
+    return {'total': parsed['lines'], 'added': added, 'updated': updated, 'unchanged': unchanged,
+            'removed': removed, 'skipped': skipped, 'errors': parsed['errors']}
+
+
+@instrument.timed('rank_students')
+def rank_students(group_by: Optional[str] = None, method: str = 'ordinal',
+                  top: Optional[int] = None,
+                  store: Optional[StudentStore] = None) -> List[Dict[str, Any]]:
+    """Return ranking list: [{'rank', 'id', 'name', 'gpa'}] sorted by GPA desc.
+
+    ``group_by`` ('college' / 'classnum') ranks each group separately and adds a
+    'group' key; ``method`` is 'ordinal', 'competition' or 'dense'; ``top``
+    keeps the first N rows of each group. Ranks ``store`` when given instead of
+    reading the roster from the backend.
+    """
+    if store is not None:
+        with store.lock:
+            return _rank_store(store, group_by, method, top)
+    return get_backend().rank(group_by, method, top)
+
+
+EXPORT_CHUNK_ROWS = 1000
+EXPORT_BUFFER_BYTES = 1 << 20
+
+
+def _course_tuples(s: Dict[str, Any]) -> List[Tuple[Any, Any, Any]]:
+    if isinstance(s, StudentRecord):
+        return s.course_tuples()
+    return [(c.get('name'), c.get('credit', ''), c.get('score', '')) for c in s.get('courses') or []]
+
+
+def _export_columns(students, columns: Optional[List[str]], course_columns: bool):
+    """Resolve (keys, labels, course names) for an export.
+
+    ``columns`` may contain STUDENT_FIELDS keys and 'gpa'. With ``course_columns``
+    one score column per course name is appended, which needs a pass over the
+    roster to collect the names (first-seen order).
+    """
+    keys = list(columns) if columns else list(STUDENT_FIELDS)
+    labels = ['GPA' if k == 'gpa' else STUDENT_LABELS.get(k, k) for k in keys]
+    courses: List[str] = []
+    if course_columns:
+        seen = set()
+        for s in students:
+            for name, _, _ in _course_tuples(s):
+                if name not in seen:
+                    seen.add(name)
+                    courses.append(name)
+    return keys, labels + [str(c) for c in courses], courses
+
+
+def _export_row(s: Dict[str, Any], keys: List[str], courses: List[str]) -> list:
+    row = []
+    for k in keys:
+        if k == 'gpa':
+            g = s.gpa() if isinstance(s, StudentRecord) else calc_gpa(s.get('courses', []))
+            row.append('' if g is None else round(g, 2))
+        else:
+            row.append(s.get(k, ''))
+    if courses:
+        scores: Dict[Any, Any] = {}
+        for name, _, score in _course_tuples(s):
+            scores.setdefault(name, score)
+        row.extend(scores.get(name, '') for name in courses)
+    return row
+
+
+def _in_export_dir(fpath: str) -> bool:
+    return os.path.abspath(os.path.dirname(fpath)) == os.path.abspath(EXPORT_DIR)
+
+
+def _change_baseline(students) -> Dict[str, Any]:
+    """Baseline for the next delta export, taken while the export holds the store."""
+    log = getattr(students, 'changes', None)
+    if log is None:
+        log = ChangeLog(changes_path())
+        exists = lambda sid: False
+    else:
+        exists = students.__contains__
+    if log.size > CHANGE_LOG_ROTATE_BYTES:
+        # This export is the new baseline; older ones then need a full export
+        log.rotate(keep_pending=True)
+    return log.baseline(exists)
+
+
+def _reading(store: Optional[StudentStore]):
+    """Hold the lock of a caller's (shared) store while snapshotting it."""
+    return store.lock if store is not None else contextlib.nullcontext()
+
+
+def _snapshot(store: Optional[StudentStore], rows: Iterable[list]) -> Iterable[list]:
+    """Rows of a caller's store, built now (under _reading()) so the file shows
+    one moment of the roster and is then written without blocking edits.
+    Without ``store`` the roster was loaded privately for this export (nothing
+    else edits it), so its rows stay lazy and stream in bounded memory."""
+    return list(rows) if store is not None else rows
+
+
+def _export_path(dest_path: Optional[str], ext: str, prefix: str = 'students') -> Tuple[str, str]:
     import datetime
     if dest_path:
         fpath = dest_path
         os.makedirs(os.path.dirname(fpath) or '.', exist_ok=True)
         fname = os.path.basename(fpath)
     else:
-        fname = f"students_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        fname = f"{prefix}_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.{ext}"
         fpath = os.path.join(EXPORT_DIR, fname)
-    with open(fpath, 'wb') as fp:
-        fp.write(data)
+    return fpath, fname
+
+
+@instrument.timed('export_students_csv')
+def export_students_csv(dest_path: str = None, columns: Optional[List[str]] = None,
+                        course_columns: bool = False,
+                        where: Optional[Callable[[Dict[str, Any]], bool]] = None,
+                        progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+                        store: Optional[StudentStore] = None) -> str:
+    """Export students to CSV (UTF-8 BOM). If dest_path is provided, write there; else write into EXPORT_DIR.
+
+    Rows are streamed through the csv module in chunks of EXPORT_CHUNK_ROWS, so
+    memory does not grow with the roster; an in-memory ``store`` is first copied
+    into rows under its lock, and the file is written after releasing it.
+    ``columns`` picks fields (plus 'gpa'),
+    ``course_columns`` adds one score column per course, ``where`` filters
+    students, and ``progress`` receives {'rows', 'total', 'bytes_written'} per chunk.
+    ``store`` exports an in-memory roster (including unsaved changes) instead of
+    the saved one. Returns the file path written.
+    """
+    import csv
+    ensure_data_dir()
+    students = get_backend().roster() if store is None else store
+    fpath, fname = _export_path(dest_path, 'csv')
+    with _reading(store):
+        keys, header, courses = _export_columns(students, columns, course_columns)
+        total = len(students)
+        snapshot = _snapshot(store, (_export_row(s, keys, courses) for s in students
+                                        if where is None or where(s)))
+        baseline = _change_baseline(students) if _in_export_dir(fpath) else None
+    with open(fpath, 'w', encoding='utf-8-sig', newline='', buffering=EXPORT_BUFFER_BYTES) as fp:
+        # csv quotes only fields holding a lineterminator character, so with a
+        # bare '\n' a '\r' in a value went out unquoted and split the row
+        writer = csv.writer(fp, lineterminator='\r\n')
+        writer.writerow(header)
+        chunk = []
+        rows = 0
+        for row in snapshot:
+            chunk.append(row)
+            if len(chunk) >= EXPORT_CHUNK_ROWS:
+                writer.writerows(chunk)
+                rows += len(chunk)
+                chunk = []
+                if progress is not None:
+                    progress({'rows': rows, 'total': total, 'bytes_written': fp.tell()})
+        writer.writerows(chunk)
+        rows += len(chunk)
+        if progress is not None:
+            progress({'rows': rows, 'total': total, 'bytes_written': fp.tell()})
+    instrument.add_bytes('export_students_csv', written=instrument.file_size(fpath))
     # Only update export metadata if saved under EXPORT_DIR
-    try:
-        if os.path.abspath(os.path.dirname(fpath)) == os.path.abspath(EXPORT_DIR):
-            _append_export_meta(fname)
-    except Exception:
-        pass
+    if baseline is not None:
+        _append_export_meta(fname, kind='full', rows=rows, **baseline)
     return fpath
 
 
-def export_students_xlsx(dest_path: str = None) -> str:
+DELTA_KINDS = ('added', 'changed', 'deleted')
+
+
+def _delta_baseline(since: Optional[str]) -> Dict[str, Any]:
+    history = [e for e in export_history() if isinstance(e, dict) and e.get('change_gen')]
+    if since is not None:
+        history = [e for e in history if e.get('name') == since]
+    if not history:
+        raise ValueError(f"导出历史中没有可作为基线的导出: {since}" if since else
+                         "还没有可作为基线的导出，请先做一次完整导出")
+    return history[-1]
+
+
+@instrument.timed('export_students_delta')
+def export_students_delta(dest_path: str = None, since: Optional[str] = None,
+                          columns: Optional[List[str]] = None,
+                          store: Optional[StudentStore] = None) -> Tuple[str, Dict[str, Any]]:
+    """Export only the students added, changed or deleted since an earlier export.
+
+    The baseline is the export called ``since`` in exports.json (default: the
+    latest one recorded there). The ChangeLog lists the ids touched since then,
+    so the cost is O(changes): only those students are looked up and written.
+    The CSV has a leading 变更 column (added / changed / deleted); deleted rows
+    carry only the id. Rows are collected under the store lock and written after. A manifest with row counts, byte size and SHA-256 is
+    written next to the file (``<file>.manifest.json``) and returned. Written
+    into EXPORT_DIR (the default), the delta is itself recorded as the next
+    baseline. Returns (file path, manifest).
+    """
+    import csv
+    import time
+    ensure_data_dir()
+    base = _delta_baseline(since)
+    fpath, fname = _export_path(dest_path, 'csv', 'students_delta')
+    keys = list(columns) if columns else list(STUDENT_FIELDS)
+    if 'id' not in keys:
+        keys.insert(0, 'id')
+    id_col = keys.index('id')
+    header = ['变更'] + [('GPA' if k == 'gpa' else STUDENT_LABELS.get(k, k)) for k in keys]
+    if store is not None:
+        lookup, lock, log = store.get, store.lock, store.changes
+    else:
+        backend = get_backend()
+        log = ChangeLog(changes_path())
+        lock = contextlib.nullcontext()
+        lookup = backend.get
+        if isinstance(backend, JsonBackend) and backend._record_file() is None:
+            # No random access into the snapshot: load it once instead of per id
+            lookup = backend.load_store().get
+    if log is None:
+        raise ValueError("该名单没有变更记录，无法增量导出")
+    counts = dict.fromkeys(DELTA_KINDS, 0)
+    rows = []
+    with lock:
+        for sid, existed in log.since(base).items():
+            s = lookup(sid)
+            if s is None:
+                if not existed:
+                    continue  # added and deleted again in between
+                kind = 'deleted'
+                row = [''] * len(keys)
+                row[id_col] = sid
+            else:
+                kind = 'changed' if existed else 'added'
+                row = _export_row(s, keys, [])
+            counts[kind] += 1
+            rows.append([kind] + row)
+        baseline = log.baseline(lambda sid: lookup(sid) is not None) if _in_export_dir(fpath) else None
+    with open(fpath, 'w', encoding='utf-8-sig', newline='', buffering=EXPORT_BUFFER_BYTES) as fp:
+        writer = csv.writer(fp, lineterminator='\r\n')
+        writer.writerow(header)
+        writer.writerows(rows)
+    counts['total'] = sum(counts.values())
+    manifest = {
+        'kind': 'delta', 'file': fname, 'baseline': base.get('name'), 'created': int(time.time()),
+        'columns': keys, 'rows': counts,
+        'bytes': os.path.getsize(fpath), 'sha256': _file_sha256(fpath),
+    }
+    with open(fpath + '.manifest.json', 'w', encoding='utf-8') as mf:
+        json.dump(manifest, mf, ensure_ascii=False, indent=2)
+    instrument.add_bytes('export_students_delta', written=manifest['bytes'])
+    if baseline is not None:
+        _append_export_meta(fname, kind='delta', baseline=base.get('name'), rows=counts['total'],
+                            changes={k: counts[k] for k in DELTA_KINDS}, **baseline)
+    return fpath, manifest
+
+
+XLSX_WIDTH_SAMPLE = 1000
+SCORES_SHEET_HEADER = ['学号', '姓名', '课程', '学分', '成绩']
+
+
+def _xlsx_width(length: int) -> int:
+    return min(max(length + 2, 10), 50)
+
+
+@instrument.timed('export_students_xlsx')
+def export_students_xlsx(dest_path: str = None, fast: bool = True, scores_sheet: bool = False,
+                         columns: Optional[List[str]] = None,
+                         where: Optional[Callable[[Dict[str, Any]], bool]] = None,
+                         progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+                         store: Optional[StudentStore] = None) -> str:
     """Export students to XLSX using openpyxl. If dest_path is provided, write there; else write into EXPORT_DIR.
-    Returns the file path written.
+
+    ``fast`` (default) streams rows through a write-only workbook; column widths
+    come from the header and the first XLSX_WIDTH_SAMPLE rows, since write-only
+    sheets need them before any data. ``fast=False`` builds a regular workbook and
+    sizes columns from every cell. ``scores_sheet`` adds a "Scores" sheet with one
+    row per course. ``columns``/``where``/``progress``/``store`` work as in
+    export_students_csv. Returns the file path written.
     """
+    ensure_data_dir()
+    students = get_backend().roster() if store is None else store
+    fpath, fname = _export_path(dest_path, 'xlsx')
+    with _reading(store):
+        keys, header, _ = _export_columns(students, columns, False)
+        total = len(students)
+        rows = _snapshot(store, (_export_row(s, keys, []) for s in students if where is None or where(s)))
+        score_rows = _snapshot(store, _iter_score_rows(students, where)) if scores_sheet else None
+        baseline = _change_baseline(students) if _in_export_dir(fpath) else None
+    write = _write_xlsx_streaming if fast else _write_xlsx_classic
+    n = write(fpath, header, iter(rows), total, progress, None if score_rows is None else iter(score_rows))
+    instrument.add_bytes('export_students_xlsx', written=instrument.file_size(fpath))
+    # Only update metadata when saving under exports dir
+    if baseline is not None:
+        _append_export_meta(fname, kind='full', rows=n, **baseline)
+    return fpath
+
+
+def _iter_score_rows(students, where) -> Iterator[list]:
+    for s in students:
+        if where is not None and not where(s):
+            continue
+        sid, name = s.get('id', ''), s.get('name', '')
+        for cname, credit, score in _course_tuples(s):
+            yield [sid, name, cname, credit, score]
+
+
+def _write_xlsx_streaming(fpath: str, header: List[str], rows: Iterator[list], total: int,
+                          progress, score_rows: Optional[Iterator[list]]) -> int:
+    import itertools
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+    from openpyxl.utils import get_column_letter
+    wb = Workbook(write_only=True)
+    bold = Font(bold=True)
+
+    def write_sheet(title, head, it, report):
+        ws = wb.create_sheet(title)
+        sample = list(itertools.islice(it, XLSX_WIDTH_SAMPLE))
+        widths = [len(str(h)) for h in head]
+        for r in sample:
+            for i, v in enumerate(r):
+                n = len(str(v)) if v is not None else 0
+                if n > widths[i]:
+                    widths[i] = n
+        for i, w in enumerate(widths, 1):
+            ws.column_dimensions[get_column_letter(i)].width = _xlsx_width(w)
+        ws.freeze_panes = 'A2'
+        cells = []
+        for h in head:
+            cell = WriteOnlyCell(ws, value=h)
+            cell.font = bold
+            cells.append(cell)
+        ws.append(cells)
+        n = 0
+        for r in itertools.chain(sample, it):
+            ws.append(r)
+            n += 1
+            if report is not None and n % EXPORT_CHUNK_ROWS == 0:
+                report({'rows': n, 'total': total})
+        if report is not None:
+            report({'rows': n, 'total': total})
+        return n
+
+    n = write_sheet('Students', header, rows, progress)
+    if score_rows is not None:
+        write_sheet('Scores', SCORES_SHEET_HEADER, score_rows, None)
+    wb.save(fpath)
+    return n
+
+
+def _write_xlsx_classic(fpath: str, header: List[str], rows: Iterator[list], total: int,
+                        progress, score_rows: Optional[Iterator[list]]) -> int:
     from openpyxl import Workbook
     from openpyxl.styles import Font
-    ensure_data_dir()
-    students = load_students()
     wb = Workbook()
+    bold = Font(bold=True)
+
+    def fill(ws, head, it, report):
+        ws.append(head)
+        for col_cell in ws[1]:
+            col_cell.font = bold
+        n = 0
+        for r in it:
+            ws.append(r)
+            n += 1
+            if report is not None and n % EXPORT_CHUNK_ROWS == 0:
+                report({'rows': n, 'total': total})
+        if report is not None:
+            report({'rows': n, 'total': total})
+        # auto width
+        for column_cells in ws.columns:
+            values = [str(c.value) if c.value is not None else '' for c in column_cells]
+            length = max((len(v) for v in values), default=0)
+            ws.column_dimensions[column_cells[0].column_letter].width = _xlsx_width(length)
+        ws.freeze_panes = 'A2'
+        return n
+
     ws = wb.active
     ws.title = 'Students'
-    header_keys = STUDENT_FIELDS
-    header_labels = [STUDENT_LABELS.get(k, k) for k in header_keys]
-    ws.append(header_labels)
-    bold = Font(bold=True)
-    for col_cell in ws[1]:
-        col_cell.font = bold
-    for s in students:
-        ws.append([s.get(k, '') for k in header_keys])
-    # auto width
-    for column_cells in ws.columns:
-        values = [str(c.value) if c.value is not None else '' for c in column_cells]
-        length = max((len(v) for v in values), default=0)
-        ws.column_dimensions[column_cells[0].column_letter].width = min(max(length + 2, 10), 50)
-    ws.freeze_panes = 'A2'
-    import datetime
-    if dest_path:
-        fpath = dest_path
-        os.makedirs(os.path.dirname(fpath) or '.', exist_ok=True)
-        fname = os.path.basename(fpath)
-    else:
-        fname = f"students_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-        fpath = os.path.join(EXPORT_DIR, fname)
+    n = fill(ws, header, rows, progress)
+    if score_rows is not None:
+        fill(wb.create_sheet('Scores'), SCORES_SHEET_HEADER, score_rows, None)
     wb.save(fpath)
-    # Only update metadata when saving under exports dir
-    try:
-        if os.path.abspath(os.path.dirname(fpath)) == os.path.abspath(EXPORT_DIR):
-            _append_export_meta(fname)
-    except Exception:
-        pass
-    return fpath
+    return n
 
 
-def _append_export_meta(fname: str) -> None:
+def export_history() -> List[Dict[str, Any]]:
+    """The entries of exports.json, oldest first ([] if there is none yet)."""
     try:
         with open(EXPORT_METADATA, 'r', encoding='utf-8') as mf:
             meta = json.load(mf)
-    except Exception:
-        meta = []
-    try:
-        mtime = int(os.stat(os.path.join(EXPORT_DIR, fname)).st_mtime)
-    except Exception:
-        mtime = None
+    except FileNotFoundError:
+        return []
+    if not isinstance(meta, list):
+        raise ValueError("导出历史不是列表")
+    return meta
+
+
+def _file_sha256(path: str) -> str:
+    import hashlib
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _append_export_meta(fname: str, **fields: Any) -> None:
+    """Add an entry to the export history: file name, mtime, size, SHA-256 and
+    ``fields`` (kind, row counts, change-log baseline). The export itself has
+    already been written, so failures here are logged and counted under
+    'export_meta' in the instrumentation instead of failing it."""
     import time
-    meta.append({'name': fname, 'mtime': mtime, 'saved_time': int(time.time())})
+    try:
+        meta = export_history()
+    except (OSError, ValueError) as e:
+        # Do not overwrite a history file we could not read
+        _warn("无法读取导出历史 %s，本次导出未记录: %s", EXPORT_METADATA, e)
+        instrument.record_error('export_meta', e)
+        return
+    path = os.path.join(EXPORT_DIR, fname)
+    try:
+        st = os.stat(path)
+        mtime, size, sha256 = int(st.st_mtime), st.st_size, _file_sha256(path)
+    except OSError:
+        mtime = size = sha256 = None
+    meta.append(dict({'name': fname, 'mtime': mtime, 'saved_time': int(time.time()),
+                      'bytes': size, 'sha256': sha256}, **fields))
     try:
         with open(EXPORT_METADATA, 'w', encoding='utf-8') as mf:
             json.dump(meta, mf, ensure_ascii=False, indent=2)
-    except Exception:
-        pass
+    except OSError as e:
+        _warn("写入导出历史 %s 失败: %s", EXPORT_METADATA, e)
+        instrument.record_error('export_meta', e)
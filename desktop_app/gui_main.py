@@ -1,29 +1,174 @@
 import sys
 import os
 from typing import List, Dict, Any
+
+# 最先导入 instrument：启动计时从这里开始，设置 SIMS_IMPORTTIME=1 时之后的每个导入都会计时
+try:
+    from . import instrument
+except Exception:
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+    from desktop_app import instrument
+
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-    QPushButton, QTableWidget, QTableWidgetItem, QMessageBox, QInputDialog,
+    QPushButton, QTableWidget, QTableWidgetItem, QTableView, QMessageBox, QInputDialog,
     QFileDialog, QLabel, QDialog, QLineEdit, QHeaderView, QFormLayout,
-    QSpinBox, QComboBox
+    QSpinBox, QComboBox, QProgressBar
 )
 from PySide6.QtGui import QIcon
-from PySide6.QtCore import Qt, QTimer
+from PySide6.QtCore import Qt, QTimer, QAbstractTableModel, QModelIndex
+instrument.mark('import_qt')
 
 try:
     from .core import (
-        load_students, save_students, calc_gpa,
+        load_store, save_store,
         export_students_csv, export_students_xlsx, STUDENT_FIELDS, STUDENT_LABELS,
-        import_scores, rank_students
+        import_scores, import_scores_batch, import_students, StudentStore, ImportCancelled, student_matches,
+        RankingIndex, SearchIndex, StatsEngine, STATS_BUCKET_LABELS, io_counts
     )
+    from .tasks import TaskRunner, TaskCancelled
 except Exception:
-    import os, sys
-    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
     from desktop_app.core import (
-        load_students, save_students, calc_gpa,
+        load_store, save_store,
         export_students_csv, export_students_xlsx, STUDENT_FIELDS, STUDENT_LABELS,
-        import_scores, rank_students
+        import_scores, import_scores_batch, import_students, StudentStore, ImportCancelled, student_matches,
+        RankingIndex, SearchIndex, StatsEngine, STATS_BUCKET_LABELS, io_counts
     )
+    from desktop_app.tasks import TaskRunner, TaskCancelled
+instrument.mark('import_app')
+
+# 学生导入方式（core.STUDENT_IMPORT_MODES）
+STUDENT_IMPORT_MODE_LABELS = {
+    'upsert': "新增并更新已有学生",
+    'insert': "只新增，跳过已有学号",
+    'replace': "用文件替换整个名单",
+}
+
+# 多选批量编辑时可修改的字段
+BULK_EDIT_FIELDS = ['gender', 'age', 'college', 'classnum', 'plcstatus', 'province']
+
+
+class StudentTableModel(QAbstractTableModel):
+    """学生表格模型：视图只按需读取可见行，单条修改只刷新对应行。
+
+    过滤时直接替换可见行列表（类似 QSortFilterProxyModel 的行映射），
+    不逐行回调 filterAcceptsRow，避免十万行时的 Python 调用开销；
+    匹配结果由 SearchIndex 给出，不再逐条扫描。
+    """
+
+    def __init__(self, store: StudentStore, parent=None):
+        super().__init__(parent)
+        self._headers = [STUDENT_LABELS.get(k, k) for k in STUDENT_FIELDS] + ['GPA']
+        self._store = None
+        self._search = None
+        self._rows: List[Dict[str, Any]] = []
+        self._row_of: Dict[str, int] = {}  # 学号 -> 行号，懒重建
+        self._filter = ''
+        self.set_store(store)
+
+    def set_store(self, store: StudentStore):
+        if self._store is not None:
+            self._store.unsubscribe(self._on_change)
+        if self._search is not None:
+            self._search.close()
+            self._search = None
+        self._store = store
+        store.subscribe(self._on_change)
+        self.set_filter(self._filter)
+
+    def set_filter(self, text: str):
+        self.beginResetModel()
+        self._filter = text
+        if text:
+            if self._search is None:
+                # 首次搜索时才建立索引，之后随 store 增量更新
+                self._search = SearchIndex(self._store)
+            get = self._store.get
+            self._rows = [get(sid) for sid in self._search.search(text)]
+        else:
+            self._rows = list(self._store.students)
+        self._row_of = {}
+        self.endResetModel()
+
+    def suspend_updates(self):
+        """后台线程修改 store 期间断开通知：模型信号只能在界面线程发出。"""
+        self._store.unsubscribe(self._on_change)
+
+    def resume_updates(self):
+        self._store.subscribe(self._on_change)
+        self.set_filter(self._filter)
+
+    def student_at(self, row: int) -> Dict[str, Any]:
+        return self._rows[row]
+
+    def sid_at(self, row: int) -> str:
+        return self._rows[row].get('id')
+
+    def total_count(self) -> int:
+        return len(self._store)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._headers)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self._headers[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.UserRole:
+            # 行的稳定标识：学号，由 store 的 学号->位置 映射 O(1) 找回记录
+            return self._rows[index.row()].get('id')
+        if role != Qt.DisplayRole:
+            return None
+        s = self._rows[index.row()]
+        col = index.column()
+        if col < len(STUDENT_FIELDS):
+            return str(s.get(STUDENT_FIELDS[col], ""))
+        # GPA 由 StudentStore 增量缓存，这里只做格式化
+        sid = s.get('id')
+        if self._store.get(sid) is None:
+            return None  # 记录已被删除或改了学号，等模型下次刷新
+        gpa = self._store.gpa(sid)
+        return "" if gpa is None else f"{gpa:.2f}"
+
+    def _row(self, sid) -> int:
+        if len(self._row_of) != len(self._rows):
+            self._row_of = {s.get('id'): i for i, s in enumerate(self._rows)}
+        return self._row_of.get(sid, -1)
+
+    def _on_change(self, op, sid, data):
+        if op == 'add':
+            s = self._store.get(sid)
+            if not self._filter or student_matches(s, self._filter):
+                n = len(self._rows)
+                self.beginInsertRows(QModelIndex(), n, n)
+                self._rows.append(s)
+                self._row_of[sid] = n
+                self.endInsertRows()
+            return
+        if op == 'del':
+            row = self._row(sid)
+            if row >= 0:
+                self.beginRemoveRows(QModelIndex(), row, row)
+                del self._rows[row]
+                self._row_of = {}
+                self.endRemoveRows()
+            return
+        row = self._row(sid)
+        if op == 'edit' and data['set'].get('id', sid) != sid:
+            # 学号改变：映射按新学号重建
+            if row < 0:
+                row = self._row(data['set']['id'])
+            self._row_of = {}
+        if row >= 0:
+            self.dataChanged.emit(self.index(row, 0), self.index(row, len(self._headers) - 1))
+
 
 class MainWindow(QMainWindow):
     def __init__(self):
@@ -37,24 +182,40 @@ class MainWindow(QMainWindow):
         # 创建搜索框
         self.search_box = QLineEdit()
         self.search_box.setPlaceholderText("🔍 搜索学号、姓名、学院...")
-        self.search_box.textChanged.connect(self.filter_table)
+        # 防抖：连续输入只在停顿后查询一次
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(150)
+        self.search_timer.timeout.connect(self.filter_table)
+        self._search_pending = False
+        self.search_box.textChanged.connect(self.search_timer.start)
         self.search_box.setMaximumWidth(300)
 
-        # 创建表格
-        self.table = QTableWidget()
-        self.table.setColumnCount(len(STUDENT_FIELDS) + 1)
-        headers = [STUDENT_LABELS.get(k, k) for k in STUDENT_FIELDS] + ['GPA']
-        self.table.setHorizontalHeaderLabels(headers)
-        self.table.setSelectionBehavior(QTableWidget.SelectRows)
-        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        # 创建表格（模型/视图，只渲染可见行）
+        self.store = StudentStore()
+        self.students = self.store.students
+        self.rankings = {}
+        self.stats_engine = None
+        self.model = StudentTableModel(self.store, self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setSelectionBehavior(QTableView.SelectRows)
+        self.table.setSelectionMode(QTableView.ExtendedSelection)  # Ctrl/Shift 多选，批量编辑/删除
+        self.table.setEditTriggers(QTableView.NoEditTriggers)
         self.table.setAlternatingRowColors(True)  # 启用斑马纹
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+
+        # 后台加载数据期间代替表格显示
+        self.placeholder = QLabel("⏳ 正在加载学生数据...")
+        self.placeholder.setObjectName("placeholder_label")
+        self.placeholder.setAlignment(Qt.AlignCenter)
+        self.placeholder.setVisible(False)
 
-        # 设置表格列宽自适应
+        # 列宽按内容抽样计算一次，不随每次刷新扫描全部行
         header = self.table.horizontalHeader()
         header.setSectionResizeMode(QHeaderView.Interactive)
         header.setStretchLastSection(True)
-        for i in range(len(STUDENT_FIELDS)):
-            header.setSectionResizeMode(i, QHeaderView.ResizeToContents)
+        header.setResizeContentsPrecision(200)
 
         # 创建按钮
         self.btn_reload = QPushButton("🔄 刷新")
@@ -66,11 +227,11 @@ class MainWindow(QMainWindow):
         self.btn_add.setToolTip("添加新学生")
 
         self.btn_edit = QPushButton("✏️ 编辑")
-        self.btn_edit.setToolTip("编辑选中的学生信息")
+        self.btn_edit.setToolTip("编辑选中的学生信息（多选时批量修改同一字段）")
 
         self.btn_delete = QPushButton("🗑️ 删除")
         self.btn_delete.setObjectName("btn_delete")
-        self.btn_delete.setToolTip("删除选中的学生")
+        self.btn_delete.setToolTip("删除选中的学生（可多选）")
 
         self.btn_save = QPushButton("💾 保存")
         self.btn_save.setObjectName("btn_save")
@@ -88,16 +249,32 @@ class MainWindow(QMainWindow):
         self.btn_manage_scores.setToolTip("管理选中学生的课程成绩")
 
         self.btn_import_scores = QPushButton("📥 导入成绩")
-        self.btn_import_scores.setToolTip("从CSV文件导入成绩")
+        self.btn_import_scores.setToolTip("从CSV文件导入成绩（可多选，多个文件并行解析）")
+
+        self.btn_import_students = QPushButton("👥 导入学生")
+        self.btn_import_students.setToolTip("从CSV/XLSX/文本文件批量导入学生信息")
 
         self.btn_show_rank = QPushButton("🏆 成绩排名")
         self.btn_show_rank.setToolTip("查看学生成绩排名")
+        self.btn_show_stats = QPushButton("📊 统计分析")
+        self.btn_show_stats.setToolTip("按学院、班级、生源省份或课程统计成绩分布")
 
         # 状态标签
         self.status_label = QLabel("就绪")
         self.status_label.setObjectName("status_label")
         self.status_label.setTextInteractionFlags(Qt.TextSelectableByMouse)
 
+        # 后台任务进度与取消
+        self.tasks = TaskRunner(self)
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setMaximumWidth(240)
+        self.progress_bar.setVisible(False)
+        self.btn_cancel_task = QPushButton("⏹ 取消")
+        self.btn_cancel_task.setToolTip("取消正在运行的后台任务")
+        self.btn_cancel_task.setVisible(False)
+        self.btn_diagnostics = QPushButton("📈 性能")
+        self.btn_diagnostics.setToolTip("查看各操作的耗时统计（设置 SIMS_PROFILE=1 启动即记录）")
+
         # 布局
         top = QWidget()
         v = QVBoxLayout(top)
@@ -114,17 +291,25 @@ class MainWindow(QMainWindow):
         toolbar.addWidget(self.btn_edit)
         toolbar.addWidget(self.btn_delete)
         toolbar.addWidget(self.btn_save)
+        toolbar.addWidget(self.btn_import_students)
         toolbar.addSpacing(10)
         toolbar.addWidget(self.btn_manage_scores)
         toolbar.addWidget(self.btn_import_scores)
         toolbar.addWidget(self.btn_show_rank)
+        toolbar.addWidget(self.btn_show_stats)
         toolbar.addStretch(1)
         toolbar.addWidget(self.btn_export_csv)
         toolbar.addWidget(self.btn_export_xlsx)
 
         v.addLayout(toolbar)
         v.addWidget(self.table)
-        v.addWidget(self.status_label)
+        v.addWidget(self.placeholder, 1)
+        status_bar = QHBoxLayout()
+        status_bar.addWidget(self.status_label, 1)
+        status_bar.addWidget(self.progress_bar)
+        status_bar.addWidget(self.btn_cancel_task)
+        status_bar.addWidget(self.btn_diagnostics)
+        v.addLayout(status_bar)
         self.setCentralWidget(top)
 
         # 连接信号
@@ -137,11 +322,28 @@ class MainWindow(QMainWindow):
         self.btn_export_xlsx.clicked.connect(self.do_export_xlsx)
         self.btn_manage_scores.clicked.connect(self.manage_scores)
         self.btn_import_scores.clicked.connect(self.do_import_scores)
+        self.btn_import_students.clicked.connect(self.do_import_students)
         self.btn_show_rank.clicked.connect(self.show_rank)
-
-        self.students = []
-        self.filtered_students = []  # 用于搜索过滤
-        self.reload()
+        self.btn_show_stats.clicked.connect(self.show_stats)
+        self.btn_cancel_task.clicked.connect(self.tasks.cancel)
+        self.btn_diagnostics.clicked.connect(lambda: DiagnosticsDialog(self).exec())
+        self.tasks.busy_changed.connect(self.set_busy)
+        self.tasks.progress.connect(self.on_task_progress)
+
+        # 每个用户操作触发的整表读取/写入次数，见 begin_action/end_action
+        self.io_log: List[Dict[str, Any]] = []
+        self._action = None
+
+        # 后台任务运行期间禁用会读写数据的操作，避免与任务并发修改 store
+        self.task_buttons = [
+            self.btn_reload, self.btn_add, self.btn_edit, self.btn_delete, self.btn_save,
+            self.btn_manage_scores, self.btn_import_scores, self.btn_import_students, self.btn_show_rank,
+            self.btn_show_stats, self.btn_export_csv, self.btn_export_xlsx,
+        ]
+
+        # 数据在事件循环开始后于后台加载，窗口先显示出来
+        self._starting = True
+        QTimer.singleShot(0, self.reload)
 
     def load_stylesheet(self):
         """加载QSS样式表"""
@@ -153,22 +355,11 @@ class MainWindow(QMainWindow):
         except Exception as e:
             print(f"加载样式表失败: {e}")
 
+    @instrument.timed('gui.filter_table')
     def filter_table(self):
         """根据搜索框内容过滤表格"""
-        search_text = self.search_box.text().lower()
-
-        if not search_text:
-            self.filtered_students = self.students.copy()
-        else:
-            self.filtered_students = [
-                s for s in self.students
-                if search_text in str(s.get('id', '')).lower()
-                or search_text in str(s.get('name', '')).lower()
-                or search_text in str(s.get('college', '')).lower()
-                or search_text in str(s.get('classnum', '')).lower()
-            ]
-
-        self.refresh_table()
+        self.model.set_filter(self.search_box.text())
+        self.update_count_status()
 
     def set_status(self, text: str, status_type: str = "info"):
         """设置状态栏文本，支持不同状态类型的图标"""
@@ -181,52 +372,167 @@ class MainWindow(QMainWindow):
         icon = icons.get(status_type, "ℹ️")
         self.status_label.setText(f"{icon} {text}")
 
-    def reload(self):
-        try:
-            self.students = load_students()
-            self.filtered_students = self.students.copy()
-            self.refresh_table()
-            self.set_status("数据加载成功", "success")
-        except Exception as e:
-            QMessageBox.critical(self, "错误", f"加载数据失败:\n{e}")
-            self.set_status("数据加载失败", "error")
+    def closeEvent(self, event):
+        # 等待正在保存/导出的任务结束，避免写到一半的文件
+        if self.tasks.is_busy():
+            self.tasks.cancel()
+            self.tasks.wait()
+        super().closeEvent(event)
+
+    def set_busy(self, busy: bool):
+        for b in self.task_buttons:
+            b.setEnabled(not busy)
+        # 过滤会在主线程遍历 store，后台任务（导入、重新加载）运行时不能同时进行
+        self.search_box.setEnabled(not busy)
+        if busy:
+            self._search_pending = self.search_timer.isActive()
+            self.search_timer.stop()
+        elif self._search_pending:
+            self._search_pending = False
+            self.search_timer.start()
+        self.progress_bar.setVisible(busy)
+        self.btn_cancel_task.setVisible(busy)
+        if busy:
+            self.progress_bar.setRange(0, 0)  # 收到第一次进度前显示忙碌动画
+
+    def begin_action(self, name: str):
+        self._action = (name, io_counts())
+
+    def end_action(self):
+        if self._action is None:
+            return
+        name, before = self._action
+        after = io_counts()
+        entry = {'action': name, 'load': after['load'] - before['load'], 'save': after['save'] - before['save']}
+        self.io_log.append(entry)
+        self._action = None
+        self.status_label.setToolTip(f"{name}: 读取数据 {entry['load']} 次，写入数据 {entry['save']} 次")
+
+    def run_task(self, name: str, label: str, fn, on_done, on_error=None,
+                 with_progress: bool = True, cancellable: bool = True) -> bool:
+        """在后台线程运行 fn，完成后在界面线程调用 on_done(result)。"""
+        def done(result):
+            self.end_action()
+            on_done(result)
+
+        def failed(e):
+            self.end_action()
+            if on_error is not None:
+                on_error(e)
+            if isinstance(e, (TaskCancelled, ImportCancelled)):
+                self.set_status(f"{label}已取消", "warning")
+            else:
+                QMessageBox.critical(self, "错误", f"{label}失败:\n{e}")
+                self.set_status(f"{label}失败", "error")
+
+        if self.tasks.is_busy():
+            self.set_status("后台任务进行中，请稍候", "warning")
+            return False
+        self.begin_action(name)
+        self.tasks.submit(name, fn, done, failed, with_progress)
+        self.btn_cancel_task.setEnabled(cancellable)
+        self.set_status(f"正在{label}...", "info")
+        return True
+
+    def on_task_progress(self, name: str, info: dict):
+        if 'students_read' in info:
+            # 学生导入：文本按已读字节、XLSX 按行数估算进度
+            if info.get('bytes_total'):
+                self.progress_bar.setRange(0, 1000)
+                self.progress_bar.setValue(int(info['bytes_read'] * 1000 / info['bytes_total']))
+            elif info.get('rows_total'):
+                self.progress_bar.setRange(0, info['rows_total'])
+                self.progress_bar.setValue(info['students_read'])
+            self.set_status(f"正在读取学生文件: 已读取 {info['students_read']} 名学生", "info")
+        elif info.get('bytes_total'):
+            # 成绩导入：按已读字节估算进度
+            self.progress_bar.setRange(0, 1000)
+            self.progress_bar.setValue(int(info['bytes_read'] * 1000 / info['bytes_total']))
+            self.set_status(f"正在导入成绩: 已读取 {info['total']} 行 ({info['rows_per_sec']:.0f} 行/秒)", "info")
+        elif info.get('files_total'):
+            # 批量导入：按已解析的文件数显示进度
+            self.progress_bar.setRange(0, info['files_total'])
+            self.progress_bar.setValue(info['files_done'])
+            self.set_status(f"正在解析成绩文件: {info['files_done']}/{info['files_total']} ({info['total']} 行)", "info")
+        elif info.get('total'):
+            self.progress_bar.setRange(0, info['total'])
+            self.progress_bar.setValue(info['rows'])
+            self.set_status(f"正在导出: {info['rows']}/{info['total']} 行", "info")
 
+    def reload(self):
+        """在后台线程读取数据文件，期间表格位置显示占位提示，窗口保持响应。"""
+        def done(store):
+            self.set_store(store)
+            if store.duplicates:
+                ids = sorted({str(d.get('id')) for d in store.duplicates})
+                self.set_status(f"数据加载成功，{len(store.duplicates)} 条学号重复的记录未显示", "warning")
+                QMessageBox.warning(
+                    self, "学号重复",
+                    f"数据文件中有 {len(store.duplicates)} 条记录与前面的学号重复，未载入名单：\n"
+                    f"{', '.join(ids[:20])}{' …' if len(ids) > 20 else ''}\n\n"
+                    "这些记录保存时会原样保留在数据文件中。请用“python -m desktop_app validate”检查后修正数据文件。")
+            else:
+                self.set_status("数据加载成功", "success")
+            self.loading_finished()
+
+        def failed(e):
+            self.loading_finished()
+
+        if self.run_task('reload', "加载数据", load_store, done, failed,
+                         with_progress=False, cancellable=False):
+            self.table.setVisible(False)
+            self.placeholder.setVisible(True)
+
+    def loading_finished(self):
+        self.placeholder.setVisible(False)
+        self.table.setVisible(True)
+        if self._starting:
+            self._starting = False
+            instrument.mark('data_loaded')
+            instrument.startup_done()
+
+    def set_store(self, store: StudentStore):
+        self.store = store
+        self.students = self.store.students
+        for idx in self.rankings.values():
+            idx.close()
+        self.rankings = {}
+        if self.stats_engine is not None:
+            self.stats_engine.close()
+            self.stats_engine = None
+        self.model.set_store(self.store)
+        self.table.resizeColumnsToContents()
+        self.update_count_status()
+
+    @instrument.timed('gui.refresh_table')
     def refresh_table(self):
-        self.table.setRowCount(0)
-        display_students = self.filtered_students if hasattr(self, 'filtered_students') else self.students
-
-        for s in display_students:
-            row = self.table.rowCount()
-            self.table.insertRow(row)
-            for col, key in enumerate(STUDENT_FIELDS):
-                item = QTableWidgetItem(str(s.get(key, "")))
-                self.table.setItem(row, col, item)
-            gpa = calc_gpa(s.get('courses', []))
-            self.table.setItem(row, len(STUDENT_FIELDS), QTableWidgetItem("" if gpa is None else f"{gpa:.2f}"))
+        self.model.set_filter(self.search_box.text())
+        self.update_count_status()
 
+    def update_count_status(self):
         # 更新状态栏显示总数和过滤数
-        total = len(self.students)
-        shown = len(display_students)
+        total = self.model.total_count()
+        shown = self.model.rowCount()
         if shown < total:
             self.set_status(f"显示 {shown}/{total} 条记录", "info")
         else:
             self.set_status(f"共 {total} 条记录", "info")
 
+    def selected_ids(self) -> List[str]:
+        """选中行的学号（按行号排序），取自每行的 Qt.UserRole 数据。"""
+        rows = self.table.selectionModel().selectedRows()
+        return [i.data(Qt.UserRole) for i in sorted(rows, key=lambda i: i.row())]
+
     def get_selected_index(self):
-        rows = sorted(set(i.row() for i in self.table.selectedIndexes()))
-        if not rows:
-            return None
-        # 返回在原始students列表中的索引
-        if rows[0] < len(self.filtered_students):
-            selected_student = self.filtered_students[rows[0]]
-            return self.students.index(selected_student)
-        return None
+        # 返回第一行选中记录在原始students列表中的索引（store 维护 学号->位置，O(1)）
+        ids = self.selected_ids()
+        return self.store.index_of(ids[0]) if ids else None
 
     def add_student(self):
         sid, ok = QInputDialog.getText(self, "添加学生", "学号:")
         if not ok or not sid:
             return
-        if any(s.get('id') == sid for s in self.students):
+        if sid in self.store:
             QMessageBox.warning(self, "提示", "学号已存在")
             return
         name, ok = QInputDialog.getText(self, "添加学生", "姓名:")
@@ -238,124 +544,267 @@ class MainWindow(QMainWindow):
         s['gender'] = ""
         s['age'] = ""
         s['courses'] = []
-        self.students.append(s)
-        self.filtered_students = self.students.copy()
-        self.refresh_table()
+        self.store.add(s)
         self.set_status(f"已添加学生 {name}，请记得保存", "warning")
 
     def edit_student(self):
-        idx = self.get_selected_index()
-        if idx is None:
+        ids = self.selected_ids()
+        if not ids:
             QMessageBox.information(self, "提示", "请先选择一行")
             return
-        s = self.students[idx]
+        if len(ids) > 1:
+            self.bulk_edit_students(ids)
+            return
+        s = self.store.get(ids[0])
+        changes = {}
         for field in ['name', 'gender', 'age', 'college', 'classnum', 'plcstatus', 'phone', 'province', 'parphone']:
             current = str(s.get(field, ""))
             prompt = f"{STUDENT_LABELS.get(field, field)}:"
             val, ok = QInputDialog.getText(self, "编辑信息", prompt, text=current)
             if ok:
-                s[field] = val
-        self.refresh_table()
+                if field == 'age':
+                    try:
+                        val = int(val) if val.strip() != '' else ''
+                    except ValueError:
+                        pass
+                changes[field] = val
+        self.store.update(s.get('id'), changes)
         self.set_status(f"已编辑学生 {s.get('name', '')}，请记得保存", "warning")
 
+    def bulk_edit_students(self, ids: List[str]):
+        """多选时批量修改同一字段（学号、姓名、电话等逐人不同的字段除外）。"""
+        labels = [STUDENT_LABELS.get(f, f) for f in BULK_EDIT_FIELDS]
+        label, ok = QInputDialog.getItem(self, "批量编辑", f"为选中的 {len(ids)} 名学生修改:", labels, 0, False)
+        if not ok:
+            return
+        field = BULK_EDIT_FIELDS[labels.index(label)]
+        val, ok = QInputDialog.getText(self, "批量编辑", f"{label}:")
+        if not ok:
+            return
+        if field == 'age':
+            try:
+                val = int(val) if val.strip() != '' else ''
+            except ValueError:
+                pass
+        self.model.suspend_updates()
+        try:
+            n = self.store.update_many(ids, {field: val})
+        finally:
+            self.model.resume_updates()
+        self.set_status(f"已修改 {n} 名学生的{label}，请记得保存", "warning")
+
     def delete_student(self):
-        idx = self.get_selected_index()
-        if idx is None:
+        ids = self.selected_ids()
+        if not ids:
             QMessageBox.information(self, "提示", "请先选择一行")
             return
-        sid = self.students[idx].get('id', '')
-        sname = self.students[idx].get('name', '')
-        if QMessageBox.question(self, "确认删除", f"确定删除学号 {sid} ({sname}) 吗？") == QMessageBox.Yes:
-            self.students.pop(idx)
-            self.filtered_students = self.students.copy()
-            self.refresh_table()
-            self.set_status(f"已删除学生 {sname}，请记得保存", "warning")
+        if len(ids) == 1:
+            sname = self.store.get(ids[0]).get('name', '')
+            if QMessageBox.question(self, "确认删除", f"确定删除学号 {ids[0]} ({sname}) 吗？") == QMessageBox.Yes:
+                self.store.remove(ids[0])
+                self.set_status(f"已删除学生 {sname}，请记得保存", "warning")
+            return
+        if QMessageBox.question(self, "确认删除", f"确定删除选中的 {len(ids)} 名学生吗？") != QMessageBox.Yes:
+            return
+        # 批量删除只遍历一次名单；期间断开表格通知，结束后整体刷新一次
+        self.model.suspend_updates()
+        try:
+            self.store.remove_many(ids)
+        finally:
+            self.model.resume_updates()
+        self.update_count_status()
+        self.set_status(f"已删除 {len(ids)} 名学生，请记得保存", "warning")
 
     def save_changes(self):
+        store = self.store
+        self.run_task('save', "保存", lambda: save_store(store),
+                      lambda _: self.set_status("数据保存成功", "success"),
+                      with_progress=False, cancellable=False)
+
+    def export_where(self):
+        """询问是否只导出当前搜索结果；返回过滤函数或 None。"""
+        text = self.search_box.text()
+        if text and QMessageBox.question(self, "导出范围", f"仅导出当前搜索结果（{self.model.rowCount()} 条）？") == QMessageBox.Yes:
+            return lambda s: student_matches(s, text)
+        return None
+
+    @staticmethod
+    def remove_partial(path: str):
+        # 取消或失败的导出会留下不完整的文件
         try:
-            for s in self.students:
-                try:
-                    s['age'] = int(s['age']) if str(s.get('age', '')).strip() != '' else ''
-                except Exception:
-                    pass
-            save_students(self.students)
-            self.set_status("数据保存成功", "success")
-        except Exception as e:
-            QMessageBox.critical(self, "错误", f"保存失败:\n{e}")
-            self.set_status("保存失败", "error")
+            os.remove(path)
+        except OSError:
+            pass
 
     def do_export_csv(self):
-        try:
-            path, _ = QFileDialog.getSaveFileName(self, "导出为 CSV", "", "CSV 文件 (*.csv);;所有文件 (*.*)")
-            if not path:
-                return
-            if not path.lower().endswith('.csv'):
-                path = path + '.csv'
-            fpath = export_students_csv(path)
-            self.set_status(f"CSV 已导出至: {os.path.basename(fpath)}", "success")
-        except Exception as e:
-            QMessageBox.critical(self, "错误", f"导出失败:\n{e}")
-            self.set_status("CSV 导出失败", "error")
+        path, _ = QFileDialog.getSaveFileName(self, "导出为 CSV", "", "CSV 文件 (*.csv);;所有文件 (*.*)")
+        if not path:
+            return
+        if not path.lower().endswith('.csv'):
+            path = path + '.csv'
+        where = self.export_where()
+        store = self.store
+        self.run_task('export_csv', "CSV 导出",
+                      lambda progress: export_students_csv(path, where=where, progress=progress, store=store),
+                      lambda fpath: self.set_status(f"CSV 已导出至: {os.path.basename(fpath)}", "success"),
+                      lambda e: self.remove_partial(path))
 
     def do_export_xlsx(self):
-        try:
-            path, _ = QFileDialog.getSaveFileName(self, "导出为 XLSX", "", "Excel 工作簿 (*.xlsx);;所有文件 (*.*)")
-            if not path:
-                return
-            if not path.lower().endswith('.xlsx'):
-                path = path + '.xlsx'
-            fpath = export_students_xlsx(path)
-            self.set_status(f"XLSX 已导出至: {os.path.basename(fpath)}", "success")
-        except Exception as e:
-            QMessageBox.critical(self, "错误", f"导出失败:\n{e}")
-            self.set_status("XLSX 导出失败", "error")
+        path, _ = QFileDialog.getSaveFileName(self, "导出为 XLSX", "", "Excel 工作簿 (*.xlsx);;所有文件 (*.*)")
+        if not path:
+            return
+        if not path.lower().endswith('.xlsx'):
+            path = path + '.xlsx'
+        where = self.export_where()
+        store = self.store
+        with_scores = QMessageBox.question(self, "成绩明细", "是否附加“Scores”成绩明细工作表？") == QMessageBox.Yes
+        self.run_task('export_xlsx', "XLSX 导出",
+                      lambda progress: export_students_xlsx(path, scores_sheet=with_scores, where=where,
+                                                           progress=progress, store=store),
+                      lambda fpath: self.set_status(f"XLSX 已导出至: {os.path.basename(fpath)}", "success"),
+                      lambda e: self.remove_partial(path))
 
     def manage_scores(self):
-        idx = self.get_selected_index()
-        if idx is None:
+        ids = self.selected_ids()
+        if not ids:
             QMessageBox.information(self, "提示", "请先选择一行")
             return
-        s = self.students[idx]
-        dlg = ScoresDialog(self, s)
+        s = self.store.get(ids[0])
+        dlg = ScoresDialog(self, self.store, s)
         if dlg.exec() == QDialog.Accepted:
-            self.refresh_table()
             self.set_status(f"已修改 {s.get('name', '')} 的成绩，请记得保存", "warning")
 
     def do_import_scores(self):
-        path, _ = QFileDialog.getOpenFileName(self, "选择成绩文件", "", "CSV/TXT (*.csv *.txt);;All (*.*)")
+        paths, _ = QFileDialog.getOpenFileNames(self, "选择成绩文件（可多选）", "", "CSV/TXT (*.csv *.txt);;All (*.*)")
+        if not paths:
+            return
+
+        store = self.store
+
+        def done(result):
+            self.model.resume_updates()
+            if isinstance(result, dict):
+                # 多个文件：逐个列出，并汇总
+                lines = [f"{os.path.basename(p)}: 读取 {t}，应用 {a}，跳过 {k}" for p, (t, a, k) in result.items()]
+                total, applied, skipped = (sum(v[i] for v in result.values()) for i in range(3))
+                lines.append(f"合计: 读取 {total}，应用 {applied}，跳过 {skipped}")
+                lines.append("同一学号同一课程出现多次时，以最后选中的文件、文件内最后一行为准")
+                QMessageBox.information(self, "导入完成", "\n".join(lines))
+            else:
+                total, applied, skipped = result
+                QMessageBox.information(self, "导入完成", f"读取: {total}\n应用: {applied}\n跳过: {skipped}")
+            self.set_status(f"成绩导入完成: {applied}/{total}，请记得保存", "warning")
+
+        def failed(e):
+            self.model.resume_updates()
+            if isinstance(e, (TaskCancelled, ImportCancelled)):
+                if len(paths) > 1:
+                    QMessageBox.information(self, "导入已取消", "批量导入在合并前取消，没有修改任何成绩。")
+                else:
+                    QMessageBox.information(self, "导入已取消", "已导入的部分成绩保留在内存中，尚未保存；\n如需放弃请点击“刷新”重新加载。")
+
+        # 直接导入到内存中的 store，不读写文件；保存由用户显式触发
+        self.model.suspend_updates()
+        if len(paths) == 1:
+            path = paths[0]
+            fn = lambda progress: import_scores(path, progress=progress, store=store)
+        else:
+            # 多个文件在子进程中并行解析，再一次性合并进 store
+            fn = lambda progress: import_scores_batch(paths, progress=progress, store=store)
+        if not self.run_task('import', "成绩导入", fn, done, failed):
+            self.model.resume_updates()
+
+    def do_import_students(self):
+        path, _ = QFileDialog.getOpenFileName(self, "选择学生文件", "",
+                                              "学生文件 (*.csv *.xlsx *.txt);;All (*.*)")
         if not path:
             return
-        try:
-            total, applied, skipped = import_scores(path)
-            self.reload()
-            QMessageBox.information(self, "导入完成", f"读取: {total}\n应用: {applied}\n跳过: {skipped}")
-            self.set_status(f"成绩导入完成: {applied}/{total}", "success")
-        except Exception as e:
-            QMessageBox.critical(self, "错误", f"导入失败:\n{e}")
-            self.set_status("成绩导入失败", "error")
+        labels = list(STUDENT_IMPORT_MODE_LABELS.values())
+        label, ok = QInputDialog.getItem(self, "导入方式", "已存在的学号如何处理:", labels, 0, False)
+        if not ok:
+            return
+        mode = list(STUDENT_IMPORT_MODE_LABELS)[labels.index(label)]
+        if mode == 'replace' and QMessageBox.question(
+                self, "确认替换", "文件中没有的学生将从名单中删除，确定继续吗？") != QMessageBox.Yes:
+            return
+        store = self.store
+
+        def done(r):
+            self.model.resume_updates()
+            self.update_count_status()
+            lines = [f"读取: {r['total']}", f"新增: {r['added']}", f"更新: {r['updated']}",
+                     f"未变: {r['unchanged']}", f"删除: {r['removed']}", f"跳过: {r['skipped']}"]
+            if r['errors']:
+                lines.append("")
+                lines.extend(f"第 {n} 行: {msg}" for n, msg in r['errors'][:20])
+                if len(r['errors']) > 20:
+                    lines.append(f"…… 另有 {len(r['errors']) - 20} 条问题")
+            QMessageBox.information(self, "导入完成", "\n".join(lines))
+            self.set_status(f"学生导入完成: 新增 {r['added']}，更新 {r['updated']}，请记得保存", "warning")
+
+        def failed(e):
+            self.model.resume_updates()
+
+        # 先完整解析校验，再一次性写入内存中的 store；取消时名单不变
+        self.model.suspend_updates()
+        fn = lambda progress: import_students(path, mode, progress=progress, store=store)
+        if not self.run_task('import_students', "学生导入", fn, done, failed):
+            self.model.resume_updates()
+
+    def ranking_index(self, group_by=None) -> RankingIndex:
+        # 排名索引按需创建，之后随 store 的修改增量更新
+        idx = self.rankings.get(group_by)
+        if idx is None:
+            idx = self.rankings[group_by] = RankingIndex(self.store, group_by)
+        return idx
 
     def show_rank(self):
+        if None in self.rankings:
+            self.open_rank_dialog()
+            return
+        store = self.store
+
+        def done(idx):
+            if store is self.store:
+                self.rankings[None] = idx
+                self.open_rank_dialog()
+            else:
+                idx.close()
+
+        # 首次建立全体排名索引需要排序全部学生，放到后台线程
+        self.run_task('rank', "排名", lambda: RankingIndex(store), done,
+                      with_progress=False, cancellable=False)
+
+    def open_rank_dialog(self):
         try:
-            try:
-                for s in self.students:
-                    try:
-                        s['age'] = int(s['age']) if str(s.get('age', '')).strip() != '' else ''
-                    except Exception:
-                        pass
-                save_students(self.students)
-            except Exception:
-                pass
-            ranks = rank_students()
-            dlg = RankDialog(self, ranks)
+            dlg = RankDialog(self, self.ranking_index)
             dlg.exec()
         except Exception as e:
             QMessageBox.critical(self, "错误", f"排名失败:\n{e}")
 
+    def show_stats(self):
+        # 统计引擎只建立一次，之后随 store 的修改增量更新，再次打开只读取缓存的汇总值
+        if self.stats_engine is not None:
+            StatsDialog(self, self.stats_engine).exec()
+            return
+        store = self.store
+
+        def done(engine):
+            if store is self.store:
+                self.stats_engine = engine
+                StatsDialog(self, engine).exec()
+            else:
+                engine.close()
+
+        self.run_task('stats', "统计", lambda: StatsEngine(store), done,
+                      with_progress=False, cancellable=False)
+
 class ScoresDialog(QDialog):
-    def __init__(self, parent, student: dict):
+    def __init__(self, parent, store: StudentStore, student: dict):
         super().__init__(parent)
         self.setWindowTitle(f"📝 管理成绩 - {student.get('name','')} ({student.get('id','')})")
         self.setMinimumSize(600, 400)
+        self.store = store
         self.student = student
 
         # 创建表格
@@ -443,13 +892,7 @@ class ScoresDialog(QDialog):
         except Exception:
             QMessageBox.warning(self, "提示", "学分/成绩必须为数字")
             return
-        courses = self.student.setdefault('courses', [])
-        for c in courses:
-            if c.get('name') == cname:
-                c['credit'] = credit
-                c['score'] = score
-                self.refresh(); return
-        courses.append({'name': cname, 'credit': credit, 'score': score})
+        self.store.set_score(self.student.get('id'), cname, credit, score)
         self.refresh()
 
     def edit_course(self):
@@ -474,9 +917,7 @@ class ScoresDialog(QDialog):
         except Exception:
             QMessageBox.warning(self, "提示", "学分/成绩必须为数字")
             return
-        c['name'] = cname
-        c['credit'] = credit
-        c['score'] = score
+        self.store.rename_course(self.student.get('id'), c.get('name'), cname, credit, score)
         self.refresh()
 
     def delete_course(self):
@@ -485,54 +926,103 @@ class ScoresDialog(QDialog):
             QMessageBox.information(self, "提示", "请选择一行课程")
             return
         courses = self.student.setdefault('courses', [])
-        del courses[row]
+        self.store.remove_course(self.student.get('id'), courses[row].get('name'))
         self.refresh()
 
+class RankTableModel(QAbstractTableModel):
+    """排名表格模型：按行向 RankingIndex 取数据，不一次性生成整个排名列表。"""
+
+    MEDALS = {1: "🥇 1", 2: "🥈 2", 3: "🥉 3"}
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._headers = ["排名", "学号", "姓名", "GPA"]
+        self._index = None
+        self._group = None
+        self._method = 'ordinal'
+
+    def set_source(self, index: RankingIndex, group, method: str):
+        self.beginResetModel()
+        self._index = index
+        self._group = group
+        self._method = method
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid() or self._index is None:
+            return 0
+        return self._index.size(self._group)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._headers)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self._headers[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid():
+            return None
+        r = self._index.entry(index.row(), self._group, self._method)
+        col = index.column()
+        if col == 0:
+            # 为前三名添加特殊标记
+            return self.MEDALS.get(r['rank'], str(r['rank']))
+        if col == 1:
+            return str(r.get('id', ''))
+        if col == 2:
+            return str(r.get('name', ''))
+        g = r.get('gpa', None)
+        return "" if g is None else f"{g:.2f}"
+
+
 class RankDialog(QDialog):
-    def __init__(self, parent, ranks: list[dict]):
+    SCOPES = [("全部学生", None), ("按学院", 'college'), ("按班级", 'classnum')]
+    METHODS = [("顺序排名", 'ordinal'), ("并列排名 (1,2,2,4)", 'competition'), ("密集排名 (1,2,2,3)", 'dense')]
+
+    def __init__(self, parent, get_index):
         super().__init__(parent)
         self.setWindowTitle("🏆 学生成绩排名")
         self.setMinimumSize(700, 500)
+        self.get_index = get_index
+
+        # 排名范围与方式
+        self.scope_box = QComboBox()
+        for label, key in self.SCOPES:
+            self.scope_box.addItem(label, key)
+        self.group_box = QComboBox()
+        self.group_box.setMinimumWidth(160)
+        self.method_box = QComboBox()
+        for label, key in self.METHODS:
+            self.method_box.addItem(label, key)
 
         # 创建表格
-        table = QTableWidget()
-        table.setColumnCount(4)
-        table.setHorizontalHeaderLabels(["排名", "学号", "姓名", "GPA"])
-        table.setRowCount(0)
+        self.model = RankTableModel(self)
+        table = QTableView()
+        table.setModel(self.model)
         table.setAlternatingRowColors(True)
-        table.setSelectionBehavior(QTableWidget.SelectRows)
-        table.setEditTriggers(QTableWidget.NoEditTriggers)
+        table.setSelectionBehavior(QTableView.SelectRows)
+        table.setEditTriggers(QTableView.NoEditTriggers)
+        table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
 
         # 设置列宽
         header = table.horizontalHeader()
-        header.setSectionResizeMode(0, QHeaderView.ResizeToContents)
-        header.setSectionResizeMode(1, QHeaderView.ResizeToContents)
+        header.setSectionResizeMode(0, QHeaderView.Interactive)
+        header.setSectionResizeMode(1, QHeaderView.Interactive)
         header.setSectionResizeMode(2, QHeaderView.Stretch)
-        header.setSectionResizeMode(3, QHeaderView.ResizeToContents)
-
-        # 填充数据
-        for r in ranks:
-            row = table.rowCount()
-            table.insertRow(row)
-            rank_item = QTableWidgetItem(str(r.get('rank', '')))
-            # 为前三名添加特殊标记
-            rank_val = r.get('rank', 999)
-            if rank_val == 1:
-                rank_item.setText("🥇 1")
-            elif rank_val == 2:
-                rank_item.setText("🥈 2")
-            elif rank_val == 3:
-                rank_item.setText("🥉 3")
-
-            table.setItem(row, 0, rank_item)
-            table.setItem(row, 1, QTableWidgetItem(str(r.get('id', ''))))
-            table.setItem(row, 2, QTableWidgetItem(str(r.get('name', ''))))
-            g = r.get('gpa', None)
-            table.setItem(row, 3, QTableWidgetItem("" if g is None else f"{g:.2f}"))
+        header.setSectionResizeMode(3, QHeaderView.Interactive)
+        header.resizeSection(1, 140)
 
         # 布局
         lay = QVBoxLayout(self)
         lay.setContentsMargins(12, 12, 12, 12)
+        opts = QHBoxLayout()
+        opts.addWidget(self.scope_box)
+        opts.addWidget(self.group_box)
+        opts.addWidget(self.method_box)
+        opts.addStretch(1)
+        lay.addLayout(opts)
         lay.addWidget(table)
 
         # 关闭按钮
@@ -543,7 +1033,200 @@ class RankDialog(QDialog):
         btn_layout.addWidget(close_btn)
         lay.addLayout(btn_layout)
 
+        self.scope_box.currentIndexChanged.connect(self.on_scope_changed)
+        self.group_box.currentIndexChanged.connect(self.refresh)
+        self.method_box.currentIndexChanged.connect(self.refresh)
+        self.on_scope_changed()
+
+    def on_scope_changed(self):
+        group_by = self.scope_box.currentData()
+        self.group_box.blockSignals(True)
+        self.group_box.clear()
+        if group_by is not None:
+            for g in self.get_index(group_by).groups():
+                self.group_box.addItem(str(g) or "(未填写)", g)
+        self.group_box.setVisible(group_by is not None)
+        self.group_box.blockSignals(False)
+        self.refresh()
+
+    def refresh(self):
+        group_by = self.scope_box.currentData()
+        group = self.group_box.currentData() if group_by is not None else None
+        self.model.set_source(self.get_index(group_by), group, self.method_box.currentData())
+
+
+class StatsDialog(QDialog):
+    """分组统计：人数、平均、标准差、最值与分数段人数，全部取自 StatsEngine 缓存的汇总值。"""
+
+    DIMENSIONS = [("按学院 (GPA)", 'college'), ("按班级 (GPA)", 'classnum'),
+                  ("按生源省份 (GPA)", 'province'), ("按课程 (成绩)", 'course')]
+    HEADERS = ["分组", "人数", "有成绩", "平均", "标准差", "最低", "最高"] + list(STATS_BUCKET_LABELS)
+
+    def __init__(self, parent, engine: StatsEngine):
+        super().__init__(parent)
+        self.setWindowTitle("📊 统计分析")
+        self.setMinimumSize(900, 500)
+        self.engine = engine
+
+        self.dim_box = QComboBox()
+        for label, key in self.DIMENSIONS:
+            self.dim_box.addItem(label, key)
+        self.summary_label = QLabel()
+        self.table = QTableWidget()
+        self.table.setColumnCount(len(self.HEADERS))
+        self.table.setHorizontalHeaderLabels(self.HEADERS)
+        self.table.setAlternatingRowColors(True)
+        self.table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+
+        lay = QVBoxLayout(self)
+        lay.setContentsMargins(12, 12, 12, 12)
+        opts = QHBoxLayout()
+        opts.addWidget(self.dim_box)
+        opts.addWidget(self.summary_label, 1)
+        lay.addLayout(opts)
+        lay.addWidget(self.table)
+        close_btn = QPushButton("关闭")
+        close_btn.clicked.connect(self.accept)
+        btn_layout = QHBoxLayout()
+        btn_layout.addStretch(1)
+        btn_layout.addWidget(close_btn)
+        lay.addLayout(btn_layout)
+
+        self.dim_box.currentIndexChanged.connect(self.refresh)
+        self.refresh()
+
+    @staticmethod
+    def _num(v):
+        return "" if v is None else f"{v:.2f}"
+
+    def refresh(self):
+        total = self.engine.summary()
+        self.summary_label.setText(
+            f"全部 {total['students']} 名学生，{total['count']} 人有成绩，平均 GPA {self._num(total['mean'])}")
+        table = self.engine.table(self.dim_box.currentData())
+        self.table.setRowCount(len(table))
+        for row, (group, st) in enumerate(table.items()):
+            values = [str(group) or "(未填写)", str(st['students']), str(st['count']), self._num(st['mean']),
+                      self._num(st['std']), self._num(st['min']), self._num(st['max'])]
+            values += [str(n) for n in st['histogram']]
+            for col, text in enumerate(values):
+                self.table.setItem(row, col, QTableWidgetItem(text))
+        self.table.resizeColumnsToContents()
+
+
+class DiagnosticsDialog(QDialog):
+    """性能诊断：展示 instrument 记录的调用次数、耗时分布与读写字节数。"""
+
+    HEADERS = ["操作", "次数", "错误", "总耗时(ms)", "平均(ms)", "最短(ms)", "最长(ms)", "≈P50", "≈P95",
+               "读取", "写入", "耗时分布"]
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.setWindowTitle("📈 性能诊断")
+        self.setMinimumSize(980, 420)
+
+        self.info_label = QLabel()
+        self.info_label.setWordWrap(True)
+        self.table = QTableWidget()
+        self.table.setColumnCount(len(self.HEADERS))
+        self.table.setHorizontalHeaderLabels(self.HEADERS)
+        self.table.setAlternatingRowColors(True)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.horizontalHeader().setStretchLastSection(True)
+
+        self.btn_toggle = QPushButton()
+        btn_refresh = QPushButton("🔄 刷新")
+        btn_reset = QPushButton("清空")
+        btn_dump = QPushButton("导出 JSON")
+        close_btn = QPushButton("关闭")
+        self.btn_toggle.clicked.connect(self.toggle)
+        btn_refresh.clicked.connect(self.refresh)
+        btn_reset.clicked.connect(self.reset)
+        btn_dump.clicked.connect(self.dump)
+        close_btn.clicked.connect(self.accept)
+
+        lay = QVBoxLayout(self)
+        lay.setContentsMargins(12, 12, 12, 12)
+        lay.addWidget(self.info_label)
+        lay.addWidget(self.table)
+        btns = QHBoxLayout()
+        btns.addWidget(self.btn_toggle)
+        btns.addWidget(btn_refresh)
+        btns.addWidget(btn_reset)
+        btns.addWidget(btn_dump)
+        btns.addStretch(1)
+        btns.addWidget(close_btn)
+        lay.addLayout(btns)
+        self.refresh()
+
+    @staticmethod
+    def _ms(seconds):
+        return "" if seconds is None else f"{seconds * 1000:.1f}"
+
+    @staticmethod
+    def _bytes(n):
+        if not n:
+            return ""
+        for unit in ("B", "KB", "MB"):
+            if n < 1024:
+                return f"{n:.0f} {unit}"
+            n /= 1024
+        return f"{n:.1f} GB"
+
+    def refresh(self):
+        snap = instrument.snapshot()
+        on = snap['enabled']
+        self.btn_toggle.setText("停止记录" if on else "开始记录")
+        edges = snap['histogram_ms']
+        self.info_label.setText(
+            ("正在记录。" if on else "未在记录：点击“开始记录”，或设置环境变量 SIMS_PROFILE=1 后启动。")
+            + f" 耗时分布各档上限(ms): {', '.join(map(str, edges))}, 更慢"
+            + "\n启动耗时(ms): " + ", ".join(f"{p['phase']} {p['at_s'] * 1000:.0f}" for p in snap['startup']['phases']))
+        ops = snap['ops']
+        self.table.setRowCount(len(ops))
+        for row, name in enumerate(sorted(ops)):
+            st = ops[name]
+            p50 = instrument.percentile_ms(st, 50)
+            p95 = instrument.percentile_ms(st, 95)
+            values = [
+                name, str(st['count']), str(st['errors']), self._ms(st['total_s']), self._ms(st['mean_s']),
+                self._ms(st['min_s']), self._ms(st['max_s']),
+                "" if p50 is None else f"≤{p50:g}", "" if p95 is None else f"≤{p95:g}",
+                self._bytes(st['bytes_read']), self._bytes(st['bytes_written']),
+                " ".join(str(n) for n in st['histogram']),
+            ]
+            for col, text in enumerate(values):
+                item = QTableWidgetItem(text)
+                if col == 2 and st['last_error']:
+                    item.setToolTip(st['last_error'])
+                self.table.setItem(row, col, item)
+        self.table.resizeColumnsToContents()
+
+    def toggle(self):
+        instrument.enable(not instrument.enabled())
+        self.refresh()
+
+    def reset(self):
+        instrument.reset()
+        self.refresh()
+
+    def dump(self):
+        path, _ = QFileDialog.getSaveFileName(self, "导出性能数据", "profile.json", "JSON (*.json)")
+        if not path:
+            return
+        try:
+            instrument.dump(path)
+        except OSError as e:
+            QMessageBox.critical(self, "错误", f"导出失败:\n{e}")
+
+
 def main():
+    # 打包后的程序需要它来启动批量导入的子进程；未打包时不必在启动时导入 multiprocessing
+    if getattr(sys, 'frozen', False):
+        import multiprocessing
+        multiprocessing.freeze_support()
     app = QApplication(sys.argv)
 
     # 设置应用程序样式
@@ -563,6 +1246,7 @@ def main():
     )
 
     w.show()
+    instrument.mark('window_shown')
     sys.exit(app.exec())
 
 if __name__ == '__main__':
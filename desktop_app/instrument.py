@@ -0,0 +1,316 @@
+"""Lightweight timing instrumentation for core operations and GUI slots.
+
+Switch on with SIMS_PROFILE=1 (or enable() at runtime). While off, a
+@timed function costs one flag check on top of the call. While on, each
+name collects a call count, errors, total/min/max wall time, a histogram
+over HISTOGRAM_MS buckets and the bytes read/written reported with
+add_bytes(). snapshot() returns everything as plain dicts, dump() writes it
+as JSON; with SIMS_PROFILE_FILE set it is also dumped at exit.
+
+Start-up is timed separately and always: mark() records named phases as
+seconds since this module was imported (the GUI imports it first). With
+SIMS_IMPORTTIME=1 every later module import is timed as well, and
+startup_done() prints an ``python -X importtime`` style report to stderr
+(or to SIMS_IMPORTTIME_FILE). Unlike -X importtime this also works in the
+frozen build, which takes no interpreter options.
+"""
+import os
+import sys
+import json
+import time
+import atexit
+import functools
+import threading
+from typing import List, Dict, Any, Tuple, Optional, Callable
+
+# Upper bucket edges in milliseconds; the last bucket is everything slower
+HISTOGRAM_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+
+_enabled = os.environ.get('SIMS_PROFILE', '') not in ('', '0')
+_lock = threading.Lock()
+_stats: Dict[str, Dict[str, Any]] = {}
+
+_T0 = time.perf_counter()
+_phases: List[Tuple[str, float]] = []
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def enable(on: bool = True) -> None:
+    global _enabled
+    _enabled = on
+
+
+def _entry(name: str) -> Dict[str, Any]:
+    st = _stats.get(name)
+    if st is None:
+        st = _stats[name] = {
+            'count': 0, 'errors': 0, 'total_s': 0.0, 'min_s': None, 'max_s': 0.0,
+            'histogram': [0] * (len(HISTOGRAM_MS) + 1),
+            'bytes_read': 0, 'bytes_written': 0, 'last_error': None,
+        }
+    return st
+
+
+def record(name: str, seconds: float, error: Optional[BaseException] = None) -> None:
+    """Add one timed call to ``name``."""
+    ms = seconds * 1000.0
+    bucket = 0
+    while bucket < len(HISTOGRAM_MS) and ms > HISTOGRAM_MS[bucket]:
+        bucket += 1
+    with _lock:
+        st = _entry(name)
+        st['count'] += 1
+        st['total_s'] += seconds
+        st['min_s'] = seconds if st['min_s'] is None else min(st['min_s'], seconds)
+        st['max_s'] = max(st['max_s'], seconds)
+        st['histogram'][bucket] += 1
+        if error is not None:
+            st['errors'] += 1
+            st['last_error'] = f"{type(error).__name__}: {error}"
+
+
+def record_error(name: str, error: BaseException) -> None:
+    """Count an error that was handled (not raised) under ``name``."""
+    if not _enabled:
+        return
+    with _lock:
+        st = _entry(name)
+        st['errors'] += 1
+        st['last_error'] = f"{type(error).__name__}: {error}"
+
+
+def add_bytes(name: str, read: int = 0, written: int = 0) -> None:
+    if not _enabled:
+        return
+    with _lock:
+        st = _entry(name)
+        st['bytes_read'] += read
+        st['bytes_written'] += written
+
+
+def file_size(path: Optional[str]) -> int:
+    try:
+        return os.path.getsize(path) if path else 0
+    except OSError:
+        return 0
+
+
+def timed(name: Optional[str] = None) -> Callable:
+    """Decorator recording the wall time of every call under ``name``
+    (default: the function's qualified name)."""
+    def wrap(fn):
+        label = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            t0 = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException as e:
+                record(label, time.perf_counter() - t0, e)
+                raise
+            record(label, time.perf_counter() - t0)
+            return result
+        return inner
+    return wrap
+
+
+def percentile_ms(st: Dict[str, Any], p: float) -> Optional[float]:
+    """Upper edge of the histogram bucket holding the p-th percentile (None if
+    empty or beyond the last edge)."""
+    total = sum(st['histogram'])
+    if not total:
+        return None
+    need = total * p / 100.0
+    seen = 0
+    for i, n in enumerate(st['histogram']):
+        seen += n
+        if seen >= need:
+            return float(HISTOGRAM_MS[i]) if i < len(HISTOGRAM_MS) else None
+    return None
+
+
+def snapshot() -> Dict[str, Any]:
+    with _lock:
+        ops = {k: dict(v, histogram=list(v['histogram'])) for k, v in _stats.items()}
+    for st in ops.values():
+        st['mean_s'] = st['total_s'] / st['count'] if st['count'] else None
+    return {'enabled': _enabled, 'histogram_ms': list(HISTOGRAM_MS), 'time': time.time(), 'ops': ops,
+            'startup': {'phases': startup_phases(), 'imports': import_times()}}
+
+
+# -- start-up timing ------------------------------------------------------------
+
+def mark(phase: str) -> None:
+    """Record that start-up reached ``phase`` (seconds since this module was imported)."""
+    _phases.append((phase, time.perf_counter() - _T0))
+
+
+def startup_phases() -> List[Dict[str, Any]]:
+    return [{'phase': p, 'at_s': t} for p, t in _phases]
+
+
+class _TimedLoader:
+    """Wraps a module's loader while it is created and executed."""
+
+    def __init__(self, tracer: '_ImportTracer', loader):
+        self._tracer = tracer
+        self._loader = loader
+        self._name: Optional[str] = None
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+    def create_module(self, spec):
+        # Extension modules do most of their work here, so the clock starts now
+        self._tracer.begin()
+        self._name = spec.name
+        create = getattr(self._loader, 'create_module', None)
+        try:
+            return create(spec) if create is not None else None
+        except BaseException:
+            self._tracer.end(spec.name)
+            raise
+
+    def exec_module(self, module):
+        # Put the real loader back first: nothing should see the wrapper after the import
+        module.__loader__ = self._loader
+        if module.__spec__ is not None:
+            module.__spec__.loader = self._loader
+        if self._name is None:
+            self._tracer.begin()
+            self._name = module.__spec__.name
+        try:
+            self._loader.exec_module(module)
+        finally:
+            # Not module.__name__: some C modules (_decimal) report another name
+            self._tracer.end(self._name)
+
+
+class _ImportTracer:
+    """sys.meta_path entry timing each module like -X importtime: self time
+    excludes the imports it triggers, cumulative time includes them."""
+
+    def __init__(self):
+        self.rows: List[Tuple[int, str, float, float]] = []  # depth, module, self s, cumulative s
+        self._local = threading.local()
+
+    def find_spec(self, name, path=None, target=None):
+        for finder in sys.meta_path:
+            find = getattr(finder, 'find_spec', None)
+            if finder is self or find is None:
+                continue
+            spec = find(name, path, target)
+            if spec is not None:
+                if hasattr(spec.loader, 'exec_module'):
+                    spec.loader = _TimedLoader(self, spec.loader)
+                return spec
+        return None
+
+    def _stack(self) -> list:
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def begin(self) -> None:
+        # [start, time spent in nested imports]
+        self._stack().append([time.perf_counter(), 0.0])
+
+    def end(self, name: str) -> None:
+        stack = self._stack()
+        t0, nested = stack.pop()
+        total = time.perf_counter() - t0
+        if stack:
+            stack[-1][1] += total
+        self.rows.append((len(stack), name, total - nested, total))
+
+
+_tracer: Optional[_ImportTracer] = None
+
+
+def tracing_imports() -> bool:
+    return _tracer is not None and _tracer in sys.meta_path
+
+
+def trace_imports(on: bool = True) -> None:
+    """Start (or stop) timing module imports; rows recorded so far are kept."""
+    global _tracer
+    if on:
+        if _tracer is None:
+            _tracer = _ImportTracer()
+        if not tracing_imports():
+            sys.meta_path.insert(0, _tracer)
+    elif tracing_imports():
+        sys.meta_path.remove(_tracer)
+
+
+def import_times() -> List[Dict[str, Any]]:
+    """Traced imports in completion order (empty unless trace_imports() is on)."""
+    rows = list(_tracer.rows) if _tracer is not None else []
+    return [{'module': m, 'depth': d, 'self_s': s, 'cumulative_s': c} for d, m, s, c in rows]
+
+
+def startup_report() -> str:
+    """Start-up phases plus the traced imports in ``python -X importtime`` layout (microseconds)."""
+    lines = [f"startup: {p:<20} {t * 1000:>9.1f} ms" for p, t in _phases]
+    rows = import_times()
+    if rows:
+        lines.append("import time: self [us] | cumulative | imported package")
+        for r in rows:
+            lines.append(f"import time: {r['self_s'] * 1e6:>9.0f} | {r['cumulative_s'] * 1e6:>10.0f} | "
+                         f"{'  ' * r['depth']}{r['module']}")
+        slowest = sorted(rows, key=lambda r: r['self_s'], reverse=True)[:10]
+        lines.append("slowest (self): " + ", ".join(f"{r['module']} {r['self_s'] * 1000:.1f} ms" for r in slowest))
+    return '\n'.join(lines) + '\n'
+
+
+def startup_done() -> None:
+    """Mark the end of start-up; writes the report when SIMS_IMPORTTIME is set."""
+    mark('ready')
+    if not tracing_imports():
+        return
+    report = startup_report()
+    trace_imports(False)
+    path = os.environ.get('SIMS_IMPORTTIME_FILE')
+    try:
+        if path:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(report)
+        elif sys.stderr is not None:  # windowed builds have no stderr
+            sys.stderr.write(report)
+    except OSError as e:
+        print(f"写入启动耗时报告失败: {e}")
+
+
+if os.environ.get('SIMS_IMPORTTIME', '') not in ('', '0'):
+    trace_imports()
+
+
+def reset() -> None:
+    with _lock:
+        _stats.clear()
+
+
+def dump(path: str) -> str:
+    """Write snapshot() as JSON to ``path``; returns the path."""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(snapshot(), f, ensure_ascii=False, indent=2)
+    return path
+
+
+def _dump_at_exit() -> None:
+    path = os.environ.get('SIMS_PROFILE_FILE')
+    if path and _stats:
+        try:
+            dump(path)
+        except OSError as e:
+            print(f"写入性能数据失败: {e}")
+
+
+atexit.register(_dump_at_exit)
@@ -0,0 +1,300 @@
+"""On-disk formats for the roster snapshot.
+
+``json``     compact JSON (no indentation); orjson is used when installed.
+``msgpack``  MessagePack array of student maps (needs the msgpack package).
+``records``  length-prefixed record file with an id index for random access.
+
+The format written is chosen with SIMS_FORMAT (default ``json``); loading
+detects the format from the file contents, so pretty-printed files from older
+versions still load. Nothing here knows about StudentRecord: callers pass a
+``default`` hook to turn their objects into plain dicts and an ``object_hook``
+to build objects while decoding (it may also see nested dicts, which it must
+return unchanged).
+"""
+import gc
+import os
+import json
+import importlib
+import importlib.util
+from contextlib import contextmanager
+import struct
+import warnings
+from typing import List, Dict, Any, Tuple, Optional, Iterable, Iterator, Callable
+
+# orjson and msgpack are optional and imported on first use, which keeps
+# them off the start-up path; serialization.orjson / .msgpack still work
+_OPTIONAL = ('orjson', 'msgpack')
+_modules: Dict[str, Any] = {}
+_installed: Dict[str, bool] = {}
+
+
+def _optional(name: str) -> Any:
+    """The optional module ``name`` (None if it is not installed)."""
+    try:
+        return _modules[name]
+    except KeyError:
+        pass
+    try:
+        mod = importlib.import_module(name)
+    except ImportError:  # pragma: no cover - depends on the environment
+        mod = None
+    _modules[name] = mod
+    return mod
+
+
+def _available(name: str) -> bool:
+    # find_spec locates the package without importing it
+    if name not in _installed:
+        _installed[name] = name in _modules or importlib.util.find_spec(name) is not None
+    return _installed[name]
+
+
+def __getattr__(name: str) -> Any:
+    if name in _OPTIONAL:
+        return _optional(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+FORMATS = ('json', 'msgpack', 'records')
+
+RECORDS_MAGIC = b'SIMSREC1'
+RECORDS_FOOTER = b'SIMSIDX1'
+_LEN = struct.Struct('<I')
+_FOOTER = struct.Struct('<Q8s')
+
+Hook = Optional[Callable[[Any], Any]]
+
+
+def available_formats() -> List[str]:
+    return [f for f in FORMATS if f != 'msgpack' or _available('msgpack')]
+
+
+def default_format() -> str:
+    """Format for new snapshots: SIMS_FORMAT, falling back to json if unusable."""
+    fmt = (os.environ.get('SIMS_FORMAT') or 'json').lower()
+    if fmt not in FORMATS:
+        raise ValueError(f"未知的数据格式: {fmt}")
+    if fmt not in available_formats():
+        warnings.warn(f"{fmt} 不可用（未安装依赖），改用 json 格式")
+        return 'json'
+    return fmt
+
+
+# -- compact JSON helpers ---------------------------------------------------
+
+def dumps(obj: Any, default: Hook = None) -> str:
+    """Compact JSON text (UTF-8 characters kept as-is)."""
+    return dumps_bytes(obj, default).decode('utf-8')
+
+
+def dumps_bytes(obj: Any, default: Hook = None) -> bytes:
+    orjson = _optional('orjson')
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, default=default)
+        except TypeError:
+            # Non-str keys, huge ints and the like: let the stdlib decide
+            pass
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'), default=default).encode('utf-8')
+
+
+def loads(data, object_hook: Hook = None) -> Any:
+    orjson = _optional('orjson')
+    if orjson is not None and object_hook is None:
+        return orjson.loads(data)
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        data = bytes(data).decode('utf-8')
+    return json.loads(data, object_hook=object_hook)
+
+
+# -- detection ----------------------------------------------------------------
+
+def detect_format(path: str) -> str:
+    """Sniff the snapshot format from its first bytes."""
+    with open(path, 'rb') as f:
+        head = f.read(64)
+    if head.startswith(RECORDS_MAGIC):
+        return 'records'
+    if head.startswith(b'\xef\xbb\xbf'):
+        head = head[3:]
+    stripped = head.lstrip(b' \t\r\n')
+    if not stripped or stripped[:1] in (b'[', b'{'):
+        return 'json'
+    first = stripped[0]
+    if 0x90 <= first <= 0x9f or first in (0xdc, 0xdd):
+        return 'msgpack'
+    raise ValueError(f"无法识别的数据文件格式: {path}")
+
+
+# -- whole-file load / save -------------------------------------------------------
+
+@contextmanager
+def _gc_paused():
+    # Everything a load allocates survives it; without this the cyclic GC
+    # rescans the growing heap over and over while the roster is built
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def load(path: str, object_hook: Hook = None) -> List[Any]:
+    """Read a snapshot in any supported format."""
+    with _gc_paused():
+        return _load(path, object_hook)
+
+
+def _load(path: str, object_hook: Hook) -> List[Any]:
+    fmt = detect_format(path)
+    if fmt == 'records':
+        with RecordFile(path) as rf:
+            return list(rf.iter_records(object_hook))
+    if fmt == 'msgpack':
+        msgpack = _optional('msgpack')
+        if msgpack is None:
+            raise RuntimeError("数据文件为 MessagePack 格式，需要安装 msgpack")
+        with open(path, 'rb') as f:
+            unpacker = msgpack.Unpacker(f, raw=False, strict_map_key=False, object_hook=object_hook)
+            return [unpacker.unpack() for _ in range(unpacker.read_array_header())]
+    with open(path, 'rb') as f:
+        data = f.read()
+    if data.startswith(b'\xef\xbb\xbf'):
+        data = data[3:]
+    orjson = _optional('orjson')
+    if orjson is not None:
+        # orjson has no object_hook; convert the top-level records afterwards
+        items = orjson.loads(data)
+        return [object_hook(d) for d in items] if object_hook is not None else items
+    return json.loads(data.decode('utf-8'), object_hook=object_hook)
+
+
+def dump(path: str, items: Iterable[Any], fmt: Optional[str] = None, default: Hook = None) -> None:
+    """Write ``items`` atomically (temp file, fsync, rename) in ``fmt``."""
+    fmt = fmt or default_format()
+    if fmt not in available_formats():
+        raise ValueError(f"不可用的数据格式: {fmt}")
+    tmp = path + '.tmp'
+    with open(tmp, 'wb', buffering=1 << 20) as f:
+        if fmt == 'records':
+            write_records(f, items, default)
+        elif fmt == 'msgpack':
+            items = list(items)
+            packer = _optional('msgpack').Packer(default=default)
+            f.write(packer.pack_array_header(len(items)))
+            for item in items:
+                f.write(packer.pack(item))
+        else:
+            # One record at a time: never holds the whole document as plain dicts
+            f.write(b'[')
+            first = True
+            for item in items:
+                if not first:
+                    f.write(b',\n')
+                f.write(dumps_bytes(item, default))
+                first = False
+            f.write(b']\n')
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+# -- length-prefixed record file -----------------------------------------------------
+
+def write_records(f, items: Iterable[Any], default: Hook = None) -> None:
+    """magic, then [u32 length][compact JSON] per record, then the id index
+    (JSON list of [id, offset]) framed the same way, then a footer holding the
+    index offset."""
+    f.write(RECORDS_MAGIC)
+    offset = len(RECORDS_MAGIC)
+    index: List[Tuple[Any, int]] = []
+    for item in items:
+        payload = dumps_bytes(item, default)
+        index.append((item.get('id'), offset))
+        f.write(_LEN.pack(len(payload)))
+        f.write(payload)
+        offset += _LEN.size + len(payload)
+    payload = dumps_bytes(index)
+    f.write(_LEN.pack(len(payload)))
+    f.write(payload)
+    f.write(_FOOTER.pack(offset, RECORDS_FOOTER))
+
+
+# Parsed id indexes keyed by path; an entry is reused while the file's
+# (inode, mtime, size) is unchanged, so repeated get() calls skip re-reading the index
+_INDEX_CACHE: Dict[str, Tuple[Tuple[int, int, int], Dict[Any, int]]] = {}
+
+
+class RecordFile:
+    """Reader for the ``records`` format: iterate everything or fetch one id by seeking.
+
+    The file is held open only for the lifetime of the object (use it as a
+    context manager), so a later save can still replace it on Windows.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.f = open(path, 'rb')
+        self._index: Optional[Dict[Any, int]] = None
+        if self.f.read(len(RECORDS_MAGIC)) != RECORDS_MAGIC:
+            self.f.close()
+            raise ValueError(f"不是记录文件: {path}")
+        self.f.seek(-_FOOTER.size, os.SEEK_END)
+        self.index_offset, footer = _FOOTER.unpack(self.f.read(_FOOTER.size))
+        if footer != RECORDS_FOOTER:
+            self.f.close()
+            raise ValueError(f"记录文件不完整: {path}")
+
+    def close(self) -> None:
+        self.f.close()
+
+    def __enter__(self) -> 'RecordFile':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _read_at(self, offset: int) -> bytes:
+        self.f.seek(offset)
+        (n,) = _LEN.unpack(self.f.read(_LEN.size))
+        return self.f.read(n)
+
+    @property
+    def index(self) -> Dict[Any, int]:
+        """id -> record offset (read lazily from the end of the file)."""
+        if self._index is None:
+            st = os.fstat(self.f.fileno())
+            stamp = (st.st_ino, st.st_mtime_ns, st.st_size)
+            cached = _INDEX_CACHE.get(self.path)
+            if cached is not None and cached[0] == stamp:
+                self._index = cached[1]
+            else:
+                self._index = {sid: off for sid, off in loads(self._read_at(self.index_offset))}
+                _INDEX_CACHE[self.path] = (stamp, self._index)
+        return self._index
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __contains__(self, sid: object) -> bool:
+        return sid in self.index
+
+    def get(self, sid: Any, object_hook: Hook = None) -> Optional[Any]:
+        off = self.index.get(sid)
+        if off is None:
+            return None
+        d = loads(self._read_at(off))
+        return object_hook(d) if object_hook is not None else d
+
+    def iter_records(self, object_hook: Hook = None) -> Iterator[Any]:
+        f = self.f
+        f.seek(len(RECORDS_MAGIC))
+        pos = len(RECORDS_MAGIC)
+        end = self.index_offset
+        while pos < end:
+            (n,) = _LEN.unpack(f.read(_LEN.size))
+            d = loads(f.read(n))
+            yield object_hook(d) if object_hook is not None else d
+            pos += _LEN.size + n
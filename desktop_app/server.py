@@ -0,0 +1,325 @@
+"""Local HTTP/JSON API over one shared in-memory StudentStore (stdlib asyncio only).
+
+    GET  /health                              {"students", "version"}
+    GET  /students?q=&college=&classnum=&limit=&offset=
+    GET  /students/<id>                       the record plus its GPA
+    GET  /students/<id>/gpa                   {"id", "gpa", "rank"}
+    GET  /ranking?group_by=&method=&top=      rank_students() rows, with ETag
+    POST /scores?format=csv|txt               body: score lines as for import_scores()
+
+Reads run on the event loop against the store and its incremental search and
+ranking indexes, so any number of clients can read at once; while an import
+holds the store lock, a read waits for it on a worker thread rather than
+stalling the loop (and every other connection). Score imports are
+writers: one at a time, parsed and applied on a worker thread under the store
+lock, then saved (journaled) before the response. Ranking responses carry an
+ETag derived from the store's change counter; If-None-Match gets a 304 while
+nothing has changed, and the encoded body is cached until then.
+
+Start with ``python -m desktop_app serve`` (binds 127.0.0.1:8765 by default).
+"""
+import os
+import time
+import asyncio
+import tempfile
+from http import HTTPStatus
+from urllib.parse import urlsplit, parse_qs, unquote
+from typing import Dict, List, Any, Optional, Tuple
+
+from . import core, serialization
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+MAX_HEADER_BYTES = 64 * 1024
+MAX_BODY_BYTES = 64 * 1024 * 1024
+SEARCH_LIMIT = 100
+SEARCH_LIMIT_MAX = 1000
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class Request:
+    __slots__ = ('method', 'path', 'query', 'headers', 'body')
+
+    def __init__(self, method: str, target: str, headers: Dict[str, str], body: bytes):
+        url = urlsplit(target)
+        self.method = method
+        self.path = url.path
+        self.query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        self.headers = headers
+        self.body = body
+
+    def arg(self, name: str, default: Any = None, kind=str, choices=None) -> Any:
+        value = self.query.get(name)
+        if value in (None, ''):
+            return default
+        try:
+            value = kind(value)
+        except ValueError:
+            raise HTTPError(400, f"参数 {name} 无效: {value}")
+        if choices is not None and value not in choices:
+            raise HTTPError(400, f"参数 {name} 必须是 {', '.join(choices)} 之一")
+        return value
+
+
+class Response:
+    __slots__ = ('status', 'body', 'headers')
+
+    def __init__(self, status: int = 200, body: bytes = b'', headers: Optional[Dict[str, str]] = None):
+        self.status = status
+        self.body = body
+        self.headers = headers or {}
+
+
+def _json(obj: Any, status: int = 200, headers: Optional[Dict[str, str]] = None) -> Response:
+    return Response(status, serialization.dumps_bytes(obj, default=core._plain), headers)
+
+
+class RosterService:
+    """The request handlers, bound to one store and the indexes kept on it."""
+
+    def __init__(self, store: core.StudentStore):
+        self.store = store
+        self.search_index = core.SearchIndex(store)
+        self.rankings: Dict[Optional[str], core.RankingIndex] = {}
+        self.version = 0
+        # Part of every ETag, so tags from before a restart never match
+        self._epoch = format(time.time_ns() // 1000, 'x')
+        self._ranking_cache: Dict[Tuple[Any, ...], Tuple[int, bytes]] = {}
+        self._write_lock = asyncio.Lock()
+        store.subscribe(self._on_change)
+
+    def close(self) -> None:
+        self.store.unsubscribe(self._on_change)
+        self.search_index.close()
+        for idx in self.rankings.values():
+            idx.close()
+
+    def _on_change(self, op: str, sid: str, data: Dict[str, Any]) -> None:
+        self.version += 1
+
+    def ranking_index(self, group_by: Optional[str]) -> core.RankingIndex:
+        idx = self.rankings.get(group_by)
+        if idx is None:
+            idx = self.rankings[group_by] = core.RankingIndex(self.store, group_by)
+        return idx
+
+    async def handle(self, req: Request) -> Response:
+        parts = [unquote(p) for p in req.path.strip('/').split('/')] if req.path.strip('/') else []
+        if req.method == 'POST':
+            if parts == ['scores']:
+                return await self.import_scores(req)
+            raise HTTPError(404 if parts != ['students'] else 405, "未找到")
+        if req.method not in ('GET', 'HEAD'):
+            raise HTTPError(405, f"不支持的方法: {req.method}")
+        # Reads see a consistent roster even while an import applies a chunk.
+        # Uncontended, they run right here; otherwise the wait for the lock
+        # (and the read after it) moves to a worker thread.
+        lock = self.store.lock
+        if lock.acquire(blocking=False):
+            try:
+                return self._read(req, parts)
+            finally:
+                lock.release()
+        return await asyncio.get_running_loop().run_in_executor(None, self._locked_read, req, parts)
+
+    def _locked_read(self, req: Request, parts: List[str]) -> Response:
+        with self.store.lock:
+            return self._read(req, parts)
+
+    def _read(self, req: Request, parts: List[str]) -> Response:
+        if parts == ['health']:
+            return _json({'students': len(self.store), 'version': self.version})
+        if parts == ['students']:
+            return self.search(req)
+        if len(parts) == 2 and parts[0] == 'students':
+            return self.student(parts[1])
+        if len(parts) == 3 and parts[0] == 'students' and parts[2] == 'gpa':
+            return self.gpa(parts[1])
+        if parts == ['ranking']:
+            return self.ranking(req)
+        raise HTTPError(404, "未找到")
+
+    def search(self, req: Request) -> Response:
+        q = req.arg('q', '')
+        college = req.arg('college')
+        classnum = req.arg('classnum')
+        limit = min(req.arg('limit', SEARCH_LIMIT, int), SEARCH_LIMIT_MAX)
+        offset = req.arg('offset', 0, int)
+        if limit < 0 or offset < 0:
+            raise HTTPError(400, "limit/offset 不能为负数")
+        get = self.store.get
+        hits = [s for s in map(get, self.search_index.search(q))
+                if (college is None or s.get('college') == college)
+                and (classnum is None or s.get('classnum') == classnum)]
+        items = [dict(s.to_dict(), gpa=s.gpa()) for s in hits[offset:offset + limit]]
+        return _json({'total': len(hits), 'offset': offset, 'items': items})
+
+    def _get(self, sid: str) -> core.StudentRecord:
+        s = self.store.get(sid)
+        if s is None:
+            raise HTTPError(404, f"学号不存在: {sid}")
+        return s
+
+    def student(self, sid: str) -> Response:
+        s = self._get(sid)
+        return _json(dict(s.to_dict(), gpa=s.gpa()))
+
+    def gpa(self, sid: str) -> Response:
+        s = self._get(sid)
+        return _json({'id': sid, 'gpa': s.gpa(), 'rank': self.ranking_index(None).rank_of(sid)})
+
+    def ranking(self, req: Request) -> Response:
+        group_by = req.arg('group_by', None, str, core.RANK_GROUPS)
+        method = req.arg('method', 'ordinal', str, core.RANK_METHODS)
+        top = req.arg('top', None, int)
+        if top is not None and top < 0:
+            raise HTTPError(400, "top 不能为负数")
+        version = self.version
+        etag = f'"{self._epoch}-{version}"'
+        headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+        if etag in [t.strip() for t in req.headers.get('if-none-match', '').split(',')]:
+            return Response(304, b'', headers)
+        key = (group_by, method, top)
+        cached = self._ranking_cache.get(key)
+        if cached is None or cached[0] != version:
+            idx = self.ranking_index(group_by)
+            if top is None:
+                rows = idx.ranking(method)
+            else:
+                rows = []
+                for g in idx.groups():
+                    rows.extend(idx.top_k(top, g, method))
+            cached = self._ranking_cache[key] = (version, serialization.dumps_bytes(rows))
+        return Response(200, cached[1], headers)
+
+    async def import_scores(self, req: Request) -> Response:
+        fmt = req.arg('format', 'csv', str, ('csv', 'txt'))
+        if not req.body:
+            raise HTTPError(400, "请求体为空")
+        async with self._write_lock:
+            loop = asyncio.get_running_loop()
+            total, applied, skipped = await loop.run_in_executor(None, self._apply_scores, req.body, fmt)
+        return _json({'total': total, 'applied': applied, 'skipped': skipped, 'version': self.version})
+
+    def _apply_scores(self, body: bytes, fmt: str) -> Tuple[int, int, int]:
+        # import_scores() streams from a file; the upload is spooled to one first
+        fd, path = tempfile.mkstemp(suffix='.' + fmt)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(body)
+            result = core.import_scores(path, store=self.store)
+            core.save_store(self.store)
+            return result
+        finally:
+            os.remove(path)
+
+
+class RosterServer:
+    """asyncio HTTP/1.1 front end (keep-alive, Content-Length bodies) for a RosterService."""
+
+    def __init__(self, service: RosterService, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+        self.service = service
+        self.host = host
+        self.port = port
+        self.server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> None:
+        self.server = await asyncio.start_server(self._client, self.host, self.port,
+                                                 limit=MAX_HEADER_BYTES)
+        # port 0 picks a free port; report the real one
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self) -> None:
+        if self.server is None:
+            await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[Request]:
+        try:
+            head = await reader.readuntil(b'\r\n\r\n')
+        except asyncio.IncompleteReadError:
+            return None  # client closed the connection
+        except asyncio.LimitOverrunError:
+            raise HTTPError(431, "请求头过大")
+        lines = head.decode('latin-1').split('\r\n')
+        try:
+            method, target, _ = lines[0].split(' ', 2)
+        except ValueError:
+            raise HTTPError(400, "无效的请求行")
+        headers = {}
+        for line in lines[1:]:
+            if line:
+                name, _, value = line.partition(':')
+                headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get('content-length') or 0)
+        except ValueError:
+            raise HTTPError(400, "无效的 Content-Length")
+        if length < 0:
+            raise HTTPError(400, "无效的 Content-Length")
+        if length > MAX_BODY_BYTES:
+            raise HTTPError(413, "请求体过大")
+        body = await reader.readexactly(length) if length else b''
+        return Request(method.upper(), target, headers, body)
+
+    async def _client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                req = None
+                # Until a request has been read in full, the rest of the stream
+                # cannot be trusted to start at the next request
+                keep_alive = False
+                try:
+                    req = await self._read_request(reader)
+                    if req is None:
+                        break
+                    keep_alive = req.headers.get('connection', '').lower() != 'close'
+                    resp = await self.service.handle(req)
+                except HTTPError as e:
+                    resp = _json({'error': str(e)}, e.status)
+                    keep_alive = keep_alive and e.status < 500
+                except (ValueError, KeyError) as e:
+                    resp = _json({'error': str(e)}, 400)
+                except Exception as e:
+                    resp = _json({'error': f"服务器内部错误: {e}"}, 500)
+                    keep_alive = False
+                self._write(writer, resp, keep_alive, head_only=req is not None and req.method == 'HEAD')
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    def _write(writer: asyncio.StreamWriter, resp: Response, keep_alive: bool, head_only: bool = False) -> None:
+        status = HTTPStatus(resp.status)
+        head = [f"HTTP/1.1 {status.value} {status.phrase}"]
+        if resp.status != 304:
+            head.append("Content-Type: application/json; charset=utf-8")
+        head.append(f"Content-Length: {len(resp.body)}")
+        head.extend(f"{k}: {v}" for k, v in resp.headers.items())
+        head.append("Connection: keep-alive" if keep_alive else "Connection: close")
+        writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1'))
+        if not head_only:
+            writer.write(resp.body)
+
+
+async def serve(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                store: Optional[core.StudentStore] = None) -> None:
+    """Load the roster (unless given) and serve it until cancelled."""
+    service = RosterService(store if store is not None else core.load_store())
+    server = RosterServer(service, host, port)
+    await server.start()
+    print(f"正在监听 http://{server.host}:{server.port}/ （{len(service.store)} 名学生）", flush=True)
+    try:
+        await server.serve_forever()
+    finally:
+        service.close()
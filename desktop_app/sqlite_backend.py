@@ -0,0 +1,339 @@
+"""SQLite storage backend.
+
+Students and courses live in two normalized tables. Lookups, search, ranking
+and export iterate with SQL instead of hydrating the roster into Python dicts;
+only the GUI (load_store) materializes a full StudentStore.
+
+Select it with SIMS_BACKEND=sqlite. Migrate an existing students.json with:
+
+    python -m desktop_app.sqlite_backend [students.json] [students.db]
+"""
+import os
+import sys
+import json
+import sqlite3
+import contextlib
+from typing import List, Dict, Any, Optional, Iterator, Iterable
+
+from .core import STUDENT_FIELDS, StudentStore, ChangeJournal, JsonBackend, RANK_METHODS, RANK_GROUPS, _count_io
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS students (
+    pk INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    name TEXT, gender TEXT, age, college TEXT, classnum TEXT,
+    plcstatus TEXT, phone TEXT, province TEXT, parphone TEXT,
+    extra TEXT
+);
+CREATE TABLE IF NOT EXISTS courses (
+    student_id TEXT NOT NULL REFERENCES students(id) ON UPDATE CASCADE ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    credit REAL,
+    score REAL,
+    seq INTEGER NOT NULL,
+    PRIMARY KEY (student_id, name)
+);
+CREATE INDEX IF NOT EXISTS idx_students_college ON students(college);
+CREATE INDEX IF NOT EXISTS idx_students_classnum ON students(classnum);
+CREATE INDEX IF NOT EXISTS idx_students_name ON students(name);
+CREATE INDEX IF NOT EXISTS idx_courses_name ON courses(name);
+"""
+
+FIELDS = [k for k in STUDENT_FIELDS if k != 'id']
+_KNOWN = set(STUDENT_FIELDS) | {'courses'}
+
+GPA_SQL = """
+SELECT s.pk, s.id, s.name, s.college, s.classnum,
+       CASE WHEN SUM(c.credit) > 0 THEN SUM(c.score * c.credit) / SUM(c.credit) END AS gpa
+FROM students s LEFT JOIN courses c ON c.student_id = s.id
+GROUP BY s.pk
+"""
+
+_RANK_FN = {'ordinal': 'ROW_NUMBER()', 'competition': 'RANK()', 'dense': 'DENSE_RANK()'}
+
+RANK_SQL = """
+SELECT rank, id, name, gpa, grp FROM (
+    SELECT {fn} OVER (p ORDER BY gpa IS NULL, gpa DESC{tiebreak}) AS rank,
+           ROW_NUMBER() OVER (p ORDER BY gpa IS NULL, gpa DESC, pk) AS pos,
+           id, name, gpa, {part} AS grp
+    FROM ({gpa})
+    WINDOW p AS (PARTITION BY {part})
+) {where}
+ORDER BY grp, pos
+"""
+
+
+def _like(text: str) -> str:
+    return '%' + text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+
+
+class SQLiteChangeLog(ChangeJournal):
+    """Buffers store mutations like ChangeJournal, but flushes them as SQL statements."""
+
+    def __init__(self, backend: 'SQLiteBackend'):
+        super().__init__(backend.path)
+        self.backend = backend
+        self.size = 0
+
+    def flush(self) -> int:
+        if not self.pending:
+            return 0
+        n = len(self.pending)
+        with self.backend.session() as conn:
+            for line in self.pending:
+                self.backend.apply(conn, json.loads(line))
+        self.pending.clear()
+        return n
+
+    def should_compact(self) -> bool:
+        return self.overflow
+
+
+class SQLiteBackend:
+    name = 'sqlite'
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def connect(self) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        conn = sqlite3.connect(self.path)
+        conn.execute('PRAGMA foreign_keys = ON')
+        conn.executescript(SCHEMA)
+        return conn
+
+    @contextlib.contextmanager
+    def session(self) -> Iterator[sqlite3.Connection]:
+        """Connection that commits on success, rolls back on error and is always closed."""
+        conn = self.connect()
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    # -- row conversion -------------------------------------------------
+
+    @staticmethod
+    def _student_row(s: Dict[str, Any]) -> list:
+        extra = {k: v for k, v in s.items() if k not in _KNOWN}
+        return [s.get('id')] + [s.get(k) for k in FIELDS] + [json.dumps(extra, ensure_ascii=False) if extra else None]
+
+    @staticmethod
+    def _student_dict(row) -> Dict[str, Any]:
+        s = {'id': row[0]}
+        for k, v in zip(FIELDS, row[1:]):
+            # NULL means the key was absent in the record
+            if v is not None:
+                s[k] = v
+        if row[-1]:
+            s.update(json.loads(row[-1]))
+        s['courses'] = []
+        return s
+
+    @staticmethod
+    def _num(v):
+        # REAL columns hand back 4.0 for 4; keep the JSON shape
+        return int(v) if isinstance(v, float) and v.is_integer() else v
+
+    _SELECT = 'SELECT id, ' + ', '.join(FIELDS) + ', extra FROM students'
+
+    def _insert_student(self, conn: sqlite3.Connection, s: Dict[str, Any]) -> None:
+        conn.execute('INSERT INTO students (id, ' + ', '.join(FIELDS) + ', extra) VALUES ('
+                     + ', '.join('?' * (len(FIELDS) + 2)) + ')', self._student_row(s))
+        self._insert_courses(conn, s.get('id'), s.get('courses') or [])
+
+    @staticmethod
+    def _insert_courses(conn: sqlite3.Connection, sid: str, courses: Iterable[Dict[str, Any]]) -> None:
+        rows = [(sid, c.get('name'), c.get('credit', 0), c.get('score', 0), i) for i, c in enumerate(courses)]
+        # One row per (student, course): a repeated name is refused rather than
+        # dropped, so this backend never holds less than the JSON one would
+        names = [r[1] for r in rows]
+        if len(set(names)) != len(names):
+            dup = next(n for n in names if names.count(n) > 1)
+            raise ValueError(f"{sid}: 课程重复: {dup}")
+        conn.executemany('INSERT INTO courses (student_id, name, credit, score, seq) VALUES (?, ?, ?, ?, ?)', rows)
+
+    # -- change log -----------------------------------------------------
+
+    def apply(self, conn: sqlite3.Connection, rec: Dict[str, Any]) -> None:
+        """Apply one StudentStore change record (see ChangeJournal) as SQL."""
+        op, sid = rec['op'], rec['id']
+        if op == 'add':
+            conn.execute('DELETE FROM students WHERE id = ?', (sid,))
+            self._insert_student(conn, rec['rec'])
+        elif op == 'edit':
+            fields = rec['set']
+            cols = [k for k in FIELDS if k in fields]
+            if cols:
+                conn.execute('UPDATE students SET ' + ', '.join(f'{k} = ?' for k in cols) + ' WHERE id = ?',
+                             [fields[k] for k in cols] + [sid])
+            extra = {k: v for k, v in fields.items() if k not in _KNOWN}
+            if extra:
+                row = conn.execute('SELECT extra FROM students WHERE id = ?', (sid,)).fetchone()
+                merged = json.loads(row[0]) if row and row[0] else {}
+                merged.update(extra)
+                conn.execute('UPDATE students SET extra = ? WHERE id = ?', (json.dumps(merged, ensure_ascii=False), sid))
+            new_sid = fields.get('id', sid)
+            if new_sid != sid:
+                conn.execute('UPDATE students SET id = ? WHERE id = ?', (new_sid, sid))
+            if 'courses' in fields:
+                conn.execute('DELETE FROM courses WHERE student_id = ?', (new_sid,))
+                self._insert_courses(conn, new_sid, fields['courses'] or [])
+        elif op == 'del':
+            conn.execute('DELETE FROM students WHERE id = ?', (sid,))
+        elif op == 'score':
+            self._upsert_course(conn, sid, rec['course'], rec['credit'], rec['score'])
+        elif op == 'rncourse':
+            if rec['course'] != rec['old']:
+                conn.execute('DELETE FROM courses WHERE student_id = ? AND name = ?', (sid, rec['course']))
+            conn.execute('UPDATE courses SET name = ?, credit = ?, score = ? WHERE student_id = ? AND name = ?',
+                         (rec['course'], rec['credit'], rec['score'], sid, rec['old']))
+        elif op == 'rmcourse':
+            conn.execute('DELETE FROM courses WHERE student_id = ? AND name = ?', (sid, rec['course']))
+
+    @staticmethod
+    def _upsert_course(conn: sqlite3.Connection, sid: str, course: str, credit: float, score: float) -> None:
+        conn.execute(
+            'INSERT INTO courses (student_id, name, credit, score, seq) '
+            'VALUES (?, ?, ?, ?, (SELECT COALESCE(MAX(seq), -1) + 1 FROM courses WHERE student_id = ?)) '
+            'ON CONFLICT(student_id, name) DO UPDATE SET credit = excluded.credit, score = excluded.score',
+            (sid, course, credit, score, sid))
+
+    # -- backend API ----------------------------------------------------
+
+    def load_store(self) -> StudentStore:
+        store = StudentStore(self.iter_students())
+        log = SQLiteChangeLog(self)
+        store.journal = log
+        store.backend = self
+        store.subscribe(log)
+        return store
+
+    def save_store(self, store: StudentStore) -> None:
+        if store.journal is None or store.journal.overflow:
+            self.save_all(store.students)
+            if store.journal is not None:
+                store.journal.reset()
+            return
+        store.journal.flush()
+
+    def save_all(self, students: Iterable[Dict[str, Any]]) -> None:
+        with self.session() as conn:
+            conn.execute('DELETE FROM courses')
+            conn.execute('DELETE FROM students')
+            for s in students:
+                self._insert_student(conn, s)
+
+    def iter_students(self) -> Iterator[Dict[str, Any]]:
+        """Stream students in insertion order, merging courses from a parallel cursor."""
+        _count_io('load')
+        conn = self.connect()
+        try:
+            courses = conn.execute(
+                'SELECT c.student_id, c.name, c.credit, c.score FROM courses c '
+                'JOIN students s ON s.id = c.student_id ORDER BY s.pk, c.seq')
+            pending = next(courses, None)
+            for row in conn.execute(self._SELECT + ' ORDER BY pk'):
+                s = self._student_dict(row)
+                while pending is not None and pending[0] == s['id']:
+                    s['courses'].append({'name': pending[1], 'credit': self._num(pending[2]),
+                                         'score': self._num(pending[3])})
+                    pending = next(courses, None)
+                yield s
+        finally:
+            conn.close()
+
+    def roster(self) -> 'SQLiteRoster':
+        """Re-iterable view of all students; each iteration is a fresh streaming query."""
+        return SQLiteRoster(self)
+
+    def count(self) -> int:
+        with self.session() as conn:
+            return conn.execute('SELECT COUNT(*) FROM students').fetchone()[0]
+
+    def get(self, sid: str) -> Optional[Dict[str, Any]]:
+        with self.session() as conn:
+            row = conn.execute(self._SELECT + ' WHERE id = ?', (sid,)).fetchone()
+            if row is None:
+                return None
+            s = self._student_dict(row)
+            for name, credit, score in conn.execute(
+                    'SELECT name, credit, score FROM courses WHERE student_id = ? ORDER BY seq', (sid,)):
+                s['courses'].append({'name': name, 'credit': self._num(credit), 'score': self._num(score)})
+            return s
+
+    def search(self, text: str = '', college: Optional[str] = None, classnum: Optional[str] = None,
+               limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Same matching as core.student_matches; college/classnum filters use the indexes.
+        Returned records do not include courses."""
+        where, args = [], []
+        if college is not None:
+            where.append('college = ?')
+            args.append(college)
+        if classnum is not None:
+            where.append('classnum = ?')
+            args.append(classnum)
+        if text:
+            pat = _like(text)
+            where.append("(id LIKE ? ESCAPE '\\' OR name LIKE ? ESCAPE '\\' "
+                         "OR college LIKE ? ESCAPE '\\' OR classnum LIKE ? ESCAPE '\\')")
+            args += [pat] * 4
+        sql = self._SELECT + (' WHERE ' + ' AND '.join(where) if where else '') + ' ORDER BY pk'
+        if limit is not None:
+            sql += ' LIMIT ?'
+            args.append(limit)
+        with self.session() as conn:
+            return [self._student_dict(r) for r in conn.execute(sql, args)]
+
+    def rank(self, group_by: Optional[str] = None, method: str = 'ordinal',
+             top: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Ranking via window functions; same output as core.RankingIndex."""
+        if method not in RANK_METHODS:
+            raise ValueError(f"不支持的排名方式: {method}")
+        if group_by is not None and group_by not in RANK_GROUPS:
+            raise ValueError(f"不支持的分组: {group_by}")
+        # pos (ROW_NUMBER) bounds the per-group cut even for tie-aware methods
+        sql = RANK_SQL.format(fn=_RANK_FN[method], tiebreak=', pk' if method == 'ordinal' else '', part=f"COALESCE({group_by}, '')" if group_by else "''",
+                              gpa=GPA_SQL, where='WHERE pos <= ?' if top is not None else '')
+        with self.session() as conn:
+            rows = conn.execute(sql, [top] if top is not None else []).fetchall()
+        out = []
+        for rank, sid, name, gpa, grp in rows:
+            e = {'rank': rank, 'id': sid, 'name': name, 'gpa': gpa}
+            if group_by:
+                e['group'] = grp
+            out.append(e)
+        return out
+
+
+class SQLiteRoster:
+    def __init__(self, backend: SQLiteBackend):
+        self.backend = backend
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return self.backend.iter_students()
+
+    def __len__(self) -> int:
+        return self.backend.count()
+
+
+def migrate_from_json(db_path: Optional[str] = None) -> int:
+    """One-shot copy of the JSON roster (snapshot + journal) into SQLite. Returns the student count."""
+    from . import core
+    backend = SQLiteBackend(db_path or core.sqlite_path())
+    store = JsonBackend().load_store()
+    if store.duplicates:
+        # The students table cannot hold them; migrating would drop them for good
+        ids = sorted({str(d.get('id')) for d in store.duplicates})
+        raise ValueError(f"数据文件中有 {len(store.duplicates)} 条学号重复的记录，请先修正后再迁移: {', '.join(ids[:20])}")
+    backend.save_all(store.students)
+    return len(store)
+
+
+if __name__ == '__main__':
+    from . import core
+    if len(sys.argv) > 1:
+        core.DATA_FILE = os.path.abspath(sys.argv[1])
+    n = migrate_from_json(sys.argv[2] if len(sys.argv) > 2 else None)
+    print(f"已迁移 {n} 名学生 -> {sys.argv[2] if len(sys.argv) > 2 else core.sqlite_path()}")
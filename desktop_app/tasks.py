@@ -0,0 +1,111 @@
+"""后台任务：在 QThreadPool 中运行 core 里的耗时操作，通过信号回到界面线程。"""
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+
+class TaskCancelled(Exception):
+    """任务被用户取消。"""
+
+
+class TaskSignals(QObject):
+    progress = Signal(object)
+    finished = Signal(object)
+    failed = Signal(object)
+
+
+class Task(QRunnable):
+    """包装一个可调用对象。
+
+    若 ``fn`` 接受 progress 回调，则以 ``progress=`` 关键字传入；该回调在取消后
+    会抛出 TaskCancelled，从而在下一次进度汇报时协作式地终止任务。
+    """
+
+    def __init__(self, name: str, fn: Callable[..., Any], with_progress: bool = True):
+        super().__init__()
+        self.name = name
+        self.fn = fn
+        self.with_progress = with_progress
+        self.cancel_event = threading.Event()
+        self.signals = TaskSignals()
+
+    def report(self, info: Dict[str, Any]) -> None:
+        if self.cancel_event.is_set():
+            raise TaskCancelled(self.name)
+        self.signals.progress.emit(info)
+
+    def run(self):
+        try:
+            if self.with_progress:
+                result = self.fn(progress=self.report)
+            else:
+                result = self.fn()
+        except BaseException as e:  # 交给界面线程处理
+            self.signals.failed.emit(e)
+        else:
+            self.signals.finished.emit(result)
+
+
+class TaskRunner(QObject):
+    """串行执行后台任务：同一时刻只运行一个任务，避免并发修改共享的 StudentStore。"""
+
+    busy_changed = Signal(bool)
+    progress = Signal(str, object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self.current: Optional[Task] = None
+        self._callbacks: Dict[int, tuple] = {}
+
+    def is_busy(self) -> bool:
+        return self.current is not None
+
+    def submit(self, name: str, fn: Callable[..., Any],
+               on_done: Optional[Callable[[Any], None]] = None,
+               on_error: Optional[Callable[[BaseException], None]] = None,
+               with_progress: bool = True) -> Optional[Task]:
+        """提交任务；已有任务在运行时返回 None。回调都在界面线程中执行。"""
+        if self.current is not None:
+            return None
+        task = Task(name, fn, with_progress)
+        task.setAutoDelete(False)
+        # 连接到本对象（位于界面线程）的槽，保证跨线程信号排队执行
+        task.signals.progress.connect(self._on_progress)
+        task.signals.finished.connect(self._on_finished)
+        task.signals.failed.connect(self._on_failed)
+        self._callbacks[id(task.signals)] = (on_done, on_error)
+        self.current = task
+        self.busy_changed.emit(True)
+        self.pool.start(task)
+        return task
+
+    def cancel(self) -> None:
+        if self.current is not None:
+            self.current.cancel_event.set()
+
+    def wait(self, msecs: int = -1) -> bool:
+        return self.pool.waitForDone(msecs)
+
+    def _on_progress(self, info):
+        if self.current is not None:
+            self.progress.emit(self.current.name, info)
+
+    def _finish(self):
+        task = self.current
+        self.current = None
+        callbacks = self._callbacks.pop(id(task.signals), (None, None)) if task else (None, None)
+        self.busy_changed.emit(False)
+        return callbacks
+
+    def _on_finished(self, result):
+        on_done, _ = self._finish()
+        if on_done is not None:
+            on_done(result)
+
+    def _on_failed(self, exc):
+        _, on_error = self._finish()
+        if on_error is not None:
+            on_error(exc)
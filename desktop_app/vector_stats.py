@@ -0,0 +1,258 @@
+"""Optional NumPy-backed GPA, ranking and score statistics.
+
+ScoreArrays flattens a roster into parallel arrays (course id, credit, score)
+with per-student offsets, so every statistic is a handful of whole-array
+operations instead of a Python loop per course. NumPy is optional: check
+HAVE_NUMPY, and fall back to core.calc_gpa / RankingIndex when it is missing.
+"""
+from typing import List, Dict, Any, Optional, Iterable, Sequence
+
+try:
+    import numpy as np
+    HAVE_NUMPY = True
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
+    HAVE_NUMPY = False
+
+from .core import StudentRecord, RANK_METHODS, RANK_GROUPS, _COURSE_NAMES
+
+# Default histogram edges: [0,60) [60,70) [70,80) [80,90) [90,100]
+SCORE_BINS = (0, 60, 70, 80, 90, 100)
+PASS_MARK = 60.0
+
+
+def _group_order(labels: Sequence[Any]) -> List[int]:
+    # Same group order as RankingIndex.groups()
+    return sorted(range(len(labels)), key=lambda i: (labels[i] is None, str(labels[i])))
+
+
+class ScoreArrays:
+    """Flat snapshot of a roster's courses.
+
+    ``offsets[i]:offsets[i + 1]`` is student i's slice of ``course_ids``,
+    ``credits`` and ``scores``; ``owner`` maps each course entry back to its
+    student. The snapshot does not follow later store changes.
+    """
+
+    def __init__(self, students: Iterable[Dict[str, Any]]):
+        if not HAVE_NUMPY:
+            raise RuntimeError("需要安装 numpy 才能使用向量化统计")
+        lock = getattr(students, 'lock', None)
+        if lock is not None:
+            with lock:
+                self._build(list(students))
+        else:
+            self._build(list(students))
+        self._gpas = None
+        self._codes: Dict[str, Any] = {}
+
+    def _build(self, recs: List[Dict[str, Any]]) -> None:
+        self.students = recs
+        n = len(recs)
+        if all(isinstance(s, StudentRecord) for s in recs):
+            # The record arrays are raw buffers already: concatenate without touching each course
+            counts = np.fromiter((len(r.course_ids) for r in recs), dtype=np.int64, count=n)
+            self.course_ids = np.frombuffer(b''.join(r.course_ids for r in recs), dtype=np.uintc)
+            self.credits = np.frombuffer(b''.join(r.credits for r in recs), dtype=np.float64)
+            self.scores = np.frombuffer(b''.join(r.scores for r in recs), dtype=np.float64)
+            self.course_names = list(_COURSE_NAMES)
+        else:
+            table: Dict[Any, int] = {}
+            ids: List[int] = []
+            credits: List[float] = []
+            scores: List[float] = []
+            counts = np.zeros(n, dtype=np.int64)
+            for i, s in enumerate(recs):
+                courses = s.get('courses') or []
+                counts[i] = len(courses)
+                for c in courses:
+                    ids.append(table.setdefault(c.get('name'), len(table)))
+                    credits.append(float(c.get('credit', 0)))
+                    scores.append(float(c.get('score', 0)))
+            self.course_ids = np.array(ids, dtype=np.uintc)
+            self.credits = np.array(credits, dtype=np.float64)
+            self.scores = np.array(scores, dtype=np.float64)
+            self.course_names = list(table)
+        self.offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(counts, out=self.offsets[1:])
+        self.owner = np.repeat(np.arange(n), counts)
+
+    def __len__(self) -> int:
+        return len(self.students)
+
+    # -- GPA and ranking ----------------------------------------------------
+
+    def gpas(self) -> 'np.ndarray':
+        """Credit-weighted average per student (NaN when no credits), same values as calc_gpa."""
+        if self._gpas is None:
+            n = len(self.students)
+            # bincount adds each segment's entries in order, like calc_gpa's loop
+            wsum = np.bincount(self.owner, weights=self.scores * self.credits, minlength=n)
+            csum = np.bincount(self.owner, weights=self.credits, minlength=n)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                self._gpas = np.where(csum > 0, wsum / np.where(csum > 0, csum, 1.0), np.nan)
+        return self._gpas
+
+    def group_codes(self, field: str):
+        """(labels, codes): ``codes[i]`` indexes ``labels`` for student i's ``field`` value."""
+        cached = self._codes.get(field)
+        if cached is None:
+            table: Dict[Any, int] = {}
+            codes = np.fromiter((table.setdefault(s.get(field, ''), len(table)) for s in self.students),
+                                dtype=np.int64, count=len(self.students))
+            cached = self._codes[field] = (list(table), codes)
+        return cached
+
+    def _sorted_groups(self, group_by: Optional[str]):
+        """Group labels in display order and each student's index into them."""
+        if group_by is None:
+            return [None], np.zeros(len(self.students), dtype=np.int64)
+        if group_by not in RANK_GROUPS:
+            raise ValueError(f"不支持的分组: {group_by}")
+        labels, codes = self.group_codes(group_by)
+        order = _group_order(labels)
+        remap = np.empty(len(labels), dtype=np.int64)
+        remap[order] = np.arange(len(labels))
+        return [labels[i] for i in order], remap[codes]
+
+    def rank(self, method: str = 'ordinal', group_by: Optional[str] = None):
+        """Vectorized ranking.
+
+        Returns (order, ranks, labels, groups): ``order`` lists student indexes
+        best first within each group (groups in sorted order, ties in roster
+        order), ``ranks`` the rank of each position, and ``groups[k]`` the index
+        into ``labels`` for position k.
+        """
+        if method not in RANK_METHODS:
+            raise ValueError(f"不支持的排名方式: {method}")
+        labels, gcode = self._sorted_groups(group_by)
+        g = self.gpas()
+        key = np.where(np.isnan(g), np.inf, -g)
+        order = np.lexsort((key, gcode))  # stable: equal GPAs keep roster order
+        sk = key[order]
+        sg = gcode[order]
+        n = len(order)
+        pos = np.arange(n)
+        new_group = np.ones(n, dtype=bool)
+        new_group[1:] = sg[1:] != sg[:-1]
+        start = np.maximum.accumulate(np.where(new_group, pos, 0))
+        if method == 'ordinal':
+            ranks = pos - start + 1
+        else:
+            new_key = new_group.copy()
+            new_key[1:] |= sk[1:] != sk[:-1]
+            if method == 'competition':
+                ranks = np.maximum.accumulate(np.where(new_key, pos, 0)) - start + 1
+            else:
+                runs = np.cumsum(new_key)
+                ranks = runs - runs[start] + 1 if n else runs
+        return order, ranks, labels, sg
+
+    def ranking(self, method: str = 'ordinal', group_by: Optional[str] = None,
+                top: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Rows in the rank_students() format: {'rank', 'id', 'name', 'gpa'[, 'group']}."""
+        order, ranks, labels, sg = self.rank(method, group_by)
+        keep = np.arange(len(order))
+        if top is not None and len(order):
+            new_group = np.ones(len(order), dtype=bool)
+            new_group[1:] = sg[1:] != sg[:-1]
+            start = np.maximum.accumulate(np.where(new_group, keep, 0))
+            keep = keep[keep - start < top]
+        g = self.gpas().tolist()
+        students = self.students
+        out = []
+        for i, rank, grp in zip(order[keep].tolist(), ranks[keep].tolist(), sg[keep].tolist()):
+            s = students[i]
+            v = g[i]
+            row = {'rank': rank, 'id': s.get('id'), 'name': s.get('name', ''), 'gpa': None if v != v else v}
+            if group_by is not None:
+                row['group'] = labels[grp]
+            out.append(row)
+        return out
+
+    # -- score statistics ---------------------------------------------------
+
+    def course_stats(self) -> Dict[Any, Dict[str, float]]:
+        """Per course name: count, mean, median, std (population), min and max of scores."""
+        if not len(self.scores):
+            return {}
+        # Course ids are small integers, so bincount finds the used ones without sorting
+        used = np.flatnonzero(np.bincount(self.course_ids))
+        remap = np.zeros(int(used[-1]) + 1, dtype=np.uint16 if len(used) < 1 << 16 else np.int64)
+        remap[used] = np.arange(len(used))
+        inv = remap[self.course_ids]
+        counts = np.bincount(inv)
+        mean = np.bincount(inv, weights=self.scores) / counts
+        std = np.sqrt(np.bincount(inv, weights=(self.scores - mean[inv]) ** 2) / counts)
+        # Sort by score, then stably by course (radix sort on the small ids):
+        # medians, minimums and maximums become index lookups
+        o = np.argsort(self.scores)
+        s = self.scores[o[np.argsort(inv[o], kind='stable')]]
+        start = np.zeros(len(used), dtype=np.int64)
+        np.cumsum(counts[:-1], out=start[1:])
+        median = (s[start + (counts - 1) // 2] + s[start + counts // 2]) / 2
+        stats = {}
+        names = self.course_names
+        for k in sorted(range(len(used)), key=lambda k: str(names[used[k]])):
+            stats[names[used[k]]] = {
+                'count': int(counts[k]), 'mean': float(mean[k]), 'median': float(median[k]),
+                'std': float(std[k]), 'min': float(s[start[k]]), 'max': float(s[start[k] + counts[k] - 1]),
+            }
+        return stats
+
+    def _course_mask(self, course: Any):
+        if course is None:
+            return None
+        try:
+            cid = self.course_names.index(course)
+        except ValueError:
+            return np.zeros(len(self.scores), dtype=bool)
+        return self.course_ids == cid
+
+    def histogram(self, bins: Sequence[float] = SCORE_BINS, course: Any = None,
+                  group_by: Optional[str] = None):
+        """Score counts per bin; the last bin includes its upper edge, scores outside are ignored.
+
+        Returns a list of counts, or {group: counts} with ``group_by``.
+        ``course`` limits the counts to one course.
+        """
+        edges = np.asarray(bins, dtype=np.float64)
+        nb = len(edges) - 1
+        idx = np.searchsorted(edges, self.scores, side='right') - 1
+        idx[self.scores == edges[-1]] = nb - 1
+        ok = (idx >= 0) & (idx < nb)
+        mask = self._course_mask(course)
+        if mask is not None:
+            ok &= mask
+        labels, gcode = self._sorted_groups(group_by)
+        flat = gcode[self.owner][ok] * nb + idx[ok]
+        counts = np.bincount(flat, minlength=len(labels) * nb).reshape(len(labels), nb)
+        if group_by is None:
+            return counts[0].tolist()
+        return {label: counts[i].tolist() for i, label in enumerate(labels)}
+
+    def pass_rates(self, group_by: Optional[str] = 'college', pass_mark: float = PASS_MARK,
+                   course: Any = None) -> Dict[Any, Dict[str, Any]]:
+        """Per group: course entries, how many passed, the pass rate, and how many
+        students (with at least one course) passed every course."""
+        labels, gcode = self._sorted_groups(group_by)
+        ng = len(labels)
+        mask = self._course_mask(course)
+        owner = self.owner if mask is None else self.owner[mask]
+        passed = (self.scores if mask is None else self.scores[mask]) >= pass_mark
+        entries = np.bincount(gcode[owner], minlength=ng)
+        ok = np.bincount(gcode[owner], weights=passed, minlength=ng)
+        # A student passed everything when their entry count equals their pass count
+        n = len(self.students)
+        per_student = np.bincount(owner, minlength=n)
+        per_student_ok = np.bincount(owner, weights=passed, minlength=n)
+        has = per_student > 0
+        all_ok = np.bincount(gcode[has], weights=(per_student_ok[has] == per_student[has]), minlength=ng)
+        students = np.bincount(gcode[has], minlength=ng)
+        out = {}
+        for i, label in enumerate(labels):
+            out[label] = {
+                'students': int(students[i]), 'entries': int(entries[i]), 'passed': int(ok[i]),
+                'rate': float(ok[i] / entries[i]) if entries[i] else None, 'all_passed': int(all_ok[i]),
+            }
+        return out
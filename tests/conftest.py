@@ -0,0 +1,24 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from desktop_app import core
+
+
+@pytest.fixture
+def app_home(tmp_path, monkeypatch):
+    """Point core's data and export paths at a temporary directory (JSON backend)."""
+    monkeypatch.delenv('SIMS_BACKEND', raising=False)
+    monkeypatch.delenv('SIMS_FORMAT', raising=False)
+    monkeypatch.setattr(core, 'DATA_FILE', str(tmp_path / 'data' / 'students.json'))
+    monkeypatch.setattr(core, 'EXPORT_DIR', str(tmp_path / 'exports'))
+    monkeypatch.setattr(core, 'EXPORT_METADATA', str(tmp_path / 'exports' / 'exports.json'))
+    return tmp_path
+
+
+def student(sid, name='张三', **fields):
+    s = {'id': sid, 'name': name, 'college': '计算机学院', 'classnum': '1班', 'province': '广东', 'courses': []}
+    s.update(fields)
+    return s
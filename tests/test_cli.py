@@ -0,0 +1,20 @@
+import os
+
+from desktop_app import cli, core, serialization
+
+from conftest import student
+
+
+def test_data_option_moves_exports_next_to_the_file(app_home, tmp_path):
+    other = tmp_path / 'other' / 'roster.json'
+    other.parent.mkdir()
+    serialization.dump(str(other), [student('1')])
+    # cli.main() repoints core's paths; app_home's monkeypatch restores them
+    assert cli.main(['--data', str(other), 'export', 'csv']) == 0
+    exports = tmp_path / 'other' / 'exports'
+    assert core.EXPORT_METADATA == str(exports / 'exports.json')
+    assert any(n.endswith('.csv') for n in os.listdir(exports))
+    assert not (app_home / 'exports').exists()
+
+    assert cli.main(['--data', str(other), '--export-dir', str(tmp_path / 'out'), 'export', 'csv']) == 0
+    assert os.path.exists(tmp_path / 'out' / 'exports.json')
@@ -0,0 +1,107 @@
+import os
+import threading
+
+from desktop_app import core
+
+from conftest import student
+
+
+def test_export_writes_outside_the_store_lock(app_home):
+    store = core.StudentStore([student(str(i)) for i in range(5)])
+    free = []
+
+    def progress(info):
+        # Another thread (an editor) must be able to take the lock while the file is written
+        t = threading.Thread(target=lambda: free.append(store.lock.acquire(blocking=False)
+                                                        and (store.lock.release() or True)))
+        t.start()
+        t.join()
+
+    core.export_students_csv(str(app_home / 'out.csv'), store=store, progress=progress)
+    assert free and all(free)
+
+
+def test_delta_after_torn_change_log(app_home):
+    core.save_students([student('1', 'a'), student('2', 'b'), student('3', 'c')])
+    store = core.load_store()
+    core.export_students_csv(store=store)
+    store.update('1', {'name': 'A'})
+    core.save_store(store)
+    with open(core.changes_path(), 'ab') as f:
+        f.write(b'["u","')  # interrupted append
+
+    store = core.load_store()
+    store.update('2', {'name': 'B'})
+    core.save_store(store)
+    _, manifest = core.export_students_delta(store=store)
+    assert manifest['rows'] == {'added': 0, 'changed': 2, 'deleted': 0, 'total': 2}
+    with open(core.changes_path(), 'rb') as f:
+        assert all(line.endswith(b'\n') for line in f)
+
+
+def test_xlsx_export_records_row_count(app_home):
+    store = core.StudentStore([student('1'), student('2', college='外语学院')])
+    for fast in (True, False):
+        core.export_students_xlsx(store=store, fast=fast, where=lambda s: s['college'] == '计算机学院')
+        assert core.export_history()[-1]['rows'] == 1
+
+
+def test_delta_lists_added_changed_and_deleted(app_home):
+    core.save_students([student('1', 'a'), student('2', 'b'), student('3', 'c')])
+    store = core.load_store()
+    full = core.export_students_csv(store=store)
+    store.update('1', {'name': 'A'})
+    store.remove('2')
+    store.add(student('4', 'd'))
+    store.add(student('5', 'e'))
+    store.remove('5')  # added and deleted again: not in the delta
+    core.save_store(store)
+
+    path, manifest = core.export_students_delta(store=store)
+    assert manifest['baseline'] == os.path.basename(full)
+    assert manifest['rows'] == {'added': 1, 'changed': 1, 'deleted': 1, 'total': 3}
+    with open(path, encoding='utf-8-sig') as f:
+        rows = sorted(line.split(',')[:3] for line in f.read().splitlines()[1:])
+    assert rows == [['added', '4', 'd'], ['changed', '1', 'A'], ['deleted', '2', '']]
+
+    # The delta is the next baseline: nothing has changed since
+    _, manifest = core.export_students_delta(store=store)
+    assert manifest['rows']['total'] == 0
+
+
+def test_saved_roster_export_streams(app_home, monkeypatch):
+    core.save_students([student(str(i)) for i in range(10)])
+    monkeypatch.setattr(core, 'EXPORT_CHUNK_ROWS', 2)
+    built, at_first_chunk = [], []
+    export_row = core._export_row
+    monkeypatch.setattr(core, '_export_row', lambda *a: built.append(1) or export_row(*a))
+    core.export_students_csv(str(app_home / 'out.csv'),
+                             progress=lambda info: at_first_chunk or at_first_chunk.append(len(built)))
+    # Rows of the saved roster are built as they are written, not collected up front
+    assert at_first_chunk == [2]
+
+
+def test_csv_escaping_and_column_order(app_home):
+    import csv
+    tricky = ['a\rb', '"quoted" start', '=SUM(A1:A2)', 'x,y', 'line\nbreak']
+    store = core.StudentStore([
+        student('1', tricky[0], college=tricky[1], classnum=tricky[2], province=tricky[3], phone=tricky[4],
+                courses=[{'name': '高等数学', 'credit': 4, 'score': 90}]),
+        student('2', courses=[{'name': '线性代数', 'credit': 2, 'score': 70}]),
+    ])
+    path = core.export_students_csv(str(app_home / 'out.csv'), store=store)
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == [core.STUDENT_LABELS[k] for k in core.STUDENT_FIELDS]
+    first = dict(zip(core.STUDENT_FIELDS, rows[1]))
+    # Every value comes back exactly as stored
+    assert [first[k] for k in ('name', 'college', 'classnum', 'province', 'phone')] == tricky
+    assert len(rows) == 3
+
+    path = core.export_students_csv(str(app_home / 'cols.csv'), columns=['name', 'id', 'gpa'],
+                                    course_columns=True, store=store)
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        rows = list(csv.reader(f))
+    assert rows == [['姓名', '学号', 'GPA', '高等数学', '线性代数'],
+                    [tricky[0], '1', '90.0', '90', ''],
+                    ['张三', '2', '70.0', '', '70']]
@@ -0,0 +1,110 @@
+import pytest
+
+from desktop_app import core
+
+from conftest import student
+
+
+def _score_file(path, rows):
+    path.write_text(''.join(f"{sid},{course},{credit},{score}\n" for sid, course, credit, score in rows),
+                    encoding='utf-8')
+    return str(path)
+
+
+def test_chunked_import_cancelled_partway(app_home):
+    core.save_students([student(str(i)) for i in range(6)])
+    rows = [(str(i), '高等数学', 4, 60 + i) for i in range(6)] + [('999', '高等数学', 4, 80)]
+    path = _score_file(app_home / 'scores.csv', rows)
+    seen = []
+
+    # Saved roster: a cancelled import saves nothing
+    with pytest.raises(core.ImportCancelled) as e:
+        core.import_scores(path, progress=seen.append, cancel=lambda: len(seen) == 1, chunk_size=3)
+    assert (e.value.total, e.value.applied) == (3, 3)
+    assert all(not s['courses'] for s in core.load_store())
+
+    # In-memory store: whole chunks applied so far stay, through the store's events
+    store = core.load_store()
+    ranking = core.RankingIndex(store)
+    seen.clear()
+    with pytest.raises(core.ImportCancelled):
+        core.import_scores(path, progress=seen.append, cancel=lambda: len(seen) == 1, chunk_size=3, store=store)
+    assert [s['id'] for s in store if s['courses']] == ['0', '1', '2']
+    assert store.verify_gpa_cache() == []
+    assert [r['id'] for r in ranking.top_k(3)] == ['2', '1', '0']
+
+    # Finishing the import applies the rest and counts the unknown id
+    assert core.import_scores(path, chunk_size=3) == (7, 6, 1)
+    assert core.load_store().gpa('5') == 65
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_batch_import_last_writer_wins(app_home, workers):
+    core.save_students([student('1'), student('2')])
+    d = app_home / 'batch'
+    d.mkdir()
+    _score_file(d / 'a.csv', [('1', '高等数学', 4, 70), ('2', '高等数学', 4, 50), ('1', '高等数学', 4, 75)])
+    _score_file(d / 'b.csv', [('1', '高等数学', 4, 90), ('3', '高等数学', 4, 99)])
+    extra = _score_file(app_home / 'c.csv', [('2', '高等数学', 2, 65)])
+
+    # A directory's files count by name, then the files given after it
+    result = core.import_scores_batch([str(d), extra], workers=workers)
+    assert list(result.values()) == [(3, 3, 0), (2, 1, 1), (1, 1, 0)]
+    store = core.load_store()
+    assert store.get('1')['courses'] == [{'name': '高等数学', 'credit': 4, 'score': 90}]
+    assert store.get('2')['courses'] == [{'name': '高等数学', 'credit': 2, 'score': 65}]
+
+
+def _student_csv(path, lines):
+    path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    return str(path)
+
+
+@pytest.fixture
+def roster_with_scores(app_home):
+    core.save_students([student('1', 'a', courses=[{'name': '高等数学', 'credit': 4, 'score': 80}]),
+                        student('2', 'b'), student('3', 'c')])
+
+
+def test_import_students_modes(app_home, roster_with_scores):
+    path = _student_csv(app_home / 'in.csv', ['学号,姓名,学院', '1,A,计算机学院', '2,b,计算机学院', '4,d,外语学院'])
+
+    result = core.import_students(path, 'insert')
+    assert (result['added'], result['updated'], result['skipped']) == (1, 0, 2)
+    assert core.load_store().get('1')['name'] == 'a'
+
+    result = core.import_students(path, 'upsert')
+    assert (result['added'], result['updated'], result['unchanged']) == (0, 1, 2)
+    store = core.load_store()
+    assert store.get('1')['name'] == 'A'
+    assert store.get('1')['courses'] == [{'name': '高等数学', 'credit': 4, 'score': 80}]
+
+    result = core.import_students(path, 'replace')
+    assert result['removed'] == 1
+    store = core.load_store()
+    assert [s['id'] for s in store] == ['1', '2', '4']
+    assert store.gpa('1') == 80  # kept their courses
+
+
+def test_import_students_validation(app_home, roster_with_scores):
+    path = _student_csv(app_home / 'bad.csv', [
+        'id,name,age,宿舍',
+        '5,e,20,x',
+        ',nobody,20,x',        # no id
+        '6,,20,x',             # no name
+        '7,g,twenty,x',        # bad age
+        '5,e2,21,x',           # repeated in the file
+    ])
+    parsed = core.parse_student_file(path)
+    assert [s['id'] for s in parsed['students']] == ['5']
+    assert parsed['students'][0]['age'] == 20
+    assert [line for line, _ in parsed['errors']] == [1, 3, 4, 5, 6]  # line 1: unknown column
+
+    # Replace refuses a file with rejected rows; nothing changes
+    with pytest.raises(ValueError):
+        core.import_students(path, 'replace')
+    assert [s['id'] for s in core.load_store()] == ['1', '2', '3']
+    result = core.import_students(path, 'upsert')
+    assert (result['added'], result['skipped']) == (1, 4)
+    with pytest.raises(ValueError):
+        core.import_students(path, 'merge')
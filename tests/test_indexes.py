@@ -0,0 +1,125 @@
+import random
+
+import pytest
+
+from desktop_app import core
+
+from conftest import student
+
+COLLEGES = ['计算机学院', '外语学院', '数学学院']
+COURSES = ['高等数学', '线性代数', '大学英语', '程序设计']
+NAMES = ['张三', '李四', '王五', '赵六', '张伟', '李娜']
+
+
+def _random_student(rng, sid):
+    courses = [{'name': c, 'credit': rng.choice([1, 2, 3, 4]), 'score': rng.randint(0, 100)}
+               for c in rng.sample(COURSES, rng.randint(0, 3))]
+    return student(sid, rng.choice(NAMES), college=rng.choice(COLLEGES),
+                   classnum=f"{rng.randint(1, 3)}班", courses=courses)
+
+
+def _random_edits(rng, store, n):
+    next_id = len(store)
+    for _ in range(n):
+        ids = [s['id'] for s in store]
+        op = rng.randrange(7)
+        if op == 0 or not ids:
+            store.add(_random_student(rng, f"S{next_id}"))
+            next_id += 1
+            continue
+        sid = rng.choice(ids)
+        if op == 1:
+            store.update(sid, {'name': rng.choice(NAMES), 'college': rng.choice(COLLEGES)})
+        elif op == 2:
+            store.update(sid, {'id': f"S{next_id}"})
+            next_id += 1
+        elif op == 3:
+            store.set_score(sid, rng.choice(COURSES), rng.choice([1, 2, 3]), rng.randint(0, 100))
+        elif op == 4:
+            names = [c['name'] for c in store.get(sid)['courses']]
+            new = rng.choice(COURSES)
+            if names and new not in names:
+                store.rename_course(sid, rng.choice(names), new, 2, rng.randint(0, 100))
+        elif op == 5:
+            store.remove_course(sid, rng.choice(COURSES))
+        else:
+            store.remove(sid)
+
+
+@pytest.fixture
+def edited():
+    """A store with indexes attached before a run of random edits, and a fresh
+    store holding the same records, to recompute everything from scratch."""
+    rng = random.Random(7)
+    store = core.StudentStore(_random_student(rng, f"S{i}") for i in range(200))
+    live = {
+        'rank': core.RankingIndex(store),
+        'rank_college': core.RankingIndex(store, 'college'),
+        'search': core.SearchIndex(store),
+        'stats': core.StatsEngine(store),
+    }
+    _random_edits(rng, store, 1500)
+    fresh = core.StudentStore(s.to_dict() for s in store)
+    return store, live, fresh
+
+
+def test_record_gpa_sums_match_recompute(edited):
+    store, _, _ = edited
+    assert store.verify_gpa_cache() == []
+    for s in store:
+        expected = core.calc_gpa(s.to_dict()['courses'])
+        assert (s.gpa() is None) == (expected is None)
+        if expected is not None:
+            assert s.gpa() == pytest.approx(expected)
+
+
+@pytest.mark.parametrize('key,group_by', [('rank', None), ('rank_college', 'college')])
+def test_ranking_index_matches_recompute(edited, key, group_by):
+    store, live, fresh = edited
+    idx, full = live[key], core.RankingIndex(fresh, group_by)
+    assert idx.groups() == full.groups()
+    for method in core.RANK_METHODS:
+        if method == 'ordinal':
+            continue  # order among equal GPAs depends on edit history
+        for s in store:
+            assert idx.rank_of(s['id'], method) == full.rank_of(s['id'], method)
+
+
+def test_search_index_matches_scan(edited):
+    store, live, _ = edited
+    for q in ['', '张', '李四', 's1', '计算机', '2班', 'S19', '不存在']:
+        expected = [s['id'] for s in store if core.student_matches(s, q)]
+        assert live['search'].search(q) == expected
+
+
+def test_stats_engine_matches_recompute(edited):
+    _, live, fresh = edited
+    full = core.StatsEngine(fresh)
+    for dim in core.STATS_DIMENSIONS:
+        table, expected = live['stats'].table(dim), full.table(dim)
+        assert list(table) == list(expected)
+        for group, agg in table.items():
+            want = expected[group]
+            for k in ('students', 'count', 'min', 'max', 'histogram'):
+                assert agg[k] == want[k], (dim, group, k)
+            for k in ('mean', 'std'):
+                assert agg[k] == pytest.approx(want[k], abs=1e-6)
+    assert live['stats'].summary()['count'] == full.summary()['count']
+
+
+def test_stats_extremes_are_exact():
+    store = core.StudentStore([
+        student('1', courses=[{'name': '高等数学', 'credit': 3, 'score': 90.004}]),
+        student('2', courses=[{'name': '高等数学', 'credit': 1, 'score': 70.126},
+                              {'name': '大学英语', 'credit': 2, 'score': 80}]),
+    ])
+    engine = core.StatsEngine(store)
+    course = engine.stats('course', '高等数学')
+    assert (course['min'], course['max']) == (70.126, 90.004)
+    gpa = engine.stats('college', '计算机学院')
+    assert gpa['max'] == store.gpa('1') and gpa['min'] == store.gpa('2')
+
+    store.set_score('1', '高等数学', 3, 99.999)
+    store.remove('2')
+    course = engine.stats('course', '高等数学')
+    assert (course['min'], course['max']) == (99.999, 99.999)
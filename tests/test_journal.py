@@ -0,0 +1,63 @@
+import os
+
+from desktop_app import core
+
+from conftest import student
+
+
+def test_journal_round_trip(app_home):
+    core.save_students([student('1', 'a'), student('2', 'b')])
+    store = core.load_store()
+    store.update('2', {'name': 'B'})
+    store.set_score('1', '高等数学', 4, 91)
+    store.add(student('3', 'c'))
+    store.remove('1')
+    core.save_store(store)
+
+    again = core.load_store()
+    assert [s['id'] for s in again] == ['2', '3']
+    assert again.get('2')['name'] == 'B'
+
+
+def test_journal_compaction(app_home, monkeypatch):
+    monkeypatch.setattr(core, 'JOURNAL_COMPACT_MIN_BYTES', 200)
+    core.save_students([student(str(i)) for i in range(3)])
+    store = core.load_store()
+    store.set_score('0', '高等数学', 4, 80)
+    core.save_store(store)
+    assert os.path.exists(core.journal_path())  # small: appended only
+
+    for score in range(10):
+        store.set_score('1', '线性代数', 3, 60 + score)
+    store.update('2', {'name': '李四'})
+    core.save_store(store)
+    assert not os.path.exists(core.journal_path())  # folded into the snapshot
+
+    again = core.load_store()
+    assert again.get('0')['courses'] == [{'name': '高等数学', 'credit': 4, 'score': 80}]
+    assert again.get('1')['courses'] == [{'name': '线性代数', 'credit': 3, 'score': 69}]
+    assert again.get('2')['name'] == '李四'
+    again.remove('0')
+    core.save_store(again)
+    assert [s['id'] for s in core.load_store()] == ['1', '2']
+
+
+def test_torn_tail_then_append(app_home):
+    core.save_students([student('1', 'a'), student('2', 'b')])
+    store = core.load_store()
+    store.update('1', {'name': 'A'})
+    core.save_store(store)
+    # A crash in the middle of the next append leaves a line without its newline
+    with open(core.journal_path(), 'ab') as f:
+        f.write(b'{"op":"edit","id":"2","se')
+
+    store = core.load_store()
+    assert store.get('2')['name'] == 'b'
+    store.update('2', {'name': 'B2'})
+    core.save_store(store)
+
+    again = core.load_store()
+    assert again.get('1')['name'] == 'A'
+    assert again.get('2')['name'] == 'B2'
+    with open(core.journal_path(), 'rb') as f:
+        assert all(core.serialization.loads(line) for line in f)
@@ -0,0 +1,58 @@
+import pytest
+
+from desktop_app import core, serialization
+
+from conftest import student
+
+ROSTER = [student('1', '张三', age=19, courses=[{'name': '高等数学', 'credit': 4, 'score': 91.5}]),
+          student('2', '李四', note='extra field'), student('3', 'O\'Brien "x"\n')]
+
+
+@pytest.mark.parametrize('fmt', serialization.available_formats())
+def test_round_trip_and_detect(tmp_path, fmt):
+    path = str(tmp_path / 'students.dat')
+    serialization.dump(path, ROSTER, fmt)
+    assert serialization.detect_format(path) == fmt
+    assert serialization.load(path) == ROSTER
+
+
+@pytest.mark.parametrize('fmt', serialization.available_formats())
+def test_store_round_trip_in_each_format(app_home, monkeypatch, fmt):
+    monkeypatch.setenv('SIMS_FORMAT', fmt)
+    core.save_students(ROSTER)
+    store = core.load_store()
+    store.set_score('2', '线性代数', 3, 70)
+    core.get_backend().compact(store)
+    assert serialization.detect_format(core.DATA_FILE) == fmt
+    again = core.load_store()
+    assert [s.to_dict() for s in again][0] == ROSTER[0]
+    assert again.get('2')['note'] == 'extra field'
+    assert again.gpa('2') == 70
+
+
+def test_detect_format_rejects_unknown(tmp_path):
+    path = tmp_path / 'x.bin'
+    path.write_bytes(b'\x00\x01garbage')
+    with pytest.raises(ValueError):
+        serialization.detect_format(str(path))
+    (tmp_path / 'bom.json').write_bytes(b'\xef\xbb\xbf  [{"id": "1"}]')
+    assert serialization.detect_format(str(tmp_path / 'bom.json')) == 'json'
+
+
+def test_record_file_get(tmp_path):
+    path = str(tmp_path / 'students.rec')
+    serialization.dump(path, ROSTER, 'records')
+    with serialization.RecordFile(path) as rf:
+        assert len(rf) == 3 and '2' in rf
+        assert rf.get('3') == ROSTER[2]
+        assert rf.get('1', object_hook=core.StudentRecord).gpa() == 91.5
+        assert rf.get('nope') is None
+        assert list(rf.iter_records()) == ROSTER
+
+    # A file cut short (interrupted write) is refused, not misread
+    with open(path, 'rb') as f:
+        data = f.read()
+    with open(path, 'wb') as f:
+        f.write(data[:-4])
+    with pytest.raises(ValueError):
+        serialization.RecordFile(path)
@@ -0,0 +1,60 @@
+import asyncio
+import threading
+
+from desktop_app import core, server
+
+from conftest import student
+
+
+async def _exchange(port, raw):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(raw)
+    await writer.drain()
+    data = await asyncio.wait_for(reader.read(), 5)  # until the server closes the connection
+    writer.close()
+    return data
+
+
+def _run(store, fn):
+    async def main():
+        srv = server.RosterServer(server.RosterService(store), port=0)
+        await srv.start()
+        try:
+            return await fn(srv.port)
+        finally:
+            srv.server.close()
+    return asyncio.run(main())
+
+
+def test_bad_content_length_closes_connection(app_home):
+    store = core.StudentStore([student('1')])
+    data = _run(store, lambda port: _exchange(
+        port, b'POST /scores HTTP/1.1\r\nContent-Length: abc\r\n\r\nGET /health HTTP/1.1\r\n\r\n'))
+    assert data.startswith(b'HTTP/1.1 400')
+    assert b'Connection: close' in data
+    assert data.count(b'HTTP/1.1') == 1
+
+
+def test_read_waits_for_lock_off_the_event_loop(app_home):
+    store = core.StudentStore([student('1')])
+    held, release = threading.Event(), threading.Event()
+
+    def writer():
+        with store.lock:
+            held.set()
+            release.wait(5)
+
+    async def fn(port):
+        t = threading.Thread(target=writer)
+        t.start()
+        held.wait(5)
+        pending = asyncio.ensure_future(_exchange(port, b'GET /health HTTP/1.1\r\nConnection: close\r\n\r\n'))
+        # The loop keeps running while the read waits for the lock
+        await asyncio.sleep(0.1)
+        assert not pending.done()
+        release.set()
+        data = await pending
+        t.join()
+        return data
+
+    assert _run(store, fn).startswith(b'HTTP/1.1 200')
@@ -0,0 +1,55 @@
+import pytest
+
+from desktop_app import core, sqlite_backend
+
+from conftest import student
+
+
+def _roster():
+    return [student('1', '张三', age=19, note='extra', courses=[{'name': '高等数学', 'credit': 4, 'score': 90},
+                                                            {'name': '大学英语', 'credit': 2, 'score': 75}]),
+            student('2', '李四', college='外语学院', courses=[{'name': '高等数学', 'credit': 4, 'score': 82}]),
+            student('3', '王五')]
+
+
+def _plain(store):
+    return [s.to_dict() for s in store]
+
+
+def test_migrate_from_json(app_home):
+    core.save_students(_roster())
+    store = core.load_store()
+    store.set_score('3', '线性代数', 3, 66)  # journaled, not yet in the snapshot
+    core.save_store(store)
+
+    db = str(app_home / 'students.db')
+    assert sqlite_backend.migrate_from_json(db) == 3
+    assert _plain(sqlite_backend.SQLiteBackend(db).load_store()) == _plain(core.load_store())
+
+
+def test_sqlite_round_trip(app_home, monkeypatch):
+    monkeypatch.setenv('SIMS_BACKEND', 'sqlite')
+    core.save_students(_roster())
+    store = core.load_store()
+    assert _plain(store) == _roster()
+
+    store.set_score('2', '大学英语', 2, 88)
+    store.rename_course('1', '大学英语', '英语写作', 2, 79)
+    store.remove_course('1', '高等数学')
+    store.update('3', {'id': '4', 'name': '王五五'})
+    store.add(student('5', '赵六', courses=[{'name': '程序设计', 'credit': 3, 'score': 95}]))
+    store.remove('2')
+    core.save_store(store)
+
+    again = core.load_store()
+    assert _plain(again) == _plain(store)
+    assert core.rank_students(method='competition') == core.rank_students(method='competition', store=store)
+
+
+def test_sqlite_rejects_repeated_course_names(app_home, monkeypatch):
+    monkeypatch.setenv('SIMS_BACKEND', 'sqlite')
+    core.save_students(_roster())
+    twice = [{'name': '高等数学', 'credit': 4, 'score': 60}, {'name': '高等数学', 'credit': 4, 'score': 70}]
+    with pytest.raises(ValueError):
+        core.save_students([student('9', courses=twice)])
+    assert _plain(core.load_store()) == _roster()  # rolled back, nothing lost
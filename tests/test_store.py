@@ -0,0 +1,83 @@
+import pytest
+
+from desktop_app import core
+
+from conftest import student
+
+
+def test_course_views_are_read_only(app_home):
+    core.save_students([student('1', courses=[{'name': '高等数学', 'credit': 4, 'score': 80}])])
+    store = core.load_store()
+    courses = store.get('1')['courses']
+    with pytest.raises(TypeError):
+        courses[0]['score'] = 99
+    with pytest.raises(TypeError):
+        courses.append({'name': '线性代数', 'credit': 3, 'score': 70})
+    with pytest.raises(TypeError):
+        del courses[0]
+    assert courses == [{'name': '高等数学', 'credit': 4, 'score': 80}]
+
+    # The store path emits events, so the edit survives a save and reload
+    store.set_score('1', '高等数学', 4, 99)
+    core.save_store(store)
+    assert core.load_store().get('1')['courses'] == [{'name': '高等数学', 'credit': 4, 'score': 99}]
+
+
+def test_duplicate_ids_on_load_keep_first(app_home):
+    core.save_students([student('1', 'a'), student('2', 'b'), student('1', 'a2')])
+    store = core.load_store()
+    assert [s['id'] for s in store] == ['1', '2']
+    assert store.get('1')['name'] == 'a'
+    assert [d['name'] for d in store.duplicates] == ['a2']
+    with pytest.raises(ValueError):
+        store.add(student('2', 'b2'))
+
+    # A full snapshot keeps the set-aside copy until the file is fixed
+    store.update('2', {'name': 'B'})
+    core.get_backend().compact(store)
+    assert [s['name'] for s in core.serialization.load(core.DATA_FILE)] == ['a', 'B', 'a2']
+
+
+def test_validate_reports_duplicate_ids(app_home, capsys):
+    from desktop_app import cli
+    core.save_students([student('1', 'a'), student('1', 'a2')])
+    assert cli.main(['validate']) == 1
+    assert '1: 学号重复' in capsys.readouterr().out
+
+
+def test_load_students_returns_plain_dicts(app_home):
+    import json
+    core.save_students([student('1', courses=[{'name': '高等数学', 'credit': 4, 'score': 80}])])
+    students = core.load_students()
+    assert type(students[0]) is dict
+    json.dumps(students)
+    students[0]['courses'].append({'name': '线性代数', 'credit': 3, 'score': 70})
+    core.save_students(students)
+    assert len(core.load_store().get('1')['courses']) == 2
+
+
+def test_remove_many_and_update_many(app_home):
+    core.save_students([student(str(i), f"s{i}") for i in range(6)])
+    store = core.load_store()
+    students = store.students
+    ranking = core.RankingIndex(store)
+
+    with pytest.raises(KeyError):
+        store.remove_many(['1', 'nope'])
+    assert len(store) == 6  # nothing removed
+    removed = store.remove_many(['4', '1', '1'])
+    assert [s['id'] for s in removed] == ['4', '1']
+    assert [s['id'] for s in students] == ['0', '2', '3', '5']  # same list, updated in place
+    assert [store.index_of(sid) for sid in ('0', '2', '3', '5')] == [0, 1, 2, 3]
+    assert ranking.rank_of('1') is None and ranking.size() == 4
+
+    with pytest.raises(KeyError):
+        store.update_many(['0', 'nope'], {'classnum': '2班'})
+    with pytest.raises(ValueError):
+        store.update_many(['0', '2'], {'id': 'x'})
+    assert store.update_many(['0', '5'], {'classnum': '2班'}) == 2
+    core.save_store(store)
+
+    again = core.load_store()
+    assert [s['id'] for s in again] == ['0', '2', '3', '5']
+    assert [s['classnum'] for s in again] == ['2班', '1班', '1班', '2班']
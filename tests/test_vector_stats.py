@@ -0,0 +1,69 @@
+import math
+import random
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from desktop_app import core, vector_stats
+
+from conftest import student
+
+COURSES = ['高等数学', '线性代数', '大学英语', '程序设计']
+
+
+def _roster():
+    rng = random.Random(3)
+    out = []
+    for i in range(120):
+        courses = [{'name': c, 'credit': rng.choice([1, 2, 3, 4]), 'score': rng.randint(40, 100)}
+                   for c in rng.sample(COURSES, rng.randint(0, 4))]
+        out.append(student(f"S{i}", college=rng.choice(['计算机学院', '外语学院']), courses=courses))
+    # Tied GPAs, in and across groups
+    same = [{'name': '高等数学', 'credit': 4, 'score': 88}]
+    out += [student('T1', courses=same), student('T2', courses=same),
+            student('T3', college='外语学院', courses=same)]
+    return out
+
+
+@pytest.fixture(params=['records', 'dicts'])
+def roster(request):
+    """The same roster as a StudentStore (record arrays) and as plain dicts."""
+    store = core.StudentStore(_roster())
+    return store, (store if request.param == 'records' else [s.to_dict() for s in store])
+
+
+def test_gpas_match_calc_gpa(roster):
+    store, students = roster
+    gpas = vector_stats.ScoreArrays(students).gpas()
+    for s, g in zip(store, gpas.tolist()):
+        expected = core.calc_gpa(s['courses'])
+        if expected is None:
+            assert math.isnan(g)
+        else:
+            assert g == pytest.approx(expected)
+
+
+@pytest.mark.parametrize('group_by', [None, 'college'])
+@pytest.mark.parametrize('method', core.RANK_METHODS)
+def test_rank_matches_ranking_index(roster, method, group_by):
+    store, students = roster
+    rows = vector_stats.ScoreArrays(students).ranking(method, group_by)
+    expected = core.RankingIndex(store, group_by).ranking(method)
+    assert [(r['id'], r['rank']) for r in rows] == [(r['id'], r['rank']) for r in expected]
+    if method == 'competition' and group_by is None:
+        ranks = {r['id']: r['rank'] for r in rows}
+        assert ranks['T1'] == ranks['T2'] == ranks['T3']
+
+
+def test_course_stats_match_stats_engine(roster):
+    store, students = roster
+    stats = vector_stats.ScoreArrays(students).course_stats()
+    engine = core.StatsEngine(store)
+    assert sorted(stats) == sorted(engine.groups('course'))
+    for name, st in stats.items():
+        want = engine.stats('course', name)
+        assert st['count'] == want['count']
+        assert st['min'] == want['min'] and st['max'] == want['max']
+        assert st['mean'] == pytest.approx(want['mean'])
+        assert st['std'] == pytest.approx(want['std'], abs=1e-9)